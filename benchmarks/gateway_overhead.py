@@ -0,0 +1,72 @@
+"""
+Compares the per request overhead of the django rest framework gateway
+(AfricasTalkingUssdGateway) and the plain django one
+(SimpleAfricasTalkingUssdGateway).
+
+The journey is not run, ussd_dispatcher is replaced with one that returns
+a fixed response and sessions are kept in the local memory cache, so the
+numbers are only the cost of the view: parsing the request, building
+UssdRequest and rendering the response.
+
+Usage:
+    python benchmarks/gateway_overhead.py
+"""
+import os
+import sys
+import timeit
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for name, value in (('DJANGO_SETTINGS_MODULE', 'ussd_airflow.settings'),
+                    ('DYNAMODB_TABLE', 'journeyTable'),
+                    ('TEST_VARIABLE', 'variable_test'),
+                    ('ENVIRONMENT', 'sample_variable_two')):
+    os.environ.setdefault(name, value)
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test import RequestFactory, override_settings  # noqa: E402
+from ussd.core import UssdResponse  # noqa: E402
+from ussd.views import AfricasTalkingUssdGateway, \
+    SimpleAfricasTalkingUssdGateway  # noqa: E402
+
+PAYLOAD = {
+    "sessionId": "1234",
+    "text": "1*2",
+    "phoneNumber": "+254700000000",
+    "serviceCode": "*123#",
+    "language": "en",
+}
+NUMBER = 2000
+
+
+def dispatcher(self, ussd_request):
+    return UssdResponse("Balance is 250")
+
+
+def main():
+    factory = RequestFactory()
+    views = (
+        ('AfricasTalkingUssdGateway', AfricasTalkingUssdGateway.as_view()),
+        ('SimpleAfricasTalkingUssdGateway',
+         SimpleAfricasTalkingUssdGateway.as_view()),
+    )
+
+    # sessions are kept in memory so that only the views are compared
+    with mock.patch('ussd.core.BaseUssdView.ussd_dispatcher', dispatcher), \
+            override_settings(
+                USSD_SESSION_ENGINE='django.contrib.sessions.backends.cache'):
+        for name, view in views:
+            def call():
+                return view(factory.post('/', PAYLOAD))
+            call()
+            seconds = timeit.timeit(call, number=NUMBER)
+            print("{name:<35} {usec:8.1f} us/request".format(
+                name=name, usec=seconds / NUMBER * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Compares rendering a journey as a mermaid graph before and after the
+iterative graph builder.
+
+The previous implementation recursed once per screen (limited by the
+recursion limit) and built the mermaid text by concatenation, checking
+the screens already drawn in a list.
+
+Usage:
+    python benchmarks/graph_rendering.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for name, value in (('DJANGO_SETTINGS_MODULE', 'ussd_airflow.settings'),
+                    ('DYNAMODB_TABLE', 'journeyTable'),
+                    ('TEST_VARIABLE', 'variable_test'),
+                    ('ENVIRONMENT', 'sample_variable_two')):
+    os.environ.setdefault(name, value)
+
+import django  # noqa: E402
+
+django.setup()
+
+from ussd.core import UssdRequest, _registered_ussd_handlers, \
+    render_journey_as_mermaid_text  # noqa: E402
+from ussd.graph import Graph, Vertex, get_mermaid_link_line, \
+    get_mermaid_node_text  # noqa: E402
+
+
+def generate_journey(screens):
+    """
+    A menu every 3 screens routing to an input screen, a router and the
+    next menu, the last menu routes to a quit screen.
+    """
+    journey = {
+        "initial_screen": {"type": "initial_screen",
+                           "next_screen": "menu_0",
+                           "default_language": "en"},
+        "goodbye": {"type": "quit_screen", "text": "Goodbye"},
+    }
+    menus = max(screens // 3, 1)
+    for i in range(menus):
+        next_menu = "menu_{}".format(i + 1) if i + 1 < menus else "goodbye"
+        journey["menu_{}".format(i)] = {
+            "type": "menu_screen",
+            "text": "Menu {}".format(i),
+            "options": [
+                {"text": "Enter amount",
+                 "next_screen": "input_{}".format(i)},
+                {"text": "Next", "next_screen": next_menu},
+            ]
+        }
+        journey["input_{}".format(i)] = {
+            "type": "input_screen",
+            "text": "Enter amount",
+            "input_identifier": "amount_{}".format(i),
+            "next_screen": "router_{}".format(i)
+        }
+        journey["router_{}".format(i)] = {
+            "type": "router_screen",
+            "default_next_screen": next_menu,
+            "router_options": [
+                {"expression": "{{{{ amount_{} > 100 }}}}".format(i),
+                 "next_screen": "menu_0"}
+            ]
+        }
+    return journey
+
+
+def recursive_render_graph(handler, ussd_journey, graph):
+    """
+    Previous UssdHandlerAbstract.render_graph kept as the reference.
+    """
+    graph.add_vertex(Vertex(handler.handler, handler.show_ussd_content()))
+    next_screens = handler.get_next_screens()
+    [graph.add_link(i) for i in next_screens]
+    for i in next_screens:
+        if not (graph.get_vertex(i.end) and
+                graph.get_vertex(i.end)['text'] != ""):
+            graph.add_vertex(i.end)
+            if ussd_journey.get(i.end.name):
+                next_screen_content = ussd_journey[i.end.name]
+                recursive_render_graph(
+                    handler.get_handler(next_screen_content['type'])(
+                        handler.ussd_request, i.end.name,
+                        next_screen_content, handler.initial_screen,
+                        raw_text=handler.raw_text),
+                    ussd_journey, graph)
+
+
+def recursive_mermaid_text(ussd_journey):
+    """
+    Previous render_journey_as_mermaid_text kept as the reference.
+    """
+    graph = Graph()
+    initial_screen = ussd_journey['initial_screen']
+    recursive_render_graph(
+        _registered_ussd_handlers['initial_screen'](
+            UssdRequest("dummy", "dummy", "", "en"), "initial_screen",
+            initial_screen, initial_screen, raw_text=True),
+        ussd_journey, graph)
+
+    added_texts = []
+    mermaid_text = "graph TD\n"
+    for i in graph.get_edges():
+        link = graph.convert_dict_to_link(i)
+        for vertex in (link.start, link.end):
+            if vertex.name in added_texts:
+                text = vertex.name
+            else:
+                text = get_mermaid_node_text(vertex)
+                added_texts.append(vertex.name)
+            mermaid_text += text
+            if vertex is link.start:
+                mermaid_text += get_mermaid_link_line(link)
+        mermaid_text += '\n'
+    return mermaid_text
+
+
+def run(screens, number=3):
+    journey = generate_journey(screens)
+
+    iterative = render_journey_as_mermaid_text(journey)
+    try:
+        recursive = recursive_mermaid_text(journey)
+    except RecursionError:
+        recursive = None
+    else:
+        assert recursive == iterative, "graphs differ for %s screens" % \
+            screens
+
+    iterative_time = timeit.timeit(
+        lambda: render_journey_as_mermaid_text(journey),
+        number=number) / number
+    if recursive is None:
+        recursive_time = "RecursionError"
+    else:
+        recursive_time = "%.4fs" % (timeit.timeit(
+            lambda: recursive_mermaid_text(journey),
+            number=number) / number)
+
+    print("{screens:>8} {edges:>8} {recursive:>16} {iterative:>12}".format(
+        screens=len(journey), edges=iterative.count('\n') - 1,
+        recursive=recursive_time, iterative="%.4fs" % iterative_time))
+
+
+def main():
+    print("{:>8} {:>8} {:>16} {:>12}".format(
+        "screens", "edges", "recursive", "iterative"))
+    for screens in (100, 1000, 10000):
+        run(screens)
+
+
+if __name__ == '__main__':
+    main()
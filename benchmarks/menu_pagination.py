@@ -0,0 +1,97 @@
+"""
+Compares menu pagination before and after ussd.pagination.
+
+The previous implementation recursed once per option and sliced the
+option list on every call (quadratic and limited by the recursion limit),
+the current one walks the options once and generates pages lazily.
+
+Usage:
+    python benchmarks/menu_pagination.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ussd.pagination import paginate, get_page  # noqa: E402
+
+TEXT_LIMIT = 182
+MORE_OPTION = "More\n"
+BACK_OPTION = "Back\n"
+
+
+def recursive_paginate_options(ussd_text, pages, options):
+    """
+    Previous MenuScreen.paginate_options kept as the reference.
+    """
+    text = ""
+    if len(pages) > 0:
+        text += "00. {back_option}".format(back_option=BACK_OPTION)
+
+    if not options:
+        pages.append(ussd_text + text)
+        return pages
+
+    ussd_text_cadidate = ussd_text + options[0]
+    text += "98. {more_option}".format(more_option=MORE_OPTION) \
+        if len(ussd_text_cadidate) > TEXT_LIMIT - len(text) else ''
+    if len(ussd_text_cadidate) <= TEXT_LIMIT - len(text):
+        ussd_text = ussd_text + options[0]
+    else:
+        pages.append(ussd_text + text)
+        ussd_text = options[0]
+    return recursive_paginate_options(ussd_text, pages, options[1:])
+
+
+def make_options(count):
+    return ["{index}. option {index}\n".format(index=index)
+            for index in range(1, count + 1)]
+
+
+def run(count, number=5):
+    options = make_options(count)
+
+    iterative = list(paginate("Choose an option", options, TEXT_LIMIT,
+                              MORE_OPTION, BACK_OPTION))
+    try:
+        recursive = recursive_paginate_options(
+            "Choose an option\n", [], options)
+    except RecursionError:
+        recursive = None
+    else:
+        assert recursive == iterative, "pages differ for %s options" % count
+
+    iterative_time = timeit.timeit(
+        lambda: list(paginate("Choose an option", options, TEXT_LIMIT,
+                              MORE_OPTION, BACK_OPTION)),
+        number=number) / number
+    first_page_time = timeit.timeit(
+        lambda: get_page(paginate("Choose an option", options, TEXT_LIMIT,
+                                  MORE_OPTION, BACK_OPTION), 1),
+        number=number) / number
+
+    if recursive is None:
+        recursive_time = "RecursionError"
+    else:
+        recursive_time = "%.6fs" % (timeit.timeit(
+            lambda: recursive_paginate_options(
+                "Choose an option\n", [], options),
+            number=number) / number)
+
+    print("{count:>8} {pages:>6} {recursive:>16} {iterative:>12} "
+          "{first_page:>12}".format(
+              count=count, pages=len(iterative), recursive=recursive_time,
+              iterative="%.6fs" % iterative_time,
+              first_page="%.6fs" % first_page_time))
+
+
+def main():
+    print("{:>8} {:>6} {:>16} {:>12} {:>12}".format(
+        "options", "pages", "recursive", "iterative", "first page"))
+    for count in (10, 100, 1000, 10000):
+        run(count)
+
+
+if __name__ == '__main__':
+    main()
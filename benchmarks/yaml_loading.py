@@ -0,0 +1,120 @@
+"""
+Compares the ways of loading a large customer journey: the pure python
+safe loader used before, the libyaml safe loader and
+ussd.yaml_loader.load_file without the on disk cache, with a cold cache
+(parsed then written to the cache) and with a warm cache.
+
+Usage:
+    python benchmarks/yaml_loading.py [number of screens]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+for name, value in (('DJANGO_SETTINGS_MODULE', 'ussd_airflow.settings'),
+                    ('DYNAMODB_TABLE', 'journeyTable'),
+                    ('TEST_VARIABLE', 'variable_test'),
+                    ('ENVIRONMENT', 'sample_variable_two')):
+    os.environ.setdefault(name, value)
+
+import django  # noqa: E402
+
+django.setup()
+
+import yaml  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from ussd import yaml_loader  # noqa: E402
+
+try:
+    from yaml import CSafeLoader
+except ImportError:
+    CSafeLoader = None
+
+NUMBER = 10
+
+
+def generate_journey(screens):
+    lines = [
+        "initial_screen:",
+        "  type: initial_screen",
+        "  next_screen: screen_0",
+        "  default_language: en",
+        ""
+    ]
+    for i in range(screens):
+        lines.extend([
+            "screen_{}:".format(i),
+            "  type: menu_screen",
+            "  text:",
+            "    en: |",
+            "      Screen {} for {{{{phone_number}}}}".format(i),
+            "    sw: |",
+            "      Skrini {}".format(i),
+            "  options:",
+            "    - text: Next",
+            "      next_screen: screen_{}".format((i + 1) % screens),
+            "    - text: Back",
+            "      next_screen: screen_{}".format(max(i - 1, 0)),
+            "",
+        ])
+    return "\n".join(lines)
+
+
+def time_cold_cache(file_path, cache_directory):
+    seconds = 0
+    for _ in range(NUMBER):
+        shutil.rmtree(cache_directory, ignore_errors=True)
+        start = time.perf_counter()
+        yaml_loader.load_file(file_path)
+        seconds += time.perf_counter() - start
+    return seconds
+
+
+def main():
+    screens = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    content = generate_journey(screens).encode()
+    print("{} screens, {} lines".format(screens, content.count(b"\n")))
+
+    directory = tempfile.mkdtemp()
+    try:
+        file_path = os.path.join(directory, 'journey.yml')
+        with open(file_path, 'wb') as f:
+            f.write(content)
+        cache_directory = os.path.join(directory, 'cache')
+
+        def load_file():
+            return yaml_loader.load_file(file_path)
+
+        timings = [("yaml.safe_load",
+                    timeit.timeit(lambda: yaml.safe_load(content),
+                                  number=NUMBER))]
+        if CSafeLoader is not None:
+            timings.append(("CSafeLoader", timeit.timeit(
+                lambda: yaml.load(content, Loader=CSafeLoader),
+                number=NUMBER)))
+        with override_settings(USSD_YAML_CACHE={"enabled": False}):
+            timings.append(("load_file no cache",
+                            timeit.timeit(load_file, number=NUMBER)))
+        with override_settings(USSD_YAML_CACHE={
+                "enabled": True, "directory": cache_directory}):
+            timings.append(("load_file cold cache",
+                            time_cold_cache(file_path, cache_directory)))
+            load_file()
+            timings.append(("load_file warm cache",
+                            timeit.timeit(load_file, number=NUMBER)))
+    finally:
+        shutil.rmtree(directory)
+
+    for name, seconds in timings:
+        print("{name:<20} {ms:10.2f} ms".format(
+            name=name, ms=seconds / NUMBER * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -31,7 +31,15 @@ class UssdConfig(AppConfig):
             print("loaded screens:", i)
         print("loading filters")
 
-        from ussd.core import env, _registered_filters, _built_in_functions
+        from ussd.core import env, _registered_filters, \
+            _built_in_functions, capture_environ_context
         env.filters.update(_registered_filters)
 
         env.globals.update(_built_in_functions)
+
+        # environment variables exposed to templates are captured once
+        capture_environ_context()
+
+        from ussd.warm_up import get_warm_up_options, warm_up_journeys
+        if get_warm_up_options()['on_startup']:
+            warm_up_journeys()
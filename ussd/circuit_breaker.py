@@ -0,0 +1,154 @@
+"""
+Circuit breaker for backends called by http_screen.
+
+The breaker state is kept in the django cache so that all workers share
+it. Calls are counted in fixed windows, the circuit opens when the
+failure rate in a window reaches failure_threshold (calls slower than
+slow_call_duration count as failures). While open calls fail immediately
+with CircuitOpen, after recovery_timeout one call is let through (half
+open) and the circuit closes if it succeeds or opens again if it fails.
+
+Defaults are set with the USSD_CIRCUIT_BREAKER setting::
+
+    USSD_CIRCUIT_BREAKER = {
+        "enabled": False,          # use a breaker for every http_screen
+        "failure_threshold": 0.5,  # failure rate that opens the circuit
+        "minimum_calls": 10,       # calls needed before computing the rate
+        "window": 60,              # seconds calls are counted for
+        "slow_call_duration": None,
+        "recovery_timeout": 30,    # seconds the circuit stays open
+        "cache_alias": "default"
+    }
+
+Unknown options raise ValueError.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from ussd import defaults as ussd_airflow_variables
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+BREAKER_OPTIONS = ('enabled', 'failure_threshold', 'minimum_calls',
+                   'window', 'slow_call_duration', 'recovery_timeout',
+                   'cache_alias')
+
+
+def get_breaker_options(overrides: dict = None) -> dict:
+    options = dict(ussd_airflow_variables.circuit_breaker)
+    options.update(getattr(settings, 'USSD_CIRCUIT_BREAKER', {}))
+    options.update(overrides or {})
+    unknown = set(options) - set(BREAKER_OPTIONS)
+    if unknown:
+        raise ValueError(
+            "Unknown circuit breaker options {unknown}, use {choices}".format(
+                unknown=sorted(unknown), choices=BREAKER_OPTIONS))
+    return options
+
+
+class CircuitBreaker(object):
+    """
+    :param name: identifies the backend e.g its host, all breakers with
+        the same name share state.
+    """
+    key_prefix = 'ussd_circuit_breaker'
+
+    def __init__(self, name, failure_threshold=0.5, minimum_calls=10,
+                 window=60, slow_call_duration=None, recovery_timeout=30,
+                 cache_alias='default'):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = minimum_calls
+        self.window = window
+        self.slow_call_duration = slow_call_duration
+        self.recovery_timeout = recovery_timeout
+        self.cache = caches[cache_alias]
+
+    @classmethod
+    def from_options(cls, name, overrides: dict = None):
+        options = get_breaker_options(overrides)
+        options.pop('enabled', None)
+        return cls(name, **options)
+
+    def _key(self, *parts):
+        return ':'.join((self.key_prefix, self.name) + parts)
+
+    def _window_keys(self):
+        bucket = str(int(time.time() // self.window))
+        return self._key('calls', bucket), self._key('failures', bucket)
+
+    def _incr(self, key):
+        self.cache.add(key, 0, timeout=self.window * 2)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # expired between add and incr
+            self.cache.set(key, 1, timeout=self.window * 2)
+            return 1
+
+    @property
+    def state(self) -> str:
+        opened_at = self.cache.get(self._key('opened_at'))
+        if opened_at is None:
+            return 'closed'
+        if time.time() - opened_at < self.recovery_timeout:
+            return 'open'
+        return 'half_open'
+
+    def before_call(self):
+        """
+        Raises CircuitOpen if the call should not be made.
+        """
+        state = self.state
+        if state == 'open':
+            raise CircuitOpen("Circuit for {} is open".format(self.name))
+        if state == 'half_open' and not self.cache.add(
+                self._key('probe'), 1, timeout=self.recovery_timeout):
+            # another worker is probing the backend
+            raise CircuitOpen("Circuit for {} is half open".format(self.name))
+
+    def record_success(self, duration=None):
+        if self.slow_call_duration is not None and duration is not None \
+                and duration > self.slow_call_duration:
+            return self.record_failure()
+
+        if self.state == 'half_open':
+            self.close()
+        else:
+            self._incr(self._window_keys()[0])
+
+    def record_failure(self):
+        if self.state == 'half_open':
+            return self.open()
+
+        calls_key, failures_key = self._window_keys()
+        calls = self._incr(calls_key)
+        failures = self._incr(failures_key)
+        if calls >= self.minimum_calls and \
+                failures / calls >= self.failure_threshold:
+            self.open()
+
+    def record_ignored(self):
+        """
+        The call doesn't tell if the backend is healthy e.g its timeout was
+        capped by the request deadline, another call can probe it.
+        """
+        self.cache.delete(self._key('probe'))
+
+    def open(self):
+        # keep opened_at after recovery_timeout so that the circuit is half
+        # open until a probe succeeds
+        self.cache.set(self._key('opened_at'), time.time(),
+                       timeout=self.recovery_timeout + self.window)
+        self.cache.delete(self._key('probe'))
+
+    def close(self):
+        self.cache.delete_many(
+            [self._key('opened_at'), self._key('probe')] +
+            list(self._window_keys())
+        )
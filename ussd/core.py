@@ -5,40 +5,69 @@ from urllib.parse import unquote
 from copy import copy, deepcopy
 from rest_framework.views import APIView
 from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
 from structlog import get_logger
 import staticconf
 from django.conf import settings
 from importlib import import_module
 from django.contrib.sessions.backends import signed_cookies
-from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.base import CreateError, \
+    VALID_KEY_CHARS
+from django.utils.crypto import get_random_string
 from jinja2 import Template, Environment, TemplateSyntaxError
 from .screens.serializers import UssdBaseSerializer
 from rest_framework.serializers import SerializerMetaclass
 import re
 import json
+import hashlib
 import os
-import yaml
 from datetime import datetime
 from ussd.models import SessionLookup
-from annoying.functions import get_object_or_None
 from ussd import defaults as ussd_airflow_variables
-from django.utils import timezone
-import requests
+from ussd import http_client
+from ussd import yaml_loader
+from ussd.session_tracker import SessionTracker
+from ussd.session_lock import SessionLock, get_lock_options
+from ussd.journey_registry import JourneyRegistry
+from ussd.journey_analysis import TransitionIndex
+from ussd.forwarding_limit import ForwardingLimit, ForwardingLimitExceeded, \
+    get_forwarding_limit_options
 import inspect
+import time
 from ussd.tasks import report_session
 from ussd import utilities
+from ussd.template_cache import TemplateCache
+from ussd import template_cache as jinja_renderer
 from .graph import Graph, Link, Vertex, convert_graph_to_mermaid_text
-from collections import namedtuple
+from collections import namedtuple, ChainMap
+from types import MappingProxyType
+import attr
 import typing
+from functools import cached_property
 
 _registered_ussd_handlers = {}
 _registered_filters = {}
 _customer_journey_files = []
+_registered_journeys = []
 _built_in_functions = {}
+_compiled_journeys = {}
+_journey_registry = None
+_environ_context = None
 
 # initialize jinja2 environment
 env = Environment(keep_trailing_newline=True)
 
+# compiled templates and expressions shared by all requests
+template_cache = TemplateCache(
+    env,
+    maxsize=getattr(settings, 'USSD_TEMPLATE_CACHE_SIZE',
+                    ussd_airflow_variables.template_cache_size)
+)
+
+_SIMPLE_VAR_REGEX = re.compile(r'^{{\s*(\S*)\s*}}$')
+
 
 class MissingAttribute(Exception):
     pass
@@ -52,6 +81,10 @@ class DuplicateSessionId(Exception):
     pass
 
 
+class DeadlineExceeded(Exception):
+    pass
+
+
 def register_filter(func_name, *args, **kwargs):
     filter_name = func_name.__name__
     _registered_filters[filter_name] = func_name
@@ -62,6 +95,27 @@ def register_function(func_name, *args, **kwargs):
     _built_in_functions[function_name] = func_name
 
 
+def capture_environ_context():
+    """
+    Captures the environment variables exposed to jinja templates.
+
+    By default all environment variables are exposed, set
+    USSD_TEMPLATE_ENVIRON_ALLOWLIST to a list of variable names to expose
+    only those.
+    """
+    global _environ_context
+    allowlist = getattr(settings, 'USSD_TEMPLATE_ENVIRON_ALLOWLIST', None)
+    environ = dict(os.environ) if allowlist is None else \
+        {key: os.environ[key] for key in allowlist if key in os.environ}
+    _environ_context = MappingProxyType(environ)
+    return _environ_context
+
+
+def get_environ_context():
+    return _environ_context if _environ_context is not None \
+        else capture_environ_context()
+
+
 def get_session_engine():
     session_engine = import_module(getattr(settings, "USSD_SESSION_ENGINE",
                                            settings.SESSION_ENGINE))
@@ -73,6 +127,12 @@ def get_session_engine():
 
 def ussd_session(session_id):
     session = get_session_engine().SessionStore(session_key=session_id)
+    if hasattr(session, 'load_or_create'):
+        # engines that can get or create the session in one round trip
+        session._session_key = session_id
+        session.load_or_create()
+        return session
+
     session._session_key = session_id
     # Force load of session data
     session._session.keys()
@@ -85,25 +145,86 @@ def ussd_session(session_id):
             session.save(must_create=True)
         except CreateError:
             # Session wasn't unique, so another consumer is doing the same thing
+            if get_lock_options()['enabled']:
+                # requests wait for each other, see BaseUssdView.ussd_dispatcher
+                return ussd_session(session_id)
+            raise DuplicateSessionId("another sever is working"
+                                     "on this session id")
+    return session
+
+
+async def aussd_session(session_id):
+    """
+    Same as ussd_session but loads and creates the session with the async
+    session store methods.
+    """
+    session = get_session_engine().SessionStore(session_key=session_id)
+    if hasattr(session, 'aload_or_create'):
+        session._session_key = session_id
+        await session.aload_or_create()
+        return session
+
+    session._session_key = session_id
+    # Force load of session data
+    session._session_cache = await session.aload()
+    session._session_key = session_id
+
+    # If the session does not already exist, save to force our
+    # session key to be valid.
+    if not await session.aexists(session.session_key):
+        try:
+            await session.asave(must_create=True)
+        except CreateError:
+            # Session wasn't unique, so another consumer is doing the same thing
+            if get_lock_options()['enabled']:
+                return await aussd_session(session_id)
             raise DuplicateSessionId("another sever is working"
                                      "on this session id")
     return session
 
 
 def generate_session_id():
-    session_store = get_session_engine().SessionStore()
-    session_store.save()  # generate session_key
-    return session_store.session_key
+    # the session is created when it's first loaded, see ussd_session
+    return get_random_string(32, VALID_KEY_CHARS)
+
+
+def get_interaction_history_options() -> dict:
+    options = dict(ussd_airflow_variables.interaction_history)
+    options.update(getattr(settings, 'USSD_INTERACTION_HISTORY', {}))
+    if options['screen_text'] not in ('full', 'hash', 'omit'):
+        raise ValueError("USSD_INTERACTION_HISTORY screen_text should be "
+                         "one of full, hash or omit")
+    if options['timestamps'] not in ('datetime', 'epoch'):
+        raise ValueError("USSD_INTERACTION_HISTORY timestamps should be "
+                         "datetime or epoch")
+    return options
+
+
+def get_interaction_sink():
+    """
+    Returns the USSD_INTERACTION_SINK callable, the setting can be the
+    callable or its import path.
+    """
+    sink = getattr(settings, 'USSD_INTERACTION_SINK', None)
+    if isinstance(sink, str):
+        sink = utilities.str_to_class(sink)
+    return sink
+
+
+def get_journey_file_path(file_path):
+    # the path can have environment variables e.g {{BASE_DIR}}/journey.yml
+    return os.path.abspath(
+        template_cache.get_template(file_path).render(os.environ))
 
 
 def load_yaml(file_path, namespace):
-    file_path = Template(file_path).render(os.environ)
-    with open(os.path.abspath(file_path), 'r') as f:
-        yaml_dict = yaml.safe_load(f)
+    yaml_dict = yaml_loader.load_file(get_journey_file_path(file_path))
     staticconf.DictConfiguration(
         yaml_dict,
         namespace=namespace,
         flatten=False)
+    # journey content has changed, it will be compiled on next access
+    _compiled_journeys.pop(namespace, None)
 
 
 class UssdRequest(object):
@@ -124,6 +245,17 @@ class UssdRequest(object):
     :param language:
         Language to use to display ussd
 
+    :param budget:
+        Seconds the request has to be answered in, defaults to
+        USSD_REQUEST_BUDGET setting. Synchronous screens use the time
+        remaining (see remaining_time) and the request is forwarded to the
+        initial screen's deadline_exceeded_screen once it's exhausted.
+
+    :param fingerprint:
+        Identifies the gateway request e.g a hash of the session id and the
+        full text sent by the gateway. Used to detect duplicate requests,
+        see USSD_SESSION_LOCK replay policy.
+
     :param kwargs:
         Extra arguments.
         All the extra arguments will be set to the self attribute
@@ -145,8 +277,8 @@ class UssdRequest(object):
     def __init__(self, session_id, phone_number,
                  ussd_input, language, default_language=None,
                  use_built_in_session_management=False,
-                 expiry=180,
-                 **kwargs):
+                 expiry=180, budget=None, load_session=True,
+                 fingerprint=None, **kwargs):
         """
         :param session_id: Used to maintain session 
         :param phone_number: user dialing in   
@@ -158,8 +290,16 @@ class UssdRequest(object):
         then the session_id should be None and expiry can't be None. 
         :param expiry: Its only used if use_built_in_session_management has
         been enabled. 
+        :param budget: seconds available to respond to this request
+        :param load_session: set to False to load the session later e.g
+        with the async session methods, see acreate.
+        :param fingerprint: identifies the gateway request
         :param kwargs: All other extra arguments
         """
+        if budget is None:
+            budget = getattr(settings, 'USSD_REQUEST_BUDGET',
+                             ussd_airflow_variables.request_budget)
+        self.deadline = time.monotonic() + budget if budget else None
 
         self.expiry = expiry
         # A bit of defensive programming to make sure
@@ -188,16 +328,33 @@ class UssdRequest(object):
                     session_id)) < 8 and not use_built_in_session_management:
                 session_id = 's' * (8 - len(str(session_id))) + session_id
 
+        self.use_built_in_session_management = \
+            use_built_in_session_management
+        self.fingerprint = fingerprint
         self.phone_number = phone_number
         self.input = unquote(ussd_input)
         self.language = language
         self.default_language = default_language or 'en'
         self.session_id = session_id
-        self.session = ussd_session(self.session_id)
+        self.session = ussd_session(self.session_id) if load_session \
+            else None
 
         for key, value in kwargs.items():
             setattr(self, key, value)
 
+    @classmethod
+    async def acreate(cls, *args, **kwargs):
+        """
+        Creates a UssdRequest without blocking the event loop, to be used
+        in AsyncUssdView.
+        """
+        if kwargs.get('use_built_in_session_management'):
+            # session lookup uses the orm
+            return await sync_to_async(cls)(*args, **kwargs)
+        ussd_request = cls(*args, load_session=False, **kwargs)
+        ussd_request.session = await aussd_session(ussd_request.session_id)
+        return ussd_request
+
 
     def forward(self, handler_name):
         """
@@ -215,38 +372,40 @@ class UssdRequest(object):
 
         # delete session if it exist
         all_variables.pop("session", None)
+        all_variables.pop("deadline", None)
+        all_variables.pop("use_built_in_session_management", None)
+        all_variables.pop("fingerprint", None)
 
         return all_variables
 
-    def get_or_create_session_id(self, user_id):
-        session_mapping = get_object_or_None(SessionLookup, user_id=user_id)
-
-        # if its missing create a new one.
-        if session_mapping is None:
-            session_mapping = SessionLookup.objects.create(
-                user_id=user_id,
-                session_id=generate_session_id()
-            )
-        else:
-            session = ussd_session(session_mapping.session_id)
-
-            # get last time session was updated
-            if session.get(ussd_airflow_variables.last_update):
-                last_updated = utilities.string_to_datetime(
-                    session[ussd_airflow_variables.last_update])
-            else:
-                last_updated = timezone.make_naive(session_mapping.updated_at)
+    def remaining_time(self):
+        """
+        Seconds left before the deadline, None if there is no deadline.
+        """
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0)
 
-            # check inactivity or if session has been closed
-            inactivity_duration = (datetime.now() - last_updated).total_seconds()
-            if inactivity_duration > self.expiry or \
-                    session.get(ussd_airflow_variables.expiry):
+    def check_deadline(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded(
+                "Request budget exhausted for session {}".format(
+                    self.session_id))
 
-                # update session_mapping with the new session_id
-                session_mapping.session_id = generate_session_id()
-                session_mapping.save()
+    def get_or_create_session_id(self, user_id):
+        # new session if the user has been inactive for more than expiry
+        # seconds or the session has been closed
+        return SessionLookup.objects.resolve(
+            user_id, generate_session_id(), self.expiry)
 
-        return session_mapping.session_id
+    def close_session(self):
+        """
+        Ends the session, the next request starts a new session when using
+        built in session management.
+        """
+        self.session[ussd_airflow_variables.expiry] = True
+        if self.use_built_in_session_management:
+            SessionLookup.objects.close(self.phone_number, self.session_id)
 
 
 
@@ -283,6 +442,11 @@ class UssdViewMetaClass(type):
         path = getattr(cls,'customer_journey_conf')
         if path is not None:
             _customer_journey_files.append(getattr(cls,'customer_journey_conf'))
+            namespace = getattr(cls, 'customer_journey_namespace', None)
+            if namespace is not None and \
+                    (path, namespace) not in _registered_journeys:
+                # used to load journeys before the first request
+                _registered_journeys.append((path, namespace))
 
 
 class UssdHandlerMetaClass(type):
@@ -315,15 +479,20 @@ class UssdHandlerMetaClass(type):
 
 class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
     abstract = True
+    # screens that don't do any I/O set this so that AsyncUssdView handles
+    # them in the event loop instead of a thread.
+    async_safe = False
 
     def __init__(self, ussd_request: UssdRequest,
                  handler: str, screen_content: dict,
                  initial_screen: dict, logger=None,
-                 raw_text=False):
+                 raw_text=False, static_texts=frozenset()):
         self.ussd_request = ussd_request
         self.handler = handler
         self.screen_content = screen_content
         self.raw_text = raw_text
+        # texts of the screen's journey that don't have template variables
+        self.static_texts = static_texts
 
         self.SINGLE_VAR = re.compile(r"^%s\s*(\w*)\s*%s$" % (
             '{{', '}}'))
@@ -337,19 +506,25 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
 
         self.pagination_config = self.initial_screen.get('pagination_config',
                                                          {})
+        self.ussd_text_limit = self.pagination_config.\
+            get("ussd_text_limit", ussd_airflow_variables.ussd_text_limit)
 
-        self.pagination_more_option = self._add_end_line(
+    # pagination options are only rendered by screens that paginate
+    @cached_property
+    def pagination_more_option(self):
+        return self._add_end_line(
             self.get_text(
                 self.pagination_config.get('more_option', "more\n")
             )
         )
-        self.pagination_back_option = self._add_end_line(
+
+    @cached_property
+    def pagination_back_option(self):
+        return self._add_end_line(
             self.get_text(
                 self.pagination_config.get('back_option', "back\n")
             )
         )
-        self.ussd_text_limit = self.pagination_config.\
-            get("ussd_text_limit", ussd_airflow_variables.ussd_text_limit)
 
     def handle(self):
         if not self.ussd_request.input:
@@ -358,6 +533,15 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
                 else UssdResponse(str(ussd_response))
         return self.handle_ussd_input(self.ussd_request.input)
 
+    async def ahandle(self):
+        """
+        Used by AsyncUssdView, handle runs in a thread unless the screen is
+        async_safe. Screens can override it to do I/O asynchronously.
+        """
+        if self.async_safe:
+            return self.handle()
+        return await sync_to_async(self.handle)()
+
     def get_text_limit(self):
         return self.ussd_text_limit
 
@@ -444,29 +628,33 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
         return dict(iter(session.items()))
 
     @classmethod
-    def get_context(cls, session, extra_context=None):
-        context = cls.get_session_items(session)
-
-        context.update(
-            dict(os.environ)
-        )
-
+    def get_context(cls, session, extra_context=None) -> ChainMap:
+        """
+        Returns the context used to evaluate templates.
+
+        The context is made of layers that are looked up in order
+        without being copied:
+            - variables added while rendering
+            - built in functions
+            - timestamp (now)
+            - extra context
+            - environment variables (captured once)
+            - session
+        """
+        layers = [{}, _built_in_functions, dict(now=datetime.now())]
         if extra_context is not None:
-            context.update(extra_context)
-
-        # add timestamp in the context
-        context.update(
-            dict(now=datetime.now())
-        )
-
-        # add all built in functions
-        context.update(
-            _built_in_functions
-        )
-        return context
+            layers.append(extra_context)
+        layers.append(get_environ_context())
+        layers.append(session)
+        return ChainMap(*layers)
 
     @staticmethod
-    def render_text(session, text, context=None, extra=None, encode=None):
+    def render_text(session, text, context=None, extra=None, encode=None,
+                    static_texts=frozenset()):
+        if text in static_texts:
+            # classified when the journey was compiled, no need for jinja
+            return json.dumps(text) if encode == 'json' else text
+
         if context is None:
             context = UssdHandlerAbstract.get_context(
                 session
@@ -475,8 +663,8 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
         if extra:
             context.update(extra)
 
-        template = env.from_string(text or '')
-        text = template.render(context)
+        template = template_cache.get_template(text or '')
+        text = jinja_renderer.render(template, context)
         return json.dumps(text) if encode == 'json' else text
 
     def get_text(self, text_context=None):
@@ -495,7 +683,8 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
             return text_context
         return self.render_text(
             self.ussd_request.session,
-            text_context
+            text_context,
+            static_texts=self.static_texts
         )
 
     @classmethod
@@ -513,10 +702,8 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
 
         # Check if the expression is a simple variable lookup (e.g., "{{ variable_name }}")
         # without any filters or complex logic, to return the raw object.
-        simple_var_regex = re.compile(r'^{{\s*(\S*)\s*}}$')
-        match = simple_var_regex.match(expression)
+        match = _SIMPLE_VAR_REGEX.match(expression)
         if match:
-            variable_name = match.group(1)
             variable_name = match.group(1)
             # Check if the variable exists in the context and return its raw value
             if variable_name in context:
@@ -526,17 +713,20 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
         # Original logic for rendering as a template string or compiling expression
         if isinstance(expression, str) and ('{{' in expression or '{%' in expression or '{#' in expression):
             try:
-                return env.from_string(expression).render(context)
+                return jinja_renderer.render(
+                    template_cache.get_template(expression), context)
             except Exception:
                 # Fallback to default if rendering fails
                 return default
         elif isinstance(expression, str):
             try:
-                expr = env.compile_expression(expression)
-                return expr(context)
+                expr = template_cache.get_expression(expression)
+                return jinja_renderer.evaluate(expr, context)
             except Exception:
                 try:
-                    return env.from_string(expression or '').render(context)
+                    return jinja_renderer.render(
+                        template_cache.get_template(expression or ''),
+                        context)
                 except Exception:
                     return default
         return default
@@ -564,6 +754,12 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
                     return True
         return False
 
+    @staticmethod
+    def _is_static_text(text):
+        # jinja normalizes new lines so text with \r is not left as is
+        return isinstance(text, str) and '\r' not in text and \
+            not UssdHandlerAbstract._contains_vars(text)
+
     @staticmethod
     def _add_end_line(text):
         if text and '\n' not in text:
@@ -644,8 +840,7 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
             session_id=session.session_key
         )
         logger.info("sending_request", **http_request_conf)
-        print(f"DEBUG: make_request - http_request_conf: {http_request_conf}") # Debug print
-        response = requests.request(**http_request_conf)
+        response = http_client.request(**http_request_conf)
         logger.info("response", status_code=response.status_code,
                          content=response.content)
 
@@ -681,26 +876,46 @@ class UssdHandlerAbstract(object, metaclass=UssdHandlerMetaClass):
         raise NotImplementedError
 
     def render_graph(self, ussd_journey: dict, graph: Graph):
-        # adding the screen as vertex
-        graph.add_vertex(Vertex(self.handler, self.show_ussd_content()))
-
-        # get next screens
-        next_screens = self.get_next_screens()
-
-        # add links
-        [graph.add_link(i) for i in next_screens]
-
-        for i in next_screens:
+        """
+        Adds this screen and the screens reachable from it to graph.
 
-            # check if node has been created
-            if not (graph.get_vertex(i.end) and graph.get_vertex(i.end)['text'] != ""):
-                graph.add_vertex(i.end)
-                if ussd_journey.get(i.end.name):
-                    next_screen_content = ussd_journey[i.end.name]
-                    handler = self.get_handler(next_screen_content['type'])
-                    handler(self.ussd_request, i.end.name, next_screen_content,
-                            self.initial_screen, raw_text=self.raw_text). \
-                    render_graph(ussd_journey, graph)
+        Screens are visited depth first with a stack, journeys can have
+        more screens than the recursion limit, and each screen is
+        rendered once.
+        """
+        rendered = set()
+
+        def render(handler):
+            # adding the screen as vertex
+            graph.add_vertex(Vertex(handler.handler,
+                                    handler.show_ussd_content()))
+            rendered.add(handler.handler)
+
+            # add links
+            next_screens = handler.get_next_screens()
+            for link in next_screens:
+                graph.add_link(link)
+            return iter(next_screens)
+
+        stack = [render(self)]
+        while stack:
+            for link in stack[-1]:
+                if link.end.name in rendered:
+                    continue
+                graph.add_vertex(link.end)
+                next_screen_content = ussd_journey.get(link.end.name)
+                if next_screen_content:
+                    screen_type = next_screen_content['type']
+                    handler = self.get_handler(screen_type)(
+                        self.ussd_request, link.end.name,
+                        next_screen_content, self.initial_screen,
+                        logger=self.logger.bind(handler=link.end.name,
+                                                screen_type=screen_type),
+                        raw_text=self.raw_text)
+                    stack.append(render(handler))
+                    break
+            else:
+                stack.pop()
 
 
 NextScreens = namedtuple("NextScreens", "next_screens links")
@@ -722,98 +937,294 @@ def _resolve_inheritance(screen_name: str, ussd_content: dict) -> dict:
         return merged_config
     return screen_config
 
-class UssdView(APIView, metaclass=UssdViewMetaClass):
+
+def _get_next_screen_names(screen_content) -> frozenset:
     """
-    To create Ussd View requires the following things:
-        - Inherit from **UssdView** (Mandatory)
-            .. code-block:: python
+    Returns the names of all screens a screen can forward to.
+    """
+    if isinstance(screen_content, str):
+        return frozenset((screen_content,))
 
-                from ussd.core import UssdView
+    names = set()
 
-        - Define Http method either **get** or **post** (Mandatory)
-            The http method should return Ussd Request
+    def add(next_screen):
+        if isinstance(next_screen, str):
+            names.add(next_screen)
+        elif isinstance(next_screen, list):
+            for option in next_screen:
+                if isinstance(option, dict):
+                    add(option.get('next_screen'))
 
-                .. autoclass:: ussd.core.UssdRequest
+    add(screen_content.get('next_screen'))
+    add(screen_content.get('default_next_screen'))
+    add(screen_content.get('deadline_exceeded_screen'))
+    add(screen_content.get('on_failure'))
+    add(screen_content.get('circuit_open_next_screen'))
+    for key in ('router_options', 'options'):
+        add(screen_content.get(key))
+    if isinstance(screen_content.get('items'), dict):
+        add(screen_content['items'].get('next_screen'))
+    return frozenset(names)
 
-        - define this varialbe *customer_journey_conf*
-            This is the path of the file that has ussd screens
-            If you want your file to be dynamic implement the
-            following method **get_customer_journey_conf** it
-            will be called by request object
 
-        - define this variable *customer_journey_namespace*
-            Ussd_airflow uses this namespace to save the
-            customer journey content in memory. If you want
-            customer_journey_namespace to be dynamic implement
-            this method **get_customer_journey_namespace** it
-            will be called with request object
+_TEXT_FIELDS = ('text', 'error_message', 'more_option', 'back_option')
 
-        - override HttpResponse
-            In ussd airflow the http method return UssdRequest object
-            not Http response. Then ussd view gets UssdResponse object
-            and convert it to HttpResponse. The default HttpResponse
-            returned is a normal HttpResponse with body being ussd text
 
-            To override HttpResponse returned define this method.
-            **ussd_response_handler** it will be called with
-            **UssdResponse** object.
+def _classify_texts(screen_content, static_texts: set) -> set:
+    """
+    Walks the screen content adding texts that don't have template
+    variables (in any language) to static_texts, texts with variables
+    are compiled so that rendering them doesn't parse them.
+    """
+    def classify(text):
+        if isinstance(text, dict):
+            for value in text.values():
+                classify(value)
+        elif UssdHandlerAbstract._is_static_text(text):
+            static_texts.add(text)
+        elif isinstance(text, str):
+            try:
+                template_cache.get_template(text)
+            except TemplateSyntaxError:
+                pass
+
+    def walk(content):
+        if isinstance(content, dict):
+            for key, value in content.items():
+                if key in _TEXT_FIELDS:
+                    classify(value)
+                walk(value)
+        elif isinstance(content, list):
+            for value in content:
+                walk(value)
+
+    walk(screen_content)
+    return static_texts
+
+
+@attr.s(frozen=True)
+class CompiledScreen(object):
+    """
+    A screen whose inheritance has been resolved and whose handler
+    class has been looked up.
 
-                .. autoclass:: ussd.core.UssdResponse
+    The content is shared by every request using the journey,
+    handlers should treat it as read only.
+    """
+    name = attr.ib()
+    screen_type = attr.ib()
+    handler = attr.ib()
+    content = attr.ib()
+    next_screens = attr.ib(factory=frozenset)
 
-    Example of Ussd view
+    def get_handler(self):
+        # handler might have been registered after the journey was compiled
+        return self.handler or _registered_ussd_handlers[self.screen_type]
 
-    .. code-block:: python
 
-        from ussd.core import UssdView, UssdRequest
+@attr.s(frozen=True)
+class CompiledJourney(object):
+    """
+    Pre-resolved representation of a customer journey.
 
+    It is built once per namespace and reused by every request,
+    so that run_handlers doesn't need to read staticconf and resolve
+    inheritance on every hop.
+    """
+    namespace = attr.ib()
+    screens = attr.ib()
+    initial_screen = attr.ib()
+    static_texts = attr.ib(factory=frozenset)
+    # set when the journey is loaded by the journey registry
+    version = attr.ib(default=None)
+    transitions = attr.ib(default=None)
+
+    def __contains__(self, screen_name):
+        return screen_name in self.screens
+
+    def get_screen(self, screen_name: str) -> CompiledScreen:
+        try:
+            return self.screens[screen_name]
+        except KeyError:
+            raise InvalidAttribute(
+                "Screen '{screen}' not found in journey {namespace}".format(
+                    screen=screen_name, namespace=self.namespace)
+            )
 
-        class SampleOne(UssdView):
+    def get_next_screens(self, screen_name: str) -> frozenset:
+        return self.get_screen(screen_name).next_screens
 
-            def get(self, req):
-                return UssdRequest(
-                    phone_number=req.data['phoneNumber'].strip('+'),
-                    session_id=req.data['sessionId'],
-                    ussd_input=text,
-                    service_code=req.data['serviceCode'],
-                    language=req.data.get('language', 'en')
-                )
+    def check_transition(self, screen_name: str, next_screen: str):
+        """
+        Raises InvalidAttribute if screen_name can't forward to next_screen
+        according to the journey.
+        """
+        if not self.transitions.is_valid_transition(screen_name,
+                                                    next_screen):
+            raise InvalidAttribute(
+                "Screen '{screen}' can't forward to '{next_screen}' in "
+                "journey {namespace}".format(
+                    screen=screen_name, next_screen=next_screen,
+                    namespace=self.namespace)
+            )
 
-    Example of Ussd View that defines its own HttpResponse.
 
-    .. code-block:: python
+def compile_journey(ussd_content: dict, namespace=None,
+                    version=None) -> CompiledJourney:
+    resolved = {}
 
-        from ussd.core import UssdView, UssdRequest
+    def resolve(screen_name, ancestors=()):
+        if screen_name in resolved:
+            return resolved[screen_name]
+        if screen_name in ancestors:
+            raise InvalidAttribute(
+                "Inheritance cycle detected for screen '{}'".format(
+                    screen_name))
+        screen_config = ussd_content[screen_name]
+        if isinstance(screen_config, dict) and 'inherit' in screen_config:
+            inherited_screen_name = screen_config['inherit']
+            if inherited_screen_name not in ussd_content:
+                raise InvalidAttribute(
+                    f"Inherited screen '{inherited_screen_name}' not found "
+                    f"for screen '{screen_name}'")
+            inherited_config = resolve(inherited_screen_name,
+                                       ancestors + (screen_name,))
+            screen_config = {
+                **{k: v for k, v in inherited_config.items()
+                   if k != 'inherit'},
+                **screen_config
+            }
+        resolved[screen_name] = deepcopy(screen_config)
+        return resolved[screen_name]
+
+    screens = {}
+    static_texts = set()
+    for screen_name in ussd_content:
+        screen_content = resolve(screen_name)
+        if screen_name == "initial_screen" and \
+                isinstance(screen_content, str):
+            screen_type = "initial_screen"
+        elif isinstance(screen_content, dict):
+            screen_type = screen_content.get('type')
+        else:
+            # not a screen definition, e.g a scalar
+            continue
+        screens[screen_name] = CompiledScreen(
+            name=screen_name,
+            screen_type=screen_type,
+            handler=_registered_ussd_handlers.get(screen_type),
+            content=screen_content,
+            next_screens=_get_next_screen_names(screen_content)
+        )
+        _classify_texts(screen_content, static_texts)
 
+    initial_screen = resolved.get('initial_screen')
+    return CompiledJourney(
+        namespace=namespace,
+        screens=MappingProxyType(screens),
+        initial_screen=initial_screen
+        if isinstance(initial_screen, dict) or initial_screen is None
+        else {"initial_screen": initial_screen},
+        static_texts=frozenset(static_texts),
+        version=version,
+        transitions=TransitionIndex(
+            MappingProxyType({screen.name: screen.next_screens
+                              for screen in screens.values()}),
+            MappingProxyType({screen.name: screen.screen_type
+                              for screen in screens.values()}),
+            inherited=frozenset(
+                screen_config['inherit']
+                for screen_config in ussd_content.values()
+                if isinstance(screen_config, dict) and
+                'inherit' in screen_config
+            )
+        )
+    )
 
-        class SampleOne(UssdView):
 
-            def get(self, req):
-                return UssdRequest(
-                    phone_number=req.data['phoneNumber'].strip('+'),
-                    session_id=req.data['sessionId'],
-                    ussd_input=text,
-                    service_code=req.data['serviceCode'],
-                    language=req.data.get('language', 'en')
-                )
+def get_compiled_journey(namespace: str) -> CompiledJourney:
+    """
+    Returns the compiled journey of a namespace loaded with load_yaml
+    compiling it on first access.
+    """
+    compiled_journey = _compiled_journeys.get(namespace)
+    if compiled_journey is None:
+        compiled_journey = compile_journey(
+            staticconf.config.get_namespace(namespace).get_config_values(),
+            namespace=namespace
+        )
+        _compiled_journeys[namespace] = compiled_journey
+    return compiled_journey
 
-            def ussd_response_handler(self, ussd_response):
-                    if ussd_response.status:
-                        res = 'CON' + ' ' + str(ussd_response)
-                        response = HttpResponse(res)
-                    else:
-                        res = 'END' + ' ' + str(ussd_response)
-                        response = HttpResponse(res)
-                    return response
+def _compile_journey_version(ussd_content: dict, namespace: str,
+                             version: str) -> CompiledJourney:
+    # versions are compiled in the reload thread, they are not written to
+    # staticconf which is read by requests being handled
+    return compile_journey(ussd_content, namespace=namespace, version=version)
+
+
+def get_journey_reload_options() -> dict:
+    options = dict(ussd_airflow_variables.journey_reload)
+    options.update(getattr(settings, 'USSD_JOURNEY_RELOAD', {}))
+    return options
+
+
+def get_journey_registry() -> JourneyRegistry:
     """
-    customer_journey_conf = None
-    customer_journey_namespace = None
+    Returns the journey registry used when USSD_JOURNEY_RELOAD is enabled.
+    """
+    global _journey_registry
+    options = get_journey_reload_options()
+    if _journey_registry is None or \
+            _journey_registry.interval != options['interval'] or \
+            _journey_registry.keep_versions != options['keep_versions']:
+        _journey_registry = JourneyRegistry(
+            _compile_journey_version,
+            validate=lambda ussd_content: UssdView.validate_ussd_journey(
+                ussd_content),
+            **options
+        )
+    return _journey_registry
 
-    def initial(self, request, *args, **kwargs):
-        # initialize restframework
-        super(UssdView, self).initial(request, args, kwargs)
 
-        # initialize ussd
-        self.ussd_initial(request)
+def load_journey(customer_journey_conf: str,
+                 namespace: str) -> CompiledJourney:
+    """
+    Returns the compiled journey, the journey and the variables file of its
+    initial screen are loaded on first use.
+    """
+    if get_journey_reload_options()['enabled']:
+        journey = get_journey_registry().get(
+            get_journey_file_path(customer_journey_conf), namespace)
+    else:
+        if not namespace in staticconf.config.configuration_namespaces:
+            load_yaml(customer_journey_conf, namespace)
+        journey = get_compiled_journey(namespace)
+
+    # confirm variable template has been loaded
+    # get initial screen
+    initial_screen = journey.get_screen("initial_screen").content
+
+    if isinstance(initial_screen, dict) and \
+            initial_screen.get('variables'):
+        variable_conf = initial_screen['variables']
+        file_path = variable_conf['file']
+        variables_namespace = variable_conf['namespace']
+        if not variables_namespace in \
+                staticconf.config.configuration_namespaces:
+            load_yaml(file_path, variables_namespace)
+    return journey
+
+
+class BaseUssdView(object, metaclass=UssdViewMetaClass):
+    """
+    Loads the customer journey and dispatches ussd requests to screens.
+
+    It doesn't depend on the request framework, UssdView uses it with
+    django rest framework and AsyncUssdView with django async views.
+    """
+    customer_journey_conf = None
+    customer_journey_namespace = None
 
     def ussd_initial(self, request, *args, **kwargs):
         if hasattr(self, 'get_customer_journey_conf'):
@@ -829,53 +1240,130 @@ class UssdView(APIView, metaclass=UssdViewMetaClass):
             raise MissingAttribute("attribute customer_journey_conf and "
                                    "customer_journey_namespace are required")
 
-        if not self.customer_journey_namespace in \
-                staticconf.config.configuration_namespaces:
-            load_yaml(
-                self.customer_journey_conf,
-                self.customer_journey_namespace
-            )
+        self.journey = load_journey(self.customer_journey_conf,
+                                    self.customer_journey_namespace)
+        self.initial_screen = self.journey.initial_screen
 
-        # confirm variable template has been loaded
-        # get initial screen
+    def ussd_response_handler(self, ussd_response):
+        return HttpResponse(str(ussd_response))
 
-        initial_screen = staticconf.read(
-            "initial_screen",
-            namespace=self.customer_journey_namespace)
+    def respond(self, ussd_request):
+        """
+        Dispatches ussd_request and returns the http response.
+        """
+        self.logger = get_logger(__name__).bind(**ussd_request.all_variables())
+        try:
+            ussd_response = self.ussd_dispatcher(ussd_request)
+        except Exception as e:
+            ussd_response = self.ussd_error_response(e)
+        return self.ussd_response_handler(ussd_response)
 
-        if isinstance(initial_screen, dict) and \
-                initial_screen.get('variables'):
-            variable_conf = initial_screen['variables']
-            file_path = variable_conf['file']
-            namespace = variable_conf['namespace']
-            if not namespace in \
-                    staticconf.config.configuration_namespaces:
-                load_yaml(file_path, namespace)
+    def ussd_error_response(self, error):
+        self.logger.exception("Exception caught in finalize_response")
+        if settings.DEBUG:
+            return UssdResponse(str(error))
+        return UssdResponse("An internal error occurred.")
 
-        self.initial_screen = initial_screen \
-            if isinstance(initial_screen, dict) \
-            else {"initial_screen": initial_screen}
+    def ussd_dispatcher(self, ussd_request):
+        lock_options = get_lock_options()
+        if not lock_options['enabled']:
+            return self.process_request(ussd_request)
+
+        session_lock = SessionLock.from_options(ussd_request.session_id,
+                                                lock_options)
+        if not session_lock.acquire():
+            return self.session_busy_response(ussd_request, lock_options)
+        try:
+            # the session was loaded before the lock was held, another
+            # request might have changed it in between
+            ussd_request.session = ussd_session(ussd_request.session_id)
+            if lock_options['policy'] == 'replay':
+                ussd_response = self.replay_response(ussd_request)
+                if ussd_response is not None:
+                    return ussd_response
+            return self.process_request(ussd_request)
+        finally:
+            session_lock.release()
+
+    def process_request(self, ussd_request):
+        ussd_response = self.replay_duplicate(ussd_request)
+        if ussd_response is not None:
+            return ussd_response
+
+        session_tracker = SessionTracker(
+            ussd_request.session,
+            volatile_keys=self.get_volatile_session_keys(ussd_request))
+        self.prepare_session(ussd_request)
 
-    def finalize_response(self, request, response, *args, **kwargs):
+        # Invoke handlers
+        ussd_response = self.run_handlers(ussd_request)
+        self.record_response(ussd_request, ussd_response)
 
-        if isinstance(response, UssdRequest):
-            self.logger = get_logger(__name__).bind(**response.all_variables())
-            try:
-                ussd_response = self.ussd_dispatcher(response)
-            except Exception as e:
-                self.logger.exception("Exception caught in finalize_response")
-                if settings.DEBUG:
-                    ussd_response = UssdResponse(str(e))
-                else:
-                    ussd_response = UssdResponse("An internal error occurred.")
-            return self.ussd_response_handler(ussd_response)
-        return super(UssdView, self).finalize_response(
-            request, response, args, kwargs)
+        self.finalize_session(ussd_request)
+        # Save session, only if it has changed
+        session_tracker.save()
+        self.logger.debug('gateway_response', text=ussd_response.dumps(),
+                     input="{redacted}")
 
-    def ussd_response_handler(self, ussd_response):
-        return HttpResponse(str(ussd_response))
+        return ussd_response
 
-    def ussd_dispatcher(self, ussd_request):
+    def session_busy_response(self, ussd_request, lock_options):
+        self.logger.warning("session_locked", policy=lock_options['policy'])
+        return UssdResponse(lock_options['busy_text'])
+
+    @staticmethod
+    def record_response(ussd_request, ussd_response):
+        """
+        Saves the response of a request that has a fingerprint so that it
+        can be replayed to duplicates of the request, if USSD_REPLAY_DUPLICATES
+        or the replay policy of USSD_SESSION_LOCK are set.
+        """
+        if ussd_request.fingerprint is None:
+            return
+        lock_options = get_lock_options()
+        if not (getattr(settings, 'USSD_REPLAY_DUPLICATES',
+                        ussd_airflow_variables.replay_duplicates) or
+                (lock_options['enabled'] and
+                 lock_options['policy'] == 'replay')):
+            return
+        ussd_request.session['_ussd_state']['last_response'] = {
+            "fingerprint": ussd_request.fingerprint,
+            "text": str(ussd_response),
+            "status": ussd_response.status
+        }
+
+    def replay_response(self, ussd_request):
+        """
+        Returns the saved response if ussd_request is a duplicate of the
+        last request handled, None otherwise.
+        """
+        last_response = ussd_request.session.get('_ussd_state', {}).get(
+            'last_response')
+        if ussd_request.fingerprint is None or not last_response or \
+                last_response['fingerprint'] != ussd_request.fingerprint:
+            return None
+        self.logger.info("replaying_response")
+        return UssdResponse(last_response['text'],
+                            status=last_response['status'],
+                            session=ussd_request.session)
+
+    def replay_duplicate(self, ussd_request):
+        """
+        Returns the saved response if USSD_REPLAY_DUPLICATES is set and
+        ussd_request is a duplicate of the last request handled e.g the
+        gateway resent it after a timeout. Screens are not run again so
+        api calls they make are not repeated.
+
+        Only requests with a fingerprint are checked, the fingerprint
+        should be different for every request of the session (the africas
+        talking gateway uses the full text).
+        """
+        if not getattr(settings, 'USSD_REPLAY_DUPLICATES',
+                       ussd_airflow_variables.replay_duplicates):
+            return None
+        return self.replay_response(ussd_request)
+
+    def prepare_session(self, ussd_request):
 
         # Initialize/reset session variables for consistency
 
@@ -885,11 +1373,15 @@ class UssdView(APIView, metaclass=UssdViewMetaClass):
         # Only initialize ussd_interaction if it doesn't exist
         if 'ussd_interaction' not in ussd_request.session:
             ussd_request.session['ussd_interaction'] = []
-        ussd_request.session['posted'] = False
-        ussd_request.session['submit_data'] = {}
-        ussd_request.session['session_id'] = ussd_request.session_id
-        ussd_request.session['phone_number'] = ussd_request.phone_number        
-                # update ussd_request variable to session and template variables
+        self.select_journey_version(ussd_request)
+        # only set the values that changed
+        for key, value in (('posted', False),
+                           ('submit_data', {}),
+                           ('session_id', ussd_request.session_id),
+                           ('phone_number', ussd_request.phone_number)):
+            if ussd_request.session.get(key) != value:
+                ussd_request.session[key] = value
+        # update ussd_request variable to session and template variables
         # to be used later for jinja2 evaluation
         ussd_request.session.update(ussd_request.all_variables())
 
@@ -902,85 +1394,419 @@ class UssdView(APIView, metaclass=UssdViewMetaClass):
 
         self.logger.debug('gateway_request', text=ussd_request.input)
 
+    @staticmethod
+    def get_volatile_session_keys(ussd_request) -> set:
+        """
+        Session keys every request sets, a request that only changes them
+        doesn't save the session. The interaction history of such a request
+        is not saved either, USSD_INTERACTION_SINK still gets it.
+        """
+        return set(ussd_request.all_variables()) | {
+            'posted', 'submit_data', 'session_id', 'phone_number',
+            'ussd_request', 'ussd_interaction',
+            ussd_airflow_variables.last_update
+        }
 
-        # Invoke handlers
-        ussd_response = self.run_handlers(ussd_request)
-
+    def select_journey_version(self, ussd_request):
+        """
+        Sessions in progress keep using the journey version they started
+        with if the journey has been reloaded since, see
+        ussd.journey_registry.
+        """
+        if self.journey.version is None:
+            return
+        ussd_state = ussd_request.session['_ussd_state']
+        version = ussd_state.get('journey_version')
+        if ussd_state.get('next_screen') and version and \
+                version != self.journey.version:
+            journey = get_journey_registry().get_version(
+                self.journey.namespace, version)
+            if journey is not None:
+                self.journey = journey
+                self.initial_screen = journey.initial_screen
+            else:
+                self.logger.warning("journey_version_not_found",
+                                    version=version,
+                                    current_version=self.journey.version)
+        ussd_state['journey_version'] = self.journey.version
 
+    def finalize_session(self, ussd_request):
         ussd_request.session[ussd_airflow_variables.last_update] = \
             utilities.datetime_to_string(datetime.now())
-        # Save session
-        ussd_request.session.save()
+
+    def run_handlers(self, ussd_request):
+        handler = self.start_interaction(ussd_request)
+        ussd_response = (ussd_request, handler)
+        validate_transitions = getattr(
+            settings, 'USSD_VALIDATE_TRANSITIONS',
+            ussd_airflow_variables.validate_transitions)
+        forwarding_limit = ForwardingLimit(
+            namespace=self.journey.namespace,
+            **get_forwarding_limit_options())
+
+        # Handle any forwarded Requests; loop until a Response is
+        # eventually returned.
+        while not isinstance(ussd_response, UssdResponse):
+            ussd_request, handler = ussd_response
+
+            try:
+                ussd_request.check_deadline()
+                forwarding_limit.check(handler)
+                ussd_response = self.get_screen_handler(
+                    ussd_request, handler).handle()
+                if validate_transitions and \
+                        not isinstance(ussd_response, UssdResponse):
+                    self.journey.check_transition(handler, ussd_response[1])
+            except DeadlineExceeded as e:
+                ussd_response = self.handle_deadline_exceeded(
+                    ussd_request, handler, e)
+            except ForwardingLimitExceeded as e:
+                ussd_response = self.handle_forwarding_limit_exceeded(
+                    ussd_request, forwarding_limit, e)
+
+        return self.end_interaction(ussd_request, handler, ussd_response)
+
+    async def aussd_dispatcher(self, ussd_request):
+        lock_options = get_lock_options()
+        if not lock_options['enabled']:
+            return await self.aprocess_request(ussd_request)
+
+        session_lock = SessionLock.from_options(ussd_request.session_id,
+                                                lock_options)
+        if not await session_lock.aacquire():
+            return self.session_busy_response(ussd_request, lock_options)
+        try:
+            ussd_request.session = await aussd_session(
+                ussd_request.session_id)
+            if lock_options['policy'] == 'replay':
+                ussd_response = self.replay_response(ussd_request)
+                if ussd_response is not None:
+                    return ussd_response
+            return await self.aprocess_request(ussd_request)
+        finally:
+            await session_lock.arelease()
+
+    async def aprocess_request(self, ussd_request):
+        ussd_response = self.replay_duplicate(ussd_request)
+        if ussd_response is not None:
+            return ussd_response
+
+        session_tracker = SessionTracker(
+            ussd_request.session,
+            volatile_keys=self.get_volatile_session_keys(ussd_request))
+        self.prepare_session(ussd_request)
+
+        # Invoke handlers
+        ussd_response = await self.arun_handlers(ussd_request)
+        self.record_response(ussd_request, ussd_response)
+
+        self.finalize_session(ussd_request)
+        # Save session, only if it has changed
+        await session_tracker.asave()
         self.logger.debug('gateway_response', text=ussd_response.dumps(),
-                     input="{redacted}")
+                          input="{redacted}")
 
         return ussd_response
 
-    def run_handlers(self, ussd_request):
+    async def arun_handlers(self, ussd_request):
+        handler = self.start_interaction(ussd_request)
+        ussd_response = (ussd_request, handler)
+        validate_transitions = getattr(
+            settings, 'USSD_VALIDATE_TRANSITIONS',
+            ussd_airflow_variables.validate_transitions)
+        forwarding_limit = ForwardingLimit(
+            namespace=self.journey.namespace,
+            **get_forwarding_limit_options())
+
+        while not isinstance(ussd_response, UssdResponse):
+            ussd_request, handler = ussd_response
 
+            try:
+                ussd_request.check_deadline()
+                forwarding_limit.check(handler)
+                ussd_response = await self.get_screen_handler(
+                    ussd_request, handler).ahandle()
+                if validate_transitions and \
+                        not isinstance(ussd_response, UssdResponse):
+                    self.journey.check_transition(handler, ussd_response[1])
+            except DeadlineExceeded as e:
+                ussd_response = self.handle_deadline_exceeded(
+                    ussd_request, handler, e)
+            except ForwardingLimitExceeded as e:
+                ussd_response = self.handle_forwarding_limit_exceeded(
+                    ussd_request, forwarding_limit, e)
+
+        return self.end_interaction(ussd_request, handler, ussd_response)
+
+    def get_screen_handler(self, ussd_request, handler):
+        screen = self.journey.get_screen(handler)
+        return screen.get_handler()(
+            ussd_request,
+            handler,
+            screen.content,
+            initial_screen=self.initial_screen,
+            logger=self.logger,
+            static_texts=self.journey.static_texts
+        )
+
+    def start_interaction(self, ussd_request) -> str:
+        """
+        Returns the screen handling this request and records the input of
+        the previous interaction.
+        """
         handler = ussd_request.session['_ussd_state']['next_screen'] \
             if ussd_request.session.get('_ussd_state', {}).get('next_screen') \
             else "initial_screen"
 
-
-        ussd_response = (ussd_request, handler)
-
         # Update end_time for previous interaction if it exists and handler is not initial_screen
         if ussd_request.session["ussd_interaction"] and handler != "initial_screen":
             # get start time
-            start_time = utilities.string_to_datetime(
-                ussd_request.session["ussd_interaction"][-1]["start_time"])
+            start_time = ussd_request.session["ussd_interaction"][-1][
+                "start_time"]
             end_time = datetime.now()
             # Report in milliseconds
-            duration = (end_time - start_time).total_seconds() * 1000
+            if isinstance(start_time, int):
+                # epoch milliseconds
+                duration = self.format_epoch(end_time) - start_time
+            else:
+                duration = (end_time - utilities.string_to_datetime(
+                    start_time)).total_seconds() * 1000
             ussd_request.session["ussd_interaction"][-1].update(
                 {
                     "input": ussd_request.input,
-                    "end_time": utilities.datetime_to_string(end_time),
+                    "end_time": self.format_interaction_time(end_time),
                     "duration": duration
                 }
             )
+        self.interaction_request = (ussd_request.input, datetime.now())
+        return handler
 
-        # Handle any forwarded Requests; loop until a Response is
-        # eventually returned.
-        while not isinstance(ussd_response, UssdResponse):
-            ussd_request, handler = ussd_response
+    def end_interaction(self, ussd_request, handler, ussd_response):
+        """
+        Records the screen shown in session['ussd_interaction'].
 
-            screen_content = staticconf.read(
-                handler,
-                namespace=self.customer_journey_namespace)
+        What is kept is configured with the USSD_INTERACTION_HISTORY
+        setting e.g to keep the last 10 screens without their text::
 
-            # Resolve inheritance for the current screen
-            resolved_screen_content = _resolve_inheritance(handler, staticconf.config.get_namespace(self.customer_journey_namespace).get_config_values())
-
-            screen_type = 'initial_screen' \
-                if handler == "initial_screen" and \
-                   isinstance(screen_content, str) \
-                else resolved_screen_content['type']
-
-            ussd_response = _registered_ussd_handlers[screen_type](
-                ussd_request,
-                handler,
-                resolved_screen_content,
-                initial_screen=self.initial_screen,
-                logger=self.logger
-            ).handle()
-
-        ussd_request.session['_ussd_state']['next_screen'] = handler
-
-        ussd_request.session['ussd_interaction'].append(
-            {
-                "screen_name": handler,
-                "screen_text": str(ussd_response),
-                "input": ussd_request.input,
-                "start_time": utilities.datetime_to_string(datetime.now())
+            USSD_INTERACTION_HISTORY = {
+                "max_length": 10,
+                "screen_text": "omit",   # full, hash or omit
+                "timestamps": "epoch"    # datetime or epoch milliseconds
             }
-        )
+
+        Set USSD_INTERACTION_SINK to a callable (or its import path) to get
+        the full record of every request e.g for reporting.
+        """
+        ussd_state = ussd_request.session['_ussd_state']
+        ussd_state['next_screen'] = handler
+
+        # the page index of a menu screen is only valid while on that screen
+        if ussd_state.get('pages', {}).get('screen') != handler:
+            ussd_state.pop('pages', None)
+
+        now = datetime.now()
+        interaction = {
+            "screen_name": handler,
+            "screen_text": str(ussd_response),
+            "input": ussd_request.input,
+            "start_time": self.format_interaction_time(now)
+        }
+        if self.interaction_history['screen_text'] == 'hash':
+            interaction['screen_text'] = hashlib.sha1(
+                interaction['screen_text'].encode()).hexdigest()
+        elif self.interaction_history['screen_text'] == 'omit':
+            del interaction['screen_text']
+
+        interactions = ussd_request.session['ussd_interaction']
+        interactions.append(interaction)
+        max_length = self.interaction_history['max_length']
+        if max_length is not None and len(interactions) > max_length:
+            del interactions[:len(interactions) - max_length]
+
+        self.send_interaction(ussd_request, handler, ussd_response, now)
+
         # Attach session to outgoing response
         ussd_response.session = ussd_request.session
 
         return ussd_response
 
+    @cached_property
+    def interaction_history(self):
+        return get_interaction_history_options()
+
+    def format_interaction_time(self, date_obj: datetime):
+        if self.interaction_history['timestamps'] == 'epoch':
+            return self.format_epoch(date_obj)
+        return utilities.datetime_to_string(date_obj)
+
+    @staticmethod
+    def format_epoch(date_obj: datetime) -> int:
+        return int(date_obj.timestamp() * 1000)
+
+    def send_interaction(self, ussd_request, handler, ussd_response,
+                         end_time):
+        """
+        Sends the full record of this request to USSD_INTERACTION_SINK,
+        the record is not affected by USSD_INTERACTION_HISTORY.
+        """
+        sink = get_interaction_sink()
+        if sink is None:
+            return
+        ussd_input, start_time = getattr(
+            self, 'interaction_request', (ussd_request.input, end_time))
+        record = {
+            "session_id": ussd_request.session_id,
+            "phone_number": ussd_request.phone_number,
+            "screen_name": handler,
+            "screen_text": str(ussd_response),
+            "input": ussd_input,
+            "status": ussd_response.status,
+            "start_time": utilities.datetime_to_string(start_time),
+            "end_time": utilities.datetime_to_string(end_time),
+            "duration": (end_time - start_time).total_seconds() * 1000
+        }
+        try:
+            sink(record)
+        except Exception:
+            # reporting should not fail the request
+            self.logger.exception("interaction_sink_failed")
+
+    def handle_deadline_exceeded(self, ussd_request, handler, error):
+        """
+        Forwards the request to the deadline_exceeded_screen defined in the
+        initial screen, the error is raised if there is none.
+        """
+        fallback_screen = self.initial_screen.get('deadline_exceeded_screen')
+        self.logger.warning("deadline_exceeded", screen=handler,
+                            fallback_screen=fallback_screen)
+        if not fallback_screen:
+            raise error
+        # let the fallback screen respond regardless of the budget, the
+        # journey might have been routed to it already.
+        ussd_request.deadline = None
+        return ussd_request.forward(fallback_screen)
+
+    def handle_forwarding_limit_exceeded(self, ussd_request,
+                                         forwarding_limit, error):
+        """
+        Reports the error and forwards the request to the error_screen of
+        USSD_FORWARDING_LIMIT, the error is raised if there is none or the
+        error screen didn't respond.
+        """
+        self.logger.error("forwarding_limit_exceeded", **error.as_dict())
+        if forwarding_limit.metric is not None:
+            try:
+                forwarding_limit.metric(error)
+            except Exception:
+                self.logger.exception("forwarding_limit_metric_failed")
+
+        if forwarding_limit.error_screen is None or forwarding_limit.exceeded:
+            raise error
+        forwarding_limit.exceeded = True
+        ussd_request.deadline = None
+        return ussd_request.forward(forwarding_limit.error_screen)
+
+
+class UssdView(BaseUssdView, APIView):
+    """
+    To create Ussd View requires the following things:
+        - Inherit from **UssdView** (Mandatory)
+            .. code-block:: python
+
+                from ussd.core import UssdView
+
+        - Define Http method either **get** or **post** (Mandatory)
+            The http method should return Ussd Request
+
+                .. autoclass:: ussd.core.UssdRequest
+
+        - define this varialbe *customer_journey_conf*
+            This is the path of the file that has ussd screens
+            If you want your file to be dynamic implement the
+            following method **get_customer_journey_conf** it
+            will be called by request object
+
+        - define this variable *customer_journey_namespace*
+            Ussd_airflow uses this namespace to save the
+            customer journey content in memory. If you want
+            customer_journey_namespace to be dynamic implement
+            this method **get_customer_journey_namespace** it
+            will be called with request object
+
+        - override HttpResponse
+            In ussd airflow the http method return UssdRequest object
+            not Http response. Then ussd view gets UssdResponse object
+            and convert it to HttpResponse. The default HttpResponse
+            returned is a normal HttpResponse with body being ussd text
+
+            To override HttpResponse returned define this method.
+            **ussd_response_handler** it will be called with
+            **UssdResponse** object.
+
+                .. autoclass:: ussd.core.UssdResponse
+
+    Example of Ussd view
+
+    .. code-block:: python
+
+        from ussd.core import UssdView, UssdRequest
+
+
+        class SampleOne(UssdView):
+
+            def get(self, req):
+                return UssdRequest(
+                    phone_number=req.data['phoneNumber'].strip('+'),
+                    session_id=req.data['sessionId'],
+                    ussd_input=text,
+                    service_code=req.data['serviceCode'],
+                    language=req.data.get('language', 'en')
+                )
+
+    Example of Ussd View that defines its own HttpResponse.
+
+    .. code-block:: python
+
+        from ussd.core import UssdView, UssdRequest
+
+
+        class SampleOne(UssdView):
+
+            def get(self, req):
+                return UssdRequest(
+                    phone_number=req.data['phoneNumber'].strip('+'),
+                    session_id=req.data['sessionId'],
+                    ussd_input=text,
+                    service_code=req.data['serviceCode'],
+                    language=req.data.get('language', 'en')
+                )
+
+            def ussd_response_handler(self, ussd_response):
+                    if ussd_response.status:
+                        res = 'CON' + ' ' + str(ussd_response)
+                        response = HttpResponse(res)
+                    else:
+                        res = 'END' + ' ' + str(ussd_response)
+                        response = HttpResponse(res)
+                    return response
+    """
+    customer_journey_conf = None
+    customer_journey_namespace = None
+
+    def initial(self, request, *args, **kwargs):
+        # initialize restframework
+        super(UssdView, self).initial(request, args, kwargs)
+
+        # initialize ussd
+        self.ussd_initial(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+
+        if isinstance(response, UssdRequest):
+            return self.respond(response)
+        return super(UssdView, self).finalize_response(
+            request, response, args, kwargs)
+
     @staticmethod
     def validate_ussd_journey(ussd_content: dict) -> (bool, dict):
         errors = {}
@@ -1050,6 +1876,97 @@ class UssdView(APIView, metaclass=UssdViewMetaClass):
             else {"initial_screen": initial_screen}
 
 
+
+class SimpleUssdView(BaseUssdView, View):
+    """
+    Same as UssdView without django rest framework.
+
+    Requests don't go through content negotiation, authentication,
+    throttling and parsers, use it for gateways that post form data (read
+    it from request.POST) and expect a text response.
+
+    .. code-block:: python
+
+        from ussd.core import SimpleUssdView, UssdRequest
+
+
+        class SampleOne(SimpleUssdView):
+
+            def post(self, req):
+                return UssdRequest(
+                    phone_number=req.POST['phoneNumber'].strip('+'),
+                    session_id=req.POST['sessionId'],
+                    ussd_input=req.POST['text'],
+                    language=req.POST.get('language', 'en')
+                )
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # gateways don't send csrf tokens
+        return csrf_exempt(super(SimpleUssdView, cls).as_view(**initkwargs))
+
+    def dispatch(self, request, *args, **kwargs):
+        self.ussd_initial(request)
+
+        response = super(SimpleUssdView, self).dispatch(
+            request, *args, **kwargs)
+        if isinstance(response, UssdRequest):
+            return self.respond(response)
+        return response
+
+
+class AsyncUssdView(BaseUssdView, View):
+    """
+    Same as UssdView for ASGI servers, requests are dispatched without
+    blocking the event loop.
+
+    Http methods should be async and create the UssdRequest with
+    **UssdRequest.acreate**, the session is then loaded and saved with the
+    async session methods.
+
+    Screens that don't do I/O (input, menu, router, update session) are
+    handled in the event loop, http screens in a thread pool and any other
+    screen (function, custom screens...) in a thread as sync django code.
+
+    .. code-block:: python
+
+        from ussd.core import AsyncUssdView, UssdRequest
+
+
+        class SampleOne(AsyncUssdView):
+
+            async def post(self, req):
+                return await UssdRequest.acreate(
+                    phone_number=req.POST['phoneNumber'].strip('+'),
+                    session_id=req.POST['sessionId'],
+                    ussd_input=req.POST['text'],
+                    language=req.POST.get('language', 'en')
+                )
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # gateways don't send csrf tokens
+        return csrf_exempt(super(AsyncUssdView, cls).as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        # parsing the request and loading the journey (from disk once per
+        # process) are blocking, they don't run in the event loop.
+        await sync_to_async(self.ussd_initial)(request)
+
+        response = await super(AsyncUssdView, self).dispatch(
+            request, *args, **kwargs)
+        if not isinstance(response, UssdRequest):
+            return response
+
+        self.logger = get_logger(__name__).bind(**response.all_variables())
+        try:
+            ussd_response = await self.aussd_dispatcher(response)
+        except Exception as e:
+            ussd_response = self.ussd_error_response(e)
+        return self.ussd_response_handler(ussd_response)
+
 def convert_error_response_to_mermaid_error(error_response: dict, errors=None, paths=None) -> list:
     errors = [] if errors is None else errors
     paths = [] if paths is None else paths
@@ -1086,6 +2003,12 @@ def _convert_obj_to_mermaid_error_obj(key, value, errors: list):
 def render_journey_as_graph(ussd_screen: dict) -> Graph:
     graph = Graph()
 
+    # screens with their inherited content
+    ussd_screen = {
+        name: _resolve_inheritance(name, ussd_screen)
+        if isinstance(content, dict) and 'inherit' in content else content
+        for name, content in ussd_screen.items()
+    }
     initial_screen = ussd_screen['initial_screen']
     _registered_ussd_handlers['initial_screen'](
         UssdRequest("dummy", "dummy", "", "en"),
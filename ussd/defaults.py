@@ -1,5 +1,109 @@
 ussd_text_limit = 182
 
+# number of compiled jinja templates and expressions kept in memory
+template_cache_size = 1000
+
+# seconds a ussd request has to be answered in, None disables the deadline
+request_budget = None
+
+# options of the pooled http client, see ussd.http_client
+http_client = {
+    "pool_connections": 10,
+    "pool_maxsize": 10,
+    "pool_block": False,
+    "max_retries": 0,
+    "backoff_factor": 0,
+    "status_forcelist": None,
+    "timeout": 30
+}
+
+
+# threads shared by parallel_http_screen requests of a process, see
+# ussd.screens.parallel_http_screen
+parallel_http_workers = 10
+
+# options of http_screen circuit breakers, see ussd.circuit_breaker
+circuit_breaker = {
+    "enabled": False,
+    "failure_threshold": 0.5,
+    "minimum_calls": 10,
+    "window": 60,
+    "slow_call_duration": None,
+    "recovery_timeout": 30
+}
+
+
+# how ussd_interaction is saved in session, see BaseUssdView.end_interaction
+interaction_history = {
+    "max_length": None,        # interactions kept, None keeps all of them
+    "screen_text": "full",     # full, hash or omit
+    "timestamps": "datetime"   # datetime strings or epoch milliseconds
+}
+
+
+# options of the redis session engine, see ussd.session_engines.redis
+redis_session = {
+    "url": "redis://localhost:6379/0",
+    "key_prefix": "ussd_session",
+    "ttl": None,
+    "client_class": "redis.Redis"
+}
+
+
+# respond to a request with the same fingerprint as the last one handled
+# with the saved response, see BaseUssdView.replay_response
+replay_duplicates = False
+
+
+# check that screens only forward to the next screens the journey defines
+# them with, see ussd.journey_analysis
+validate_transitions = False
+
+
+# limits of the screens a request is forwarded through before a response,
+# see ussd.forwarding_limit
+forwarding_limit = {
+    "max_hops": 100,
+    "max_time": None,
+    "error_screen": None,
+    "metric": None
+}
+
+
+# reloading of changed journey files, see ussd.journey_registry
+journey_reload = {
+    "enabled": False,
+    "interval": 5,
+    "keep_versions": 3
+}
+
+
+# loading of journeys before the first request, see ussd.warm_up
+warm_up = {
+    "on_startup": False,
+    "journeys": []
+}
+
+
+# on disk cache of parsed (not compiled) journey files, see ussd.yaml_loader
+yaml_cache = {
+    "enabled": False,
+    "directory": None
+}
+
+
+# per session lock, see ussd.session_lock
+session_lock = {
+    "enabled": False,
+    "timeout": 10,
+    "wait": 2,
+    "poll_interval": 0.05,
+    "policy": "wait",
+    "busy_text": "Your request is being processed, please try again.",
+    # the lock needs a cache shared by the workers, LocMem is per process
+    "cache_alias": "default"
+}
+
 
 # ************ Ussd airflow session variables **************
 last_update = '_ussd_airflow_last_updated'
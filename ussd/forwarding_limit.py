@@ -0,0 +1,113 @@
+"""
+Limits the screens a request is forwarded through before a response, so
+that a journey with a forwarding cycle (e.g two router screens routing to
+each other) doesn't keep a worker busy until it's killed.
+
+It's configured with the USSD_FORWARDING_LIMIT setting::
+
+    USSD_FORWARDING_LIMIT = {
+        "max_hops": 100,       # forwards per request, None disables it
+        "max_time": None,      # seconds spent in screens, None disables it
+        # screen the request is forwarded to once a limit is exceeded, it
+        # should respond e.g a quit_screen. The error is raised if None.
+        "error_screen": None,
+        # callable or import path called with the ForwardingLimitExceeded
+        # error e.g to increment a counter
+        "metric": None
+    }
+
+The analyze_ussd_journey command reports the forwarding cycles of a
+journey before it's deployed.
+"""
+import time
+from collections import deque
+
+from django.conf import settings
+
+from ussd import defaults as ussd_airflow_variables
+from ussd import utilities
+
+# screens kept to show how the limit was exceeded
+RECENT_SCREENS = 10
+
+
+class ForwardingLimitExceeded(Exception):
+
+    def __init__(self, message, namespace=None, screen=None, hops=0,
+                 elapsed=0, recent_screens=()):
+        super(ForwardingLimitExceeded, self).__init__(message)
+        self.namespace = namespace
+        self.screen = screen
+        self.hops = hops
+        self.elapsed = elapsed
+        self.recent_screens = list(recent_screens)
+
+    def as_dict(self) -> dict:
+        return dict(
+            namespace=self.namespace,
+            screen=self.screen,
+            hops=self.hops,
+            elapsed=self.elapsed,
+            recent_screens=self.recent_screens
+        )
+
+
+def get_forwarding_limit_options() -> dict:
+    options = dict(ussd_airflow_variables.forwarding_limit)
+    options.update(getattr(settings, 'USSD_FORWARDING_LIMIT', {}))
+    for key in ('max_hops', 'max_time'):
+        if options[key] is not None and options[key] <= 0:
+            raise ValueError("USSD_FORWARDING_LIMIT {} should be a positive "
+                             "number or None".format(key))
+    if isinstance(options['metric'], str):
+        options['metric'] = utilities.str_to_class(options['metric'])
+    return options
+
+
+class ForwardingLimit(object):
+    """
+    Counts the screens handling one request, check is called before each
+    screen.
+    """
+
+    def __init__(self, namespace=None, max_hops=100, max_time=None,
+                 error_screen=None, metric=None, **kwargs):
+        self.namespace = namespace
+        self.max_hops = max_hops
+        self.max_time = max_time
+        self.error_screen = error_screen
+        self.metric = metric
+        self.started_at = time.monotonic()
+        self.hops = -1
+        self.recent_screens = deque(maxlen=RECENT_SCREENS)
+        # set once the request has been forwarded to the error screen
+        self.exceeded = False
+
+    def check(self, screen: str):
+        # the first screen handles the user's input, it's not a hop
+        self.hops += 1
+        self.recent_screens.append(screen)
+        elapsed = time.monotonic() - self.started_at
+
+        if self.exceeded:
+            if screen == self.error_screen:
+                return
+            reason = "error screen {} forwarded the request".format(
+                self.error_screen)
+        elif self.max_hops is not None and self.hops > self.max_hops:
+            reason = "more than {} hops".format(self.max_hops)
+        elif self.max_time is not None and elapsed > self.max_time:
+            reason = "more than {}s in screens".format(self.max_time)
+        else:
+            return
+
+        raise ForwardingLimitExceeded(
+            "Forwarding limit exceeded at screen {screen} of journey "
+            "{namespace}: {reason}".format(
+                screen=screen, namespace=self.namespace, reason=reason),
+            namespace=self.namespace,
+            screen=screen,
+            hops=self.hops,
+            elapsed=elapsed,
+            recent_screens=self.recent_screens
+        )
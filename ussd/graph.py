@@ -51,20 +51,15 @@ class Graph(object):
 
     def get_vertex_obj(self, name):
         raw_vertex = self.get_vertex(name)
-
-        # add name
-        raw_vertex['name'] = name
-
-
-        return Vertex(**raw_vertex)
+        return Vertex(name=name, **raw_vertex)
 
     def get_edges(self):
         return self.edges
 
     def convert_dict_to_link(self, raw_link: dict) -> Link:
-        raw_link['start'] = self.get_vertex_obj(raw_link['start'])
-        raw_link['end'] = self.get_vertex_obj(raw_link['end'])
-        return Link(**raw_link)
+        return Link(**dict(raw_link,
+                           start=self.get_vertex_obj(raw_link['start']),
+                           end=self.get_vertex_obj(raw_link['end'])))
 
 
     def __eq__(self, other):
@@ -92,34 +87,30 @@ def get_mermaid_node_text(vertex: Vertex):
     return text
 
 
-def add_mermaid_node_text(vertex: Vertex, added_texts: list):
+def add_mermaid_node_text(vertex: Vertex, added_texts: set):
     if vertex.name in added_texts:
         text = vertex.name
     else:
         text = get_mermaid_node_text(vertex)
-        added_texts.append(vertex.name)
+        added_texts.add(vertex.name)
     return text
 
 
 def convert_graph_to_mermaid_text(graph: Graph) -> str:
 
-    added_texts = []
+    added_texts = set()
 
-    mermaid_text = "graph TD\n"
+    lines = ["graph TD"]
 
     for i in graph.get_edges():
         link = graph.convert_dict_to_link(i)
 
-        # add firt node
-        mermaid_text += add_mermaid_node_text(link.start, added_texts)
-
-        # add link
-        mermaid_text += get_mermaid_link_line(link)
-
-
-        # add second node
-        mermaid_text += add_mermaid_node_text(link.end, added_texts)
+        lines.append(''.join((
+            add_mermaid_node_text(link.start, added_texts),
+            get_mermaid_link_line(link),
+            add_mermaid_node_text(link.end, added_texts)
+        )))
 
-        # add end line
-        mermaid_text += '\n'
-    return mermaid_text
+    # every line ends with a new line
+    lines.append('')
+    return '\n'.join(lines)
@@ -0,0 +1,66 @@
+"""
+Cache of http_screen responses.
+
+Responses are saved in the django cache as they would be saved in the
+session (see UssdHandlerAbstract.get_variables_from_response_obj) so that
+cached and fresh responses look the same to the journey.
+
+A cached response is fresh for ttl seconds, after that it's served stale
+for stale_while_revalidate seconds while a celery task refreshes it.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import caches
+
+key_prefix = 'ussd_http_cache'
+
+
+def get_cache(cache_alias='default'):
+    return caches[cache_alias]
+
+
+def make_key(http_request_conf: dict, key: str = None) -> str:
+    """
+    Returns the cache key of a request, the request configuration is
+    hashed if the screen doesn't define a key.
+    """
+    if key is None:
+        key = hashlib.sha1(
+            json.dumps(http_request_conf, sort_keys=True, default=str)
+            .encode()).hexdigest()
+    return '{prefix}:{key}'.format(prefix=key_prefix, key=key)
+
+
+def get_response(cache_key, cache_alias='default'):
+    """
+    Returns a tuple of (response variables, stale) or (None, False) if the
+    response is not cached.
+    """
+    entry = get_cache(cache_alias).get(cache_key)
+    if entry is None:
+        return None, False
+    return entry['value'], time.time() >= entry['expires_at']
+
+
+def set_response(cache_key, value, ttl, stale_while_revalidate=0,
+                 cache_alias='default'):
+    get_cache(cache_alias).set(
+        cache_key,
+        dict(value=value, expires_at=time.time() + ttl),
+        timeout=ttl + stale_while_revalidate
+    )
+
+
+def acquire_refresh(cache_key, timeout, cache_alias='default') -> bool:
+    """
+    Returns True for only one caller until timeout or release_refresh,
+    used so that a stale response is refreshed once.
+    """
+    return get_cache(cache_alias).add(cache_key + ':refresh', 1,
+                                      timeout=timeout)
+
+
+def release_refresh(cache_key, cache_alias='default'):
+    get_cache(cache_alias).delete(cache_key + ':refresh')
@@ -0,0 +1,147 @@
+"""
+Pooled http client used by http_screen and report_session.
+
+Requests made through this module reuse keep-alive connections per host
+instead of opening a new connection (and TLS handshake) on every call.
+
+The client is configured with the USSD_HTTP_CLIENT setting, e.g::
+
+    USSD_HTTP_CLIENT = {
+        "pool_connections": 10,  # number of hosts to keep pools for
+        "pool_maxsize": 10,      # connections kept per host
+        "max_retries": 0,
+        "backoff_factor": 0,
+        "timeout": 30            # used when a request has no timeout
+    }
+
+Sessions are shared by all the subscribers, they don't keep cookies set by
+a response so that they are not sent with another subscriber's requests.
+
+Any of the options can be overridden per journey in the http_client block
+of a http_request::
+
+    http_request:
+      method: get
+      url: https://wallet/balance
+      http_client:
+        timeout: 5
+        max_retries: 2
+"""
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ussd import defaults as ussd_airflow_variables
+
+CLIENT_OPTIONS = ('pool_connections', 'pool_maxsize', 'pool_block',
+                  'max_retries', 'backoff_factor', 'status_forcelist',
+                  'timeout')
+
+_sessions = {}
+_sessions_pid = None
+_lock = threading.Lock()
+
+
+class RejectCookiePolicy(DefaultCookiePolicy):
+    """
+    Cookie policy of the shared sessions, no cookie is kept.
+    """
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+def get_client_options(overrides: dict = None) -> dict:
+    options = dict(ussd_airflow_variables.http_client)
+    options.update(getattr(settings, 'USSD_HTTP_CLIENT', {}))
+    options.update(overrides or {})
+    unknown = set(options) - set(CLIENT_OPTIONS)
+    if unknown:
+        raise ValueError(
+            "Unknown http client options {unknown}, use {choices}".format(
+                unknown=sorted(unknown), choices=CLIENT_OPTIONS))
+    return options
+
+
+def _create_session(options: dict) -> requests.Session:
+    retries = Retry(
+        total=options['max_retries'],
+        backoff_factor=options['backoff_factor'],
+        status_forcelist=options['status_forcelist'],
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=options['pool_connections'],
+        pool_maxsize=options['pool_maxsize'],
+        pool_block=options['pool_block'],
+        max_retries=retries
+    )
+    session = requests.Session()
+    session.cookies.set_policy(RejectCookiePolicy())
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _session_key(options: dict):
+    return tuple(
+        tuple(value) if isinstance(value, list) else value
+        for value in (options[name] for name in CLIENT_OPTIONS
+                      if name != 'timeout')
+    )
+
+
+def get_session(options: dict) -> requests.Session:
+    """
+    Returns the session for options, sessions are shared by all requests
+    with the same pool and retry options.
+    """
+    global _sessions_pid
+    key = _session_key(options)
+    with _lock:
+        # connections can't be shared with forked processes e.g celery
+        # workers, start with new pools in the child.
+        if _sessions_pid != os.getpid():
+            _sessions.clear()
+            _sessions_pid = os.getpid()
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = _create_session(options)
+    return session
+
+
+def close():
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def limit_timeout(timeout, limit):
+    """
+    Returns timeout capped at limit, timeout can be a (connect, read) tuple.
+    """
+    if timeout is None:
+        return limit
+    if isinstance(timeout, (tuple, list)):
+        return tuple(limit_timeout(value, limit) for value in timeout)
+    return min(timeout, limit)
+
+
+def request(**request_conf) -> requests.Response:
+    """
+    Same as requests.request but the connection is taken from the pool.
+
+    request_conf can have a http_client block with options for this
+    request, see the module documentation.
+    """
+    request_conf = dict(request_conf)
+    options = get_client_options(request_conf.pop('http_client', None))
+    if request_conf.get('timeout') is None and options['timeout'] is not None:
+        request_conf['timeout'] = options['timeout']
+    return get_session(options).request(**request_conf)
@@ -0,0 +1,228 @@
+"""
+Static analysis of customer journeys.
+
+The transitions of every screen are read from the journey (next_screen,
+default_next_screen, router and menu options, conditional next screens,
+on_failure ...) after inheritance has been resolved, no handler is
+instantiated. The index is built when a journey is compiled and reports:
+
+    - screens that can't be reached from the initial screen
+    - next screens that aren't defined in the journey
+    - cycles of screens that forward without waiting for input, a
+      request entering one loops in run_handlers until its deadline
+    - the maximum number of screens a request goes through before a
+      response, starting at each screen
+
+Custom screens choose their next screen in code, their transitions are
+only known if they are declared with next_screen.
+"""
+import typing
+
+# screens that handle a request by forwarding it to the next screen
+FORWARDING_SCREEN_TYPES = frozenset((
+    'initial_screen',
+    'router_screen',
+    'update_session_screen',
+    'function_screen',
+    'http_screen',
+    'parallel_http_screen',
+))
+
+# screens whose transitions are defined by the journey
+STATIC_SCREEN_TYPES = FORWARDING_SCREEN_TYPES | frozenset((
+    'input_screen',
+    'menu_screen',
+    'quit_screen',
+))
+
+
+class TransitionIndex(object):
+    """
+    :param transitions: screen name -> names of the screens it can
+        forward to.
+    :param screen_types: screen name -> screen type.
+    :param inherited: names of screens other screens inherit from.
+    """
+
+    def __init__(self, transitions: typing.Mapping[str, frozenset],
+                 screen_types: typing.Mapping[str, str],
+                 inherited: frozenset = frozenset()):
+        self.transitions = transitions
+        self.screen_types = screen_types
+        self.inherited = inherited
+
+    def is_dynamic(self, screen_name: str) -> bool:
+        return self.screen_types.get(screen_name) not in STATIC_SCREEN_TYPES
+
+    def is_forwarding(self, screen_name: str) -> bool:
+        return self.screen_types.get(screen_name) in FORWARDING_SCREEN_TYPES
+
+    def is_valid_transition(self, screen_name: str,
+                            next_screen: str) -> bool:
+        if next_screen in self.transitions.get(screen_name, ()):
+            return True
+        # custom screens can forward to any screen
+        return self.is_dynamic(screen_name) and \
+            next_screen in self.transitions
+
+    def reachable(self, start='initial_screen') -> set:
+        if start not in self.transitions:
+            return set()
+        reached = {start}
+        stack = [start]
+        while stack:
+            for next_screen in self.transitions.get(stack.pop(), ()):
+                if next_screen in self.transitions and \
+                        next_screen not in reached:
+                    reached.add(next_screen)
+                    stack.append(next_screen)
+        return reached
+
+    def unreachable(self) -> list:
+        reached = self.reachable()
+        return sorted(
+            screen_name for screen_name in self.transitions
+            if screen_name not in reached and
+            # screens only used as a base for other screens
+            screen_name not in self.inherited
+        )
+
+    def dangling(self) -> dict:
+        """
+        Returns the next screens of each screen that aren't defined.
+        """
+        dangling = {}
+        for screen_name, next_screens in self.transitions.items():
+            missing = sorted(next_screen for next_screen in next_screens
+                             if next_screen not in self.transitions)
+            if missing:
+                dangling[screen_name] = missing
+        return dangling
+
+    def _forwarding_transitions(self, screen_name):
+        return [next_screen
+                for next_screen in sorted(self.transitions[screen_name])
+                if self.is_forwarding(next_screen)]
+
+    def forwarding_cycles(self) -> list:
+        """
+        Returns the cycles of forwarding screens, each cycle is the sorted
+        list of its screens.
+        """
+        # iterative tarjan's strongly connected components, journeys can
+        # have more screens than the recursion limit
+        index = {}
+        low_link = {}
+        stack = []
+        on_stack = set()
+        cycles = []
+        counter = 0
+
+        for root in sorted(self.transitions):
+            if root in index or not self.is_forwarding(root):
+                continue
+            work = [(root, iter(self._forwarding_transitions(root)))]
+            index[root] = low_link[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                screen_name, next_screens = work[-1]
+                for next_screen in next_screens:
+                    if next_screen not in index:
+                        index[next_screen] = low_link[next_screen] = counter
+                        counter += 1
+                        stack.append(next_screen)
+                        on_stack.add(next_screen)
+                        work.append((next_screen, iter(
+                            self._forwarding_transitions(next_screen))))
+                        break
+                    elif next_screen in on_stack:
+                        low_link[screen_name] = min(low_link[screen_name],
+                                                    index[next_screen])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low_link[parent] = min(low_link[parent],
+                                               low_link[screen_name])
+                    if low_link[screen_name] == index[screen_name]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == screen_name:
+                                break
+                        if len(component) > 1 or screen_name in \
+                                self.transitions[screen_name]:
+                            cycles.append(sorted(component))
+        return sorted(cycles)
+
+    def max_depth(self) -> typing.Dict[str, typing.Optional[int]]:
+        """
+        Returns the maximum number of times a request is forwarded before
+        a response, when the request is handled by each screen. It's None
+        if the request can enter a forwarding cycle.
+        """
+        in_cycle = set()
+        for cycle in self.forwarding_cycles():
+            in_cycle.update(cycle)
+
+        # number of forwards after a request is forwarded to the screen
+        chains = {}
+
+        def chain(screen_name):
+            return chains[screen_name] if self.is_forwarding(screen_name) \
+                else 0
+
+        def depth(screen_name):
+            if screen_name in in_cycle:
+                return None
+            next_chains = [chain(next_screen) for next_screen in
+                           self.transitions[screen_name]
+                           if next_screen in self.transitions]
+            if None in next_chains:
+                return None
+            return 1 + max(next_chains) if next_chains else 0
+
+        # forwarding screens are visited depth first, a screen is computed
+        # after the screens it forwards to
+        visited = set()
+        for root in sorted(self.transitions):
+            if root in visited or not self.is_forwarding(root):
+                continue
+            visited.add(root)
+            work = [(root, iter(self._forwarding_transitions(root)))]
+            while work:
+                screen_name, next_screens = work[-1]
+                for next_screen in next_screens:
+                    if next_screen not in visited:
+                        visited.add(next_screen)
+                        work.append((next_screen, iter(
+                            self._forwarding_transitions(next_screen))))
+                        break
+                else:
+                    work.pop()
+                    chains[screen_name] = depth(screen_name)
+
+        return {screen_name: depth(screen_name)
+                for screen_name in sorted(self.transitions)}
+
+    def report(self) -> dict:
+        return dict(
+            screens=len(self.transitions),
+            unreachable=self.unreachable(),
+            dangling=self.dangling(),
+            forwarding_cycles=self.forwarding_cycles(),
+            max_depth=self.max_depth()
+        )
+
+
+def analyze_journey(ussd_content: dict) -> dict:
+    """
+    Returns the analysis report of a journey.
+    """
+    from ussd.core import compile_journey
+
+    return compile_journey(ussd_content).transitions.report()
@@ -0,0 +1,173 @@
+"""
+Registry of customer journeys loaded from yaml files, reloads a journey
+when its file changes without restarting workers.
+
+The file modification time is checked at most every interval seconds, a
+changed file is read, validated and compiled in a background thread and
+the new version replaces the current one once it's ready. Requests keep
+being served by the current version while the new one is compiled. The
+first version is validated too, InvalidJourney is raised if it's invalid.
+
+Journeys loaded by the registry are not written to staticconf.
+
+Each version is identified by the hash of the file content so that all
+workers give the same version the same id. Sessions that started on a
+version keep using it (see BaseUssdView.select_journey_version) as long as
+it's one of the last keep_versions versions.
+
+It's configured with the USSD_JOURNEY_RELOAD setting::
+
+    USSD_JOURNEY_RELOAD = {
+        "enabled": False,
+        "interval": 5,       # seconds between file checks
+        "keep_versions": 3   # versions kept for sessions in progress
+    }
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from structlog import get_logger
+
+from ussd import yaml_loader
+
+logger = get_logger(__name__)
+
+
+class InvalidJourney(Exception):
+    pass
+
+
+class _Journey(object):
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.mtime = None
+        self.checked_at = time.monotonic()
+        # version -> compiled journey, the last one is the current version
+        self.versions = OrderedDict()
+        self.reloading = False
+        self.reload = None
+
+    @property
+    def current(self):
+        return next(reversed(self.versions.values()))
+
+
+class JourneyRegistry(object):
+    """
+    :param compile: called with (journey content, namespace, version) and
+        returns the compiled journey.
+    :param validate: called with the journey content of each version and
+        returns (is_valid, errors), invalid versions are not used.
+    """
+
+    def __init__(self, compile, validate=None, interval=5, keep_versions=3,
+                 **kwargs):
+        self.compile = compile
+        self.validate = validate
+        self.interval = interval
+        self.keep_versions = keep_versions
+        self._journeys = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='ussd_journey_reload')
+
+    def get(self, file_path: str, namespace: str):
+        """
+        Returns the current version of the journey in file_path, it's
+        loaded on first access.
+        """
+        journey = self._journeys.get(namespace)
+        if journey is None or journey.file_path != file_path:
+            with self._lock:
+                journey = self._journeys.get(namespace)
+                if journey is None or journey.file_path != file_path:
+                    journey = _Journey(file_path)
+                    self._load(journey, namespace)
+                    self._journeys[namespace] = journey
+        elif time.monotonic() - journey.checked_at >= self.interval:
+            self._check(journey, namespace)
+        return journey.current
+
+    def get_version(self, namespace: str, version: str):
+        """
+        Returns the compiled journey of version, None if it's no longer
+        kept.
+        """
+        journey = self._journeys.get(namespace)
+        if journey is None:
+            return None
+        return journey.versions.get(version)
+
+    def _check(self, journey, namespace):
+        journey.checked_at = time.monotonic()
+        try:
+            mtime = os.stat(journey.file_path).st_mtime_ns
+        except OSError as e:
+            logger.warning("journey_file_error", namespace=namespace,
+                           error=str(e))
+            return
+        with self._lock:
+            if mtime == journey.mtime or journey.reloading:
+                return
+            journey.reloading = True
+            journey.reload = self._executor.submit(self.reload, journey,
+                                                   namespace)
+
+    def reload(self, journey, namespace):
+        try:
+            self._load(journey, namespace)
+        except Exception:
+            logger.exception("journey_reload_failed", namespace=namespace)
+        finally:
+            journey.reloading = False
+
+    def wait(self, namespace: str):
+        """
+        Waits for the last reload of namespace to complete.
+        """
+        journey = self._journeys.get(namespace)
+        if journey is not None and journey.reload is not None:
+            journey.reload.result()
+
+    def _load(self, journey, namespace):
+        mtime = os.stat(journey.file_path).st_mtime_ns
+        with open(journey.file_path, 'rb') as f:
+            content = f.read()
+        # don't read the file again until it changes, even if it's invalid
+        journey.mtime = mtime
+
+        version = hashlib.sha1(content).hexdigest()[:12]
+        if version in journey.versions:
+            # the file was changed back to a version that's still kept
+            versions = OrderedDict(journey.versions)
+            versions.move_to_end(version)
+            journey.versions = versions
+            return
+
+        journey_content = yaml_loader.load(content, journey.file_path)
+        if self.validate is not None:
+            is_valid, errors = self.validate(journey_content)
+            if not is_valid:
+                logger.error("invalid_journey", namespace=namespace,
+                             version=version, errors=errors)
+                if not journey.versions:
+                    # there is no previous version to keep serving
+                    raise InvalidJourney(
+                        "{file_path} is invalid: {errors}".format(
+                            file_path=journey.file_path, errors=errors))
+                return
+
+        compiled_journey = self.compile(journey_content, namespace, version)
+        versions = OrderedDict(journey.versions)
+        versions[version] = compiled_journey
+        while len(versions) > self.keep_versions:
+            versions.popitem(last=False)
+        # swapped in one assignment, requests see the old or the new
+        # versions
+        journey.versions = versions
+        logger.info("journey_loaded", namespace=namespace, version=version)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from ussd.journey_analysis import analyze_journey
+from ussd import yaml_loader
+import os
+import json
+
+
+class Command(BaseCommand):
+    help = 'Report unreachable screens, missing next screens, forwarding ' \
+           'cycles and forward chain depths of ussd customer journeys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ussd_configs', nargs='+', type=str)
+
+    def handle(self, *args, **options):
+        report = {}
+        for ussd_config in options["ussd_configs"]:
+            if not os.path.isfile(ussd_config):
+                raise CommandError(
+                    "This file path {} does not exist".format(ussd_config))
+            report[ussd_config] = analyze_journey(
+                yaml_loader.load_file(ussd_config))
+
+        self.stdout.write(json.dumps(report))
+        # unreachable screens are reported but don't break a journey
+        invalid = [ussd_config for ussd_config, analysis in report.items()
+                   if analysis['dangling'] or analysis['forwarding_cycles']]
+        if invalid:
+            raise CommandError(
+                "Journeys with missing next screens or forwarding cycles: "
+                "{}".format(", ".join(invalid)))
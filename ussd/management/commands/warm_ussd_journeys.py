@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from ussd.warm_up import get_journeys, warm_up_journeys
+import json
+
+
+class Command(BaseCommand):
+    help = 'Load, validate and compile ussd customer journeys'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--journey', nargs=2, action='append', dest='journeys',
+            metavar=('FILE', 'NAMESPACE'),
+            help='journey to warm up instead of the discovered ones')
+
+    def handle(self, *args, **options):
+        journeys = [tuple(journey) for journey in options['journeys'] or []]
+        if not journeys:
+            journeys = get_journeys()
+        if not journeys:
+            raise CommandError("No journeys found, define "
+                               "customer_journey_namespace in the views or "
+                               "set USSD_WARM_UP journeys")
+
+        report = warm_up_journeys(journeys)
+        self.stdout.write(json.dumps(report, default=str))
+        if not all(journey['valid'] for journey in report.values()):
+            raise CommandError(
+                "Invalid journeys: {}".format(", ".join(
+                    namespace for namespace, journey in report.items()
+                    if not journey['valid'])))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-17 19:13
+
+from django.db import migrations, models
+
+
+def remove_duplicate_user_ids(apps, schema_editor):
+    """
+    Keeps the most recently saved row of each user_id so that it can be
+    made unique (created_at is the auto_now field).
+    """
+    SessionLookup = apps.get_model('ussd', 'SessionLookup')
+    session_lookups = SessionLookup.objects.using(
+        schema_editor.connection.alias)
+    duplicates = session_lookups.values('user_id').annotate(
+        rows=models.Count('id')).filter(rows__gt=1)
+    for user_id in [duplicate['user_id'] for duplicate in duplicates]:
+        rows = session_lookups.filter(user_id=user_id)
+        newest = rows.order_by('-created_at', '-id').first()
+        rows.exclude(pk=newest.pk).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ussd', '0002_alter_sessionlookup_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionlookup',
+            name='closed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='sessionlookup',
+            name='last_activity',
+            field=models.DateTimeField(null=True, verbose_name='Last Activity'),
+        ),
+        migrations.RunPython(remove_duplicate_user_ids,
+                             migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='sessionlookup',
+            name='user_id',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
@@ -1,12 +1,94 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+
+class SessionLookupManager(models.Manager):
+
+    @staticmethod
+    def can_upsert(connection) -> bool:
+        """
+        Whether the database supports
+        INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING, e.g
+        postgresql and sqlite 3.35+.
+        """
+        features = connection.features
+        return features.supports_update_conflicts_with_target and \
+            features.can_return_columns_from_insert
+
+    def resolve(self, user_id, new_session_id, expiry) -> str:
+        """
+        Returns the session id of user_id.
+
+        The session is replaced by new_session_id if the user doesn't have
+        one, it has been inactive for more than expiry seconds or it has
+        been closed. The last activity is updated, in one query on
+        databases that can upsert.
+        """
+        now = timezone.now()
+        connection = connections[router.db_for_write(self.model)]
+        if self.can_upsert(connection):
+            return self._upsert(connection, user_id, new_session_id,
+                                now - timedelta(seconds=expiry), now)
+
+        with transaction.atomic(using=connection.alias):
+            session_lookup, created = self.select_for_update().get_or_create(
+                user_id=user_id,
+                defaults=dict(session_id=new_session_id, last_activity=now)
+            )
+            if not created:
+                last_activity = session_lookup.last_activity or \
+                    session_lookup.updated_at
+                if session_lookup.closed or \
+                        now - last_activity > timedelta(seconds=expiry):
+                    session_lookup.session_id = new_session_id
+                    session_lookup.closed = False
+                session_lookup.last_activity = now
+                session_lookup.save()
+        return session_lookup.session_id
+
+    def _upsert(self, connection, user_id, new_session_id, cutoff, now):
+        # rows created before last_activity was added use updated_at
+        expired = "({table}.closed OR COALESCE({table}.last_activity, " \
+                  "{table}.updated_at) < %s)"
+        sql = (
+            "INSERT INTO {table} (user_id, session_id, created_at, "
+            "updated_at, last_activity, closed) "
+            "VALUES (%s, %s, %s, %s, %s, %s) "
+            "ON CONFLICT (user_id) DO UPDATE SET "
+            "session_id = CASE WHEN " + expired +
+            " THEN excluded.session_id ELSE {table}.session_id END, "
+            "closed = %s, "
+            "last_activity = excluded.last_activity "
+            "RETURNING session_id"
+        ).format(table=connection.ops.quote_name(self.model._meta.db_table))
+        now = connection.ops.adapt_datetimefield_value(now)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                user_id, new_session_id, now, now, now, False,
+                connection.ops.adapt_datetimefield_value(cutoff), False
+            ])
+            return cursor.fetchone()[0]
+
+    def close(self, user_id, session_id):
+        """
+        Closes the session, the next request of user_id starts a new one.
+        """
+        return self.filter(user_id=user_id, session_id=session_id).update(
+            closed=True)
 
 
 class SessionLookup(models.Model):
     """
-    This model is used by built in session management 
+    This model is used by built in session management
     to map between user_id and session_id
     """
-    user_id = models.CharField(max_length=255)  # this can also be phone number
+    user_id = models.CharField(max_length=255, unique=True)  # this can also be phone number
     session_id = models.CharField(max_length=255)
     created_at = models.DateTimeField(u'Creation Date', auto_now=True)
     updated_at = models.DateTimeField(u'Update Date', auto_now_add=True)
+    last_activity = models.DateTimeField(u'Last Activity', null=True)
+    closed = models.BooleanField(default=False)
+
+    objects = SessionLookupManager()
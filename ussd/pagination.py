@@ -0,0 +1,171 @@
+"""
+Splits a screen's text and options into pages that fit in a ussd message.
+
+Pages are produced lazily, requesting the first page of a screen with
+thousands of options only walks the options that fit in that page.
+"""
+import math
+import textwrap
+from itertools import islice
+
+GSM7_CHARACTERS = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ"
+    " !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§"
+    "¿abcdefghijklmnopqrstuvwxyzäöñüà"
+)
+GSM7_EXTENDED_CHARACTERS = frozenset("^{}\\[~]|€\f")
+
+
+def gsm7_length(text: str) -> int:
+    """
+    Number of GSM-7 septets needed to send text.
+
+    Characters in the GSM-7 extension table take two septets. Text that has
+    characters outside the GSM-7 alphabet is sent UCS-2 encoded, its length
+    is the number of septets its UCS-2 (UTF-16) encoding takes.
+    """
+    length = 0
+    for character in text:
+        if character in GSM7_CHARACTERS:
+            length += 1
+        elif character in GSM7_EXTENDED_CHARACTERS:
+            length += 2
+        else:
+            return math.ceil(len(text.encode('utf-16-le')) * 8 / 7)
+    return length
+
+
+text_length_functions = {
+    'chars': len,
+    'gsm7': gsm7_length
+}
+
+
+def get_text_length_function(encoding: str = 'chars'):
+    try:
+        return text_length_functions[encoding]
+    except KeyError:
+        raise ValueError(
+            "Unsupported text encoding {encoding}, use one of "
+            "{choices}".format(encoding=encoding,
+                               choices=sorted(text_length_functions)))
+
+
+def _add_end_line(text):
+    if text and '\n' not in text:
+        text += '\n'
+    return text
+
+
+def _wrap_width(text, limit, length):
+    if length is len or not text:
+        return limit
+    # convert the limit to characters for textwrap
+    return max(1, limit * len(text) // max(length(text), 1))
+
+
+def paginate(text: str, options, text_limit: int, more_option: str,
+             back_option: str, length=len):
+    """
+    Yields the pages of a screen.
+
+    :param text: the screen text, it's word wrapped if it exceeds the limit.
+    :param options: iterable of option texts, it's consumed as pages are
+        requested.
+    :param text_limit: maximum length of a page
+    :param more_option: text of the option used to go to the next page
+    :param back_option: text of the option used to go to the previous page
+    :param length: function used to measure text e.g gsm7_length
+    """
+    more_text = "98. {more_option}".format(more_option=more_option)
+    back_text = "00. {back_option}".format(back_option=back_option)
+    has_pages = False
+
+    # paginate screen text
+    ussd_text = _add_end_line(text)
+    limit = text_limit
+    while length(ussd_text) > limit:
+        navigation = (back_text if has_pages else "") + more_text
+
+        # update limit to the one that considers pages
+        limit = limit - length(navigation) - 1
+
+        ussd_text_subsets = textwrap.wrap(
+            ussd_text, width=_wrap_width(ussd_text, limit, length))
+
+        yield _add_end_line(ussd_text_subsets[0]) + navigation
+        has_pages = True
+
+        ussd_text = _add_end_line(' '.join(ussd_text_subsets[1:]))
+
+    yield from paginate_options(ussd_text, options, text_limit, more_text,
+                                back_text, length, has_pages)
+
+
+def paginate_from(option: str, options, text_limit: int, more_option: str,
+                  back_option: str, length=len):
+    """
+    Yields the pages of a screen from an option page that starts with
+    option, options are the ones after it. Used to render a page without
+    the pages before it.
+    """
+    yield from paginate_options(
+        option, options, text_limit,
+        "98. {more_option}".format(more_option=more_option),
+        "00. {back_option}".format(back_option=back_option),
+        length, has_pages=True)
+
+
+def paginate_options(ussd_text: str, options, text_limit: int,
+                     more_text: str, back_text: str, length=len,
+                     has_pages=False):
+    """
+    Yields pages of options, iterating the options once.
+
+    Assumptions:
+        - ussd_text is within the limit
+    """
+    for option in options:
+        navigation = back_text if has_pages else ""
+        candidate = ussd_text + option
+        if length(candidate) <= text_limit - length(navigation):
+            ussd_text = candidate
+        else:
+            yield ussd_text + navigation + more_text
+            has_pages = True
+            ussd_text = option
+
+    yield ussd_text + (back_text if has_pages else "")
+
+
+def get_page(pages, page_number: int):
+    """
+    Returns page_number (starting from 1) from pages generated by paginate
+    without generating the pages after it.
+    """
+    return next(islice(pages, page_number - 1, None))
+
+
+class CountingIterator(object):
+    """
+    Counts the items taken from an iterable, e.g to find the option a page
+    stops at.
+    """
+
+    def __init__(self, iterable):
+        self.iterator = iter(iterable)
+        self.count = 0
+        self.exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            item = next(self.iterator)
+        except StopIteration:
+            self.exhausted = True
+            raise
+        self.count += 1
+        return item
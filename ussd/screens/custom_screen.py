@@ -102,6 +102,7 @@ class CustomScreen(UssdHandlerAbstract):
             self.handler,
             self.screen_content,
             initial_screen={},
+            static_texts=self.static_texts
         )
 
     def handle(self):
@@ -57,6 +57,9 @@ class FunctionScreen(UssdHandlerAbstract):
     Your function will be called with UssdRequest object.
     And it should return a dictionary that will be saved in ussd session
 
+    Long running functions should respect the request budget, time left is
+    available from ussd_request.remaining_time() (None if there is no budget).
+
     Below is the UssdRequest that will be used.
         .. autoclass:: ussd.core.UssdRequest
 
@@ -1,21 +1,69 @@
-from ussd.core import UssdHandlerAbstract
-from ussd.screens.serializers import NextUssdScreenSerializer
+from ussd.core import UssdHandlerAbstract, DeadlineExceeded
+from ussd import http_client, http_cache
+from ussd.circuit_breaker import CircuitBreaker, CircuitOpen, \
+    get_breaker_options
+from ussd.screens.serializers import NextUssdScreenSerializer, \
+    UssdScreenNameField
 from rest_framework import serializers
-from ussd.tasks import http_task
+from ussd.tasks import http_task, refresh_http_cache
+from urllib.parse import urlparse
+from asgiref.sync import sync_to_async
 import json
+import time
 from ussd.graph import Link, Vertex
+import requests
+
+class HttpClientConfSerializer(serializers.Serializer):
+    pool_connections = serializers.IntegerField(min_value=1, required=False)
+    pool_maxsize = serializers.IntegerField(min_value=1, required=False)
+    pool_block = serializers.BooleanField(required=False)
+    max_retries = serializers.IntegerField(min_value=0, required=False)
+    backoff_factor = serializers.FloatField(min_value=0, required=False)
+    status_forcelist = serializers.ListField(
+        child=serializers.IntegerField(), required=False)
+    timeout = serializers.FloatField(min_value=0, required=False)
+
 
 class HttpScreenConfSerializer(serializers.Serializer):
     method = serializers.ChoiceField(
         ("post", "get", "put", "delete")
     )
     url = serializers.CharField(max_length=255)
+    http_client = HttpClientConfSerializer(required=False)
+
+
+class CircuitBreakerConfSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255, required=False)
+    failure_threshold = serializers.FloatField(min_value=0, max_value=1,
+                                               required=False)
+    minimum_calls = serializers.IntegerField(min_value=1, required=False)
+    window = serializers.IntegerField(min_value=1, required=False)
+    slow_call_duration = serializers.FloatField(min_value=0, required=False)
+    recovery_timeout = serializers.FloatField(min_value=0, required=False)
+
+
+class HttpCacheConfSerializer(serializers.Serializer):
+    ttl = serializers.IntegerField(min_value=1)
+    key = serializers.CharField(max_length=255, required=False)
+    stale_while_revalidate = serializers.IntegerField(min_value=0,
+                                                      required=False)
+    cache_alias = serializers.CharField(max_length=100, required=False)
 
 
 class HttpScreenSerializer(NextUssdScreenSerializer):
     session_key = serializers.CharField()
     synchronous = serializers.BooleanField(required=False)
     http_request = HttpScreenConfSerializer()
+    circuit_breaker = CircuitBreakerConfSerializer(required=False)
+    on_failure = UssdScreenNameField(required=False)
+    circuit_open_next_screen = UssdScreenNameField(required=False)
+    cache = HttpCacheConfSerializer(required=False)
+
+    def validate(self, data):
+        if data.get('cache') and data['http_request']['method'] != 'get':
+            raise serializers.ValidationError(
+                {"cache": ["Only get requests can be cached"]})
+        return data
 
 
 class HttpScreen(UssdHandlerAbstract):
@@ -37,7 +85,11 @@ class HttpScreen(UssdHandlerAbstract):
                         either: get, post, put, delete
                 b. url
                     This is the url to be used to make the api call
-                c. And all the parameters python request module would accept
+                c. http_client (optional)
+                    Options of the pooled http client used for this
+                    request e.g timeout, max_retries, pool_maxsize.
+                    Defaults come from the USSD_HTTP_CLIENT setting.
+                d. And all the parameters python request module would accept
 
                 you will example below
 
@@ -53,6 +105,41 @@ class HttpScreen(UssdHandlerAbstract):
             After the api call has been made or been scheduled to celery task
             ussd request is forwarded to this next_screen
 
+        5. circuit_breaker (optional)
+            Fails calls immediately when the backend keeps failing, see
+            ussd.circuit_breaker for the options. Breakers are shared by
+            screens calling the same host unless a name is given.
+            Set USSD_CIRCUIT_BREAKER enabled to use it for all screens.
+
+        6. on_failure (optional)
+            Screen to go to if the api call fails (connection error or
+            timeout), the error is raised if it's not defined.
+
+        7. circuit_open_next_screen (optional)
+            Screen to go to if the circuit is open, defaults to on_failure.
+
+        8. cache (optional)
+            Caches the response of get requests in the django cache.
+            It contains the following fields:
+                a. ttl
+                    seconds the response is used without calling the api
+                b. key (optional)
+                    cache key, it can use session variables e.g
+                    "products_{{language}}". Defaults to a hash of the
+                    rendered http_request
+                c. stale_while_revalidate (optional)
+                    seconds an expired response is still used while it's
+                    refreshed in a celery task
+                d. cache_alias (optional)
+                    django cache to use, defaults to "default"
+
+            Only successful responses are cached, they are saved in the
+            session under session_key the same way as fresh ones.
+
+    If the request has a budget (USSD_REQUEST_BUDGET) the timeout of
+    synchronous calls is capped at the time remaining, a call that times out
+    because of it forwards the request to the deadline_exceeded_screen.
+
     Examples of router screens:
 
         .. literalinclude:: .././ussd/tests/sample_screen_definition/valid_http_screen_conf.yml
@@ -69,13 +156,152 @@ class HttpScreen(UssdHandlerAbstract):
         if self.screen_content.get('synchronous', False):
             http_task.delay(request_conf=http_request_conf)
         else:
-            self.make_request(
+            cache_key = self.get_cache_key(http_request_conf)
+            if cache_key is not None and \
+                    self.load_cached_response(cache_key, http_request_conf):
+                return self.route_options()
+
+            limited_by_deadline = self.limit_timeout(http_request_conf)
+            try:
+                response = self.call_backend(http_request_conf,
+                                             limited_by_deadline)
+            except CircuitOpen as e:
+                return self.route_failure(
+                    e, self.screen_content.get('circuit_open_next_screen'))
+            except requests.Timeout as e:
+                if limited_by_deadline:
+                    raise DeadlineExceeded(str(e)) from e
+                return self.route_failure(e)
+            except requests.RequestException as e:
+                return self.route_failure(e)
+
+            if cache_key is not None and response.status_code < 400:
+                self.cache_response(cache_key)
+        return self.route_options()
+
+    def get_cache_key(self, http_request_conf):
+        cache_conf = self.screen_content.get('cache')
+        if not cache_conf:
+            return None
+        key = cache_conf.get('key')
+        if key is not None:
+            key = self.render_text(self.ussd_request.session, key)
+        return http_cache.make_key(http_request_conf, key)
+
+    def load_cached_response(self, cache_key, http_request_conf) -> bool:
+        """
+        Saves the cached response in session, returns False if there is
+        none. Stale responses are refreshed in the background.
+        """
+        cache_conf = self.screen_content['cache']
+        cache_alias = cache_conf.get('cache_alias', 'default')
+        response, stale = http_cache.get_response(cache_key, cache_alias)
+        if response is None:
+            return False
+
+        self.ussd_request.session[self.screen_content['session_key']] = \
+            response
+        self.logger.info("http_cache_hit", cache_key=cache_key, stale=stale)
+
+        if stale and http_cache.acquire_refresh(
+                cache_key,
+                timeout=cache_conf.get('stale_while_revalidate') or
+                cache_conf['ttl'],
+                cache_alias=cache_alias):
+            refresh_http_cache.delay(cache_key=cache_key,
+                                     request_conf=http_request_conf,
+                                     cache_conf=dict(cache_conf))
+        return True
+
+    def cache_response(self, cache_key):
+        cache_conf = self.screen_content['cache']
+        http_cache.set_response(
+            cache_key,
+            self.ussd_request.session[self.screen_content['session_key']],
+            ttl=cache_conf['ttl'],
+            stale_while_revalidate=cache_conf.get('stale_while_revalidate', 0),
+            cache_alias=cache_conf.get('cache_alias', 'default')
+        )
+
+    async def ahandle(self):
+        # api calls don't need to run in django's main thread, running them
+        # in the thread pool doesn't block other requests.
+        return await sync_to_async(self.handle, thread_sensitive=False)()
+
+    def call_backend(self, http_request_conf, limited_by_deadline=False):
+        """
+        Makes the request through the circuit breaker of the backend.
+        Timeouts are not counted as failures if limited_by_deadline, the
+        backend only had what was left of the request budget.
+        """
+        circuit_breaker = self.get_circuit_breaker(http_request_conf)
+        if circuit_breaker is None:
+            return self.make_request(
                 http_request_conf=http_request_conf,
                 response_session_key_save=self.screen_content['session_key'],
                 session=self.ussd_request.session,
                 logger=self.logger
             )
-        return self.route_options()
+
+        circuit_breaker.before_call()
+        start = time.monotonic()
+        try:
+            response = self.make_request(
+                http_request_conf=http_request_conf,
+                response_session_key_save=self.screen_content['session_key'],
+                session=self.ussd_request.session,
+                logger=self.logger
+            )
+        except requests.Timeout:
+            if limited_by_deadline:
+                circuit_breaker.record_ignored()
+            else:
+                circuit_breaker.record_failure()
+            raise
+        except requests.RequestException:
+            circuit_breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_success(time.monotonic() - start)
+        return response
+
+    def get_circuit_breaker(self, http_request_conf):
+        breaker_conf = self.screen_content.get('circuit_breaker')
+        if breaker_conf is None and not get_breaker_options()['enabled']:
+            return None
+        breaker_conf = dict(breaker_conf or {})
+        name = breaker_conf.pop('name', None) or \
+            urlparse(http_request_conf['url']).netloc or \
+            http_request_conf['url']
+        return CircuitBreaker.from_options(name, breaker_conf)
+
+    def route_failure(self, error, next_screen=None):
+        next_screen = next_screen or self.screen_content.get('on_failure')
+        if not next_screen:
+            raise error
+        self.logger.warning("http_screen_failure", error=str(error),
+                            next_screen=next_screen)
+        return self.ussd_request.forward(next_screen)
+
+    def limit_timeout(self, http_request_conf) -> bool:
+        """
+        Caps the request timeout at the time left in the request budget.
+        Returns True if the timeout was reduced.
+        """
+        remaining = self.ussd_request.remaining_time()
+        if remaining is None:
+            return False
+        self.ussd_request.check_deadline()
+
+        timeout = http_request_conf.get('timeout')
+        if timeout is None:
+            timeout = http_client.get_client_options(
+                http_request_conf.get('http_client'))['timeout']
+        http_request_conf['timeout'] = http_client.limit_timeout(
+            timeout, remaining)
+        return http_request_conf['timeout'] != timeout
 
     def show_ussd_content(self, **kwargs):
         results = "http_screen\n{}".format(json.dumps(self.screen_content['http_request'],
@@ -84,7 +310,14 @@ class HttpScreen(UssdHandlerAbstract):
         return results
 
     def get_next_screens(self):
-        return [
+        links = [
             Link(Vertex(self.handler), Vertex(self.screen_content['next_screen']),
                  self.screen_content['session_key'])
         ]
+        for key in ('on_failure', 'circuit_open_next_screen'):
+            if self.screen_content.get(key):
+                links.append(
+                    Link(Vertex(self.handler),
+                         Vertex(self.screen_content[key]), key)
+                )
+        return links
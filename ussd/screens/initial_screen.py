@@ -1,6 +1,7 @@
 from ussd.core import UssdHandlerAbstract, load_yaml
 from rest_framework import serializers
-from ussd.screens.serializers import NextUssdScreenSerializer
+from ussd.screens.serializers import NextUssdScreenSerializer, \
+    UssdScreenNameField
 import staticconf
 from ussd.graph import Vertex, Link
 import typing
@@ -30,6 +31,7 @@ class InitialScreenSerializer(NextUssdScreenSerializer):
     default_language = serializers.CharField(required=False,
                                              default="en")
     ussd_report_session = UssdReportSessionSerializer(required=False)
+    deadline_exceeded_screen = UssdScreenNameField(required=False)
 
 
 class InitialScreen(UssdHandlerAbstract):
@@ -115,9 +117,19 @@ class InitialScreen(UssdHandlerAbstract):
                 
             - async_parameters ( Optional )
                 This is are the parameters used to make ussd request
-            
-            
-                
+
+    When USSD_REQUEST_BUDGET is set each request has a deadline, if it's
+    exhausted before the response is ready the request is forwarded to
+    deadline_exceeded_screen (the error is raised if it's not defined).
+
+    example:
+
+        .. code-block:: yaml
+
+            initial_screen:
+                type: initial_screen
+                next_screen: check_balance
+                deadline_exceeded_screen: try_again_later
     """
     screen_type = "initial_screen"
 
@@ -4,10 +4,13 @@ from .serializers import UssdContentBaseSerializer, \
 from rest_framework.serializers import ListField, ValidationError, \
     CharField
 from django.core.paginator import Paginator
-import textwrap
 from django.conf import settings
 from ussd import defaults
 from ussd.graph import Link, Vertex
+from ussd.pagination import paginate, paginate_from, paginate_options, \
+    get_page, get_text_length_function, CountingIterator
+from functools import cached_property
+from itertools import islice
 import typing
 
 
@@ -172,121 +175,195 @@ class MenuScreen(UssdHandlerAbstract):
     """
     screen_type = "menu_screen"
     serializer = MenuScreenSerializer
-
-    def __init__(self, *args, **kwargs):
-        super(MenuScreen, self).__init__(*args, **kwargs)
-        self.list_options = [] if self.screen_content.get('items') is None \
+    async_safe = True
+
+    # options are evaluated on first use, paging through a menu renders
+    # the options of the page requested using the page index kept in the
+    # session.
+    @cached_property
+    def list_options(self):
+        return [] if self.screen_content.get('items') is None \
             else self.get_items()
-        self.menu_options = [] if self.screen_content.get('options') is None \
+
+    @cached_property
+    def menu_options(self):
+        return [] if self.screen_content.get('options') is None \
             else self.get_menu_options()
-        self.error_message = "Please enter a valid choice.\n" \
+
+    @cached_property
+    def error_message(self):
+        return "Please enter a valid choice.\n" \
             if not self.screen_content.get('error_message') \
             else self.get_text(self.screen_content["error_message"])
 
+    @cached_property
+    def options(self):
         # all options
-        self.options = self.list_options + \
-                       ([] if self.screen_content.get('options') is None else
-                        self.get_menu_options(
-                            start_index=len(self.list_options) + 1))
+        return self.list_options + \
+            ([] if self.screen_content.get('options') is None else
+             self.get_menu_options(start_index=len(self.list_options) + 1))
 
-        self.paginator = self.get_paginator()
+    @cached_property
+    def loop_value(self):
+        # with_items or with_dict of the items section
+        loop_value = ""
+        for key, value_ in self.screen_content['items'].items():
+            if key.startswith("with_"):
+                loop_value = value_
+        return loop_value
+
+    @cached_property
+    def loop_items(self):
+        return self.evaluate_jija_expression(self.loop_value,
+                                             session=self.ussd_request.session,
+                                             default=[]
+                                             )
+
+    @cached_property
+    def items_count(self) -> int:
+        if self.screen_content.get('items') is None:
+            return 0
+        if self.loop_items is None and self.raw_text:
+            return 1
+        return len(self.loop_items)
+
+    def iter_option_texts(self, offset: int = 0):
+        """
+        Yields the text of the items then the menu options from the
+        option at offset, they are rendered as they are requested.
+        """
+        if self.screen_content.get('items') is not None:
+            for item in self.iter_items(offset=offset, render_value=False):
+                yield item.text
+        if self.screen_content.get('options') is not None:
+            for option in self.iter_menu_options(
+                    start_index=self.items_count + 1,
+                    offset=max(offset - self.items_count, 0)):
+                yield option.text
+
+    @cached_property
+    def paginator(self):
+        return self.get_paginator()
 
     def show_ussd_content(self):
         if not self.raw_text:
-            self.ussd_request.session['_ussd_state']['page'] = 1
+            # the screen is being shown, start from the first page.
+            ussd_state = self.ussd_request.session['_ussd_state']
+            ussd_state['page'] = 1
+            ussd_state.pop('pages', None)
         return self._render_django_page(1)
 
-    def _render_django_page(self, index):
-        return self.paginator.page(index).object_list[0]
-
-    def get_paginator(self):
-        pages = []
-        ussd_title = self._add_end_line(self.get_text())
-
-        # get ussd text limit
-        ussd_text_limit = self.get_text_limit()
-
-        # paginate menu screen text
-        while len(ussd_title) > ussd_text_limit:
-            # Lets create pages
-            text = ""
-            if len(pages) > 0:
-                text += "00. {back_option}".format(
-                    back_option=self.pagination_back_option)
-            text += "98. {more_option}".format(
-                more_option=self.pagination_more_option
-            )
-
-            # update ussd_text_limit to the one that considers pages
-            ussd_text_limit = ussd_text_limit - len(text) - 1
+    def _get_page_index(self):
+        """
+        Returns the page index of this screen kept in the session, it's
+        replaced once the session moves to another screen. offsets has the
+        option each page starts with, None if the page is rendered from the
+        first page, and last the number of pages once it's known.
+        """
+        if self.raw_text:
+            return None
+        ussd_state = self.ussd_request.session['_ussd_state']
+        page_index = ussd_state.get('pages')
+        if not page_index or page_index.get('screen') != self.handler:
+            page_index = ussd_state['pages'] = dict(
+                screen=self.handler, offsets=[None], last=None)
+        return page_index
 
-            ussd_text_subsets = textwrap.wrap(
-                ussd_title, width=ussd_text_limit
-            )
+    def _render_django_page(self, index):
+        page_index = self._get_page_index()
+        offset = None
+        if page_index is not None and index <= len(page_index['offsets']):
+            offset = page_index['offsets'][index - 1]
+
+        if offset is None:
+            # only render up to the page requested
+            offset = 0
+            options = CountingIterator(self.iter_option_texts())
+            page = get_page(self.iter_pages(options), index)
+        else:
+            # render the options of this page only
+            options = CountingIterator(self.iter_option_texts(offset))
+            page = next(paginate_from(
+                next(options), options, self.get_text_limit(),
+                self.pagination_more_option, self.pagination_back_option,
+                length=self.get_text_length_function()))
+
+        if page_index is not None:
+            offsets = page_index['offsets']
+            del offsets[index:]
+            offsets.extend([None] * (index - len(offsets)))
+            if options.exhausted:
+                page_index['last'] = index
+            else:
+                # the option that didn't fit starts the next page
+                offsets.append(offset + options.count - 1
+                               if options.count else None)
+        return page
 
-            pages.append(
-                self._add_end_line(ussd_text_subsets[0]) + text
-            )
+    def _get_page(self, index):
+        """
+        Returns page index or None if the screen doesn't have it.
+        """
+        page_index = self._get_page_index()
+        if index < 1 or (page_index is not None and
+                         page_index['last'] is not None and
+                         index > page_index['last']):
+            return None
+        try:
+            return self._render_django_page(index)
+        except StopIteration:
+            return None
 
-            ussd_title = self._add_end_line(' '.join(ussd_text_subsets[1:]))
+    def get_paginator(self):
+        return Paginator(list(self.iter_pages()), 1)
 
-        self.paginate_options(ussd_title, pages, self.options[:])
+    def get_text_length_function(self):
+        return get_text_length_function(
+            self.pagination_config.get('text_encoding', 'chars'))
 
-        return Paginator(pages, 1)
+    def iter_pages(self, options=None):
+        """
+        Yields the screen pages lazily, options are the option texts.
+        """
+        return paginate(
+            self.get_text(),
+            self.iter_option_texts() if options is None else options,
+            self.get_text_limit(),
+            self.pagination_more_option,
+            self.pagination_back_option,
+            length=self.get_text_length_function()
+        )
 
     def paginate_options(self, ussd_text, pages, options):
         """
         Assumptions:
             - ussd_text is within the limit
         """
-        # Todo use back off strategy to generate the pages
-        text = ""
-        if len(pages) > 0:
-            text += "00. {back_option}".format(
-                back_option=self.pagination_back_option)
-
-        if not options:
-            pages.append(
-                ussd_text + text
-            )
-            return pages
-
-        ussd_text_cadidate = ussd_text + options[0].text
-        # detect if there might be more optoins
-        text += "98. {more_option}".format(more_option=
-                                           self.pagination_more_option) \
-            if len(ussd_text_cadidate) > self.get_text_limit() - len(text) \
-            else ''
-        if len(ussd_text_cadidate) <= self.get_text_limit() - len(text):
-            ussd_text = ussd_text + options[0].text
-        else:
-            pages.append(
-                ussd_text + text
-            )
-            ussd_text = options[0].text
-        return self.paginate_options(
+        pages.extend(
+            paginate_options(
                 ussd_text,
-                pages,
-                options[1:]
+                (option.text for option in options),
+                self.get_text_limit(),
+                "98. {more_option}".format(
+                    more_option=self.pagination_more_option),
+                "00. {back_option}".format(
+                    back_option=self.pagination_back_option),
+                length=self.get_text_length_function(),
+                has_pages=len(pages) > 0
             )
+        )
+        return pages
 
     def handle_ussd_input(self, ussd_input):
         # check if input is for previous or next page
         if self.ussd_request.input.strip() in ("98", "00"):
-            page = self.paginator.page(
-                self.ussd_request.session['_ussd_state']['page']
-            )
-            if self.ussd_request.input.strip() == "98" and page.has_next():
-                new_page_number = page.next_page_number()
-                self.ussd_request.session['_ussd_state']['page'] = \
-                    new_page_number
-                return UssdResponse(self._render_django_page(new_page_number))
-            elif self.ussd_request.input.strip() == '00' and \
-                    page.has_previous():
-                new_page_number = page.previous_page_number()
-                self.ussd_request.session['_ussd_state']['page'] = \
-                    new_page_number
-                return UssdResponse(self._render_django_page(new_page_number))
+            ussd_state = self.ussd_request.session['_ussd_state']
+            new_page_number = ussd_state.get('page', 1) + \
+                (1 if self.ussd_request.input.strip() == "98" else -1)
+            page = self._get_page(new_page_number)
+            if page is not None:
+                ussd_state['page'] = new_page_number
+                return UssdResponse(page)
         next_screen = self.evaluate_input()
         if next_screen:
             return self.route_options(next_screen)
@@ -323,34 +400,36 @@ class MenuScreen(UssdHandlerAbstract):
         This gets ListItems
         :return:
         """
+        return list(self.iter_items(start_index))
+
+    def iter_items(self, start_index: int = 1, offset: int = 0,
+                   render_value: bool = True):
+        """
+        Yields ListItems from the item at offset. The value is only
+        rendered if render_value is set, displaying a page doesn't need it.
+        """
         items_section = self.screen_content['items']
 
         text = self.screen_content['items']['text']
         value = self.screen_content['items']['value']
 
-        loop_method = ""
-        loop_value = ""
-        for key, value_ in items_section.items():
-            if key.startswith("with_"):
-                loop_method = "_" + key
-                loop_value = value_
-
-        items = self.evaluate_jija_expression(loop_value,
-                                              session=self.ussd_request.session,
-                                              default=[]
-                                              )
+        items = self.loop_items
         if items is None and self.raw_text:
-            txt = loop_value or value
-            txt += '\n'
-            return [ListItem(txt, items_section['session_key'])]
-        return getattr(self, loop_method)(
-            text, value, items, start_index
-        )
+            if offset == 0:
+                txt = self.loop_value or value
+                txt += '\n'
+                yield ListItem(txt, items_section['session_key'])
+            return
+        yield from self._iter_items(text, value, items, start_index, offset,
+                                    render_value)
 
     def get_menu_options(self, start_index: int = 1) -> list:
-        menu_options = []
-        for i, option in enumerate(self.screen_content.get('options', []),
-                                   start_index):
+        return list(self.iter_menu_options(start_index))
+
+    def iter_menu_options(self, start_index: int = 1, offset: int = 0):
+        options = enumerate(self.screen_content.get('options', []),
+                            start_index)
+        for i, option in islice(options, offset, None):
             input_value = option.get('input_value') or i
             input_display = option.get('input_display') or "{index}{index_format}".format(
                 index=input_value,
@@ -363,16 +442,13 @@ class MenuScreen(UssdHandlerAbstract):
                     self.get_text(text_context=option['text'])
                 )
             )
-            menu_options.append(
-                MenuOption(
-                    text,
-                    option['next_screen'],
-                    input_display,
-                    input_value,
-                    self.get_text(text_context=option['text'])
-                )
+            yield MenuOption(
+                text,
+                option['next_screen'],
+                input_display,
+                input_value,
+                self.get_text(text_context=option['text'])
             )
-        return menu_options
 
     def handle_invalid_input(self):
         return UssdResponse(
@@ -381,9 +457,10 @@ class MenuScreen(UssdHandlerAbstract):
             self._render_django_page(1)
         )
 
-    def _with_items(self, text, value, items, start_index):
-        list_items = []
-        for index, item in enumerate(items, start_index):
+    def _iter_items(self, text, value, items, start_index, offset=0,
+                    render_value=True):
+        for index, item in islice(enumerate(items, start_index), offset,
+                                  None):
             context = {}
             extra = {
                 "item": item
@@ -403,27 +480,22 @@ class MenuScreen(UssdHandlerAbstract):
                 index=index,
                 index_format=getattr(settings, 'USSD_INDEX_FORMAT', defaults.index_format))
 
-            list_items.append(
-                ListItem(
-                    self._add_end_line("{index_text}{text}".format(
-                        index_text=index_text,
-                        text=UssdHandlerAbstract.render_text(
-                            self.ussd_request.session,
-                            text,
-                            extra=context
-                        )
+            yield ListItem(
+                self._add_end_line("{index_text}{text}".format(
+                    index_text=index_text,
+                    text=UssdHandlerAbstract.render_text(
+                        self.ussd_request.session,
+                        text,
+                        extra=context
                     )
-                    ),
-                    self.evaluate_jija_expression(value,
-                                                  session=
-                                                  self.ussd_request.session,
-                                                  extra_context=context)
                 )
+                ),
+                self.evaluate_jija_expression(value,
+                                              session=
+                                              self.ussd_request.session,
+                                              extra_context=context)
+                if render_value else None
             )
-        return list_items
-
-    def _with_dict(self, text, value, items, start_index):
-        return self._with_items(text, value, items, start_index)
 
     def get_next_screens(self) -> typing.List[Link]:
         links = []
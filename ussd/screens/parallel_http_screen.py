@@ -0,0 +1,193 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+import json
+import os
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework import serializers
+
+from ussd import defaults as ussd_airflow_variables
+from ussd import http_client
+from ussd.core import UssdHandlerAbstract
+from ussd.graph import Link, Vertex
+from ussd.screens.http_screen import HttpScreenConfSerializer
+from ussd.screens.serializers import NextUssdScreenSerializer
+
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the executor running the requests of all parallel http screens
+    of the process, it has USSD_PARALLEL_HTTP_WORKERS threads.
+    """
+    global _executor, _executor_pid
+    with _lock:
+        # threads are not copied to forked processes e.g celery workers
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(
+                    settings, 'USSD_PARALLEL_HTTP_WORKERS',
+                    ussd_airflow_variables.parallel_http_workers),
+                thread_name_prefix='parallel_http_screen')
+            _executor_pid = os.getpid()
+    return _executor
+
+
+class ParallelHttpRequestSerializer(serializers.Serializer):
+    session_key = serializers.CharField(max_length=100)
+    http_request = HttpScreenConfSerializer()
+
+
+class ParallelHttpScreenSerializer(NextUssdScreenSerializer):
+    requests = serializers.ListField(
+        child=ParallelHttpRequestSerializer(),
+        min_length=1
+    )
+    timeout = serializers.FloatField(min_value=0, required=False)
+
+
+class ParallelHttpScreen(UssdHandlerAbstract):
+    """
+    This screen is invisible to the user. It makes several api calls at the
+    same time, use it instead of a chain of http screens when the calls
+    don't depend on each other.
+
+    Fields used to create this screen:
+
+        1. requests
+            List of api calls, each has:
+                a. session_key
+                    The response is saved in session using this key, the
+                    same way http_screen saves it.
+                b. http_request
+                    Same as http_screen http_request
+
+        2. timeout (optional)
+            Seconds to wait for all the calls. The calls are also limited
+            by the request budget (USSD_REQUEST_BUDGET).
+
+        3. next_screen
+            Once all the calls have completed or timed out ussd request is
+            forwarded to this next_screen
+
+    Calls that fail or don't complete in time are saved as
+    {"error": "<reason>"} under their session_key.
+
+    The calls of all parallel http screens in a process share
+    USSD_PARALLEL_HTTP_WORKERS threads (10 by default), calls wait for a
+    free thread under load.
+
+    Example of parallel http screen:
+
+        .. code-block:: yaml
+
+            get_account:
+              type: parallel_http_screen
+              timeout: 5
+              next_screen:
+                - condition: balance.error or loan_limit.error
+                  next_screen: account_unavailable
+                - condition: "true"
+                  next_screen: show_account
+              requests:
+                - session_key: balance
+                  http_request:
+                    method: get
+                    url: http://localhost:8000/mock/balance
+                    params:
+                      phone_number: "{{ phone_number }}"
+                - session_key: loan_limit
+                  http_request:
+                    method: get
+                    url: http://localhost:8000/mock/loan_limit
+                    params:
+                      phone_number: "{{ phone_number }}"
+    """
+    screen_type = "parallel_http_screen"
+    serializer = ParallelHttpScreenSerializer
+
+    def handle(self):
+        session = self.ussd_request.session
+        request_confs = [
+            (conf['session_key'],
+             self.render_request_conf(session, conf['http_request']))
+            for conf in self.screen_content['requests']
+        ]
+
+        timeout = self.get_timeout()
+        if timeout is not None:
+            for _, http_request_conf in request_confs:
+                http_request_conf['timeout'] = http_client.limit_timeout(
+                    http_request_conf.get('timeout'), timeout)
+
+        executor = get_executor()
+        futures = [
+            (session_key, executor.submit(http_client.request,
+                                          **http_request_conf))
+            for session_key, http_request_conf in request_confs
+        ]
+        # requests that didn't complete are cancelled if they haven't
+        # started, see get_response_variables
+        wait([future for _, future in futures], timeout=timeout)
+
+        # session is only updated from this thread
+        for session_key, future in futures:
+            session[session_key] = self.get_response_variables(
+                session_key, future)
+
+        return self.route_options()
+
+    async def ahandle(self):
+        # api calls don't need to run in django's main thread, running them
+        # in the thread pool doesn't block other requests.
+        return await sync_to_async(self.handle, thread_sensitive=False)()
+
+    def get_timeout(self):
+        timeout = self.screen_content.get('timeout')
+        remaining = self.ussd_request.remaining_time()
+        if remaining is None:
+            return timeout
+        self.ussd_request.check_deadline()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def get_response_variables(self, session_key, future):
+        if not future.done():
+            future.cancel()
+            self.logger.warning("request_timed_out", session_key=session_key)
+            return {"error": "timeout"}
+        error = future.exception()
+        if error is not None:
+            self.logger.warning("request_failed", session_key=session_key,
+                                error=str(error))
+            return {"error": str(error)}
+
+        response = future.result()
+        self.logger.info("response", session_key=session_key,
+                         status_code=response.status_code)
+        return self.get_variables_from_response_obj(response)
+
+    def show_ussd_content(self, **kwargs):
+        results = "parallel_http_screen\n{}".format(
+            json.dumps(self.screen_content['requests'], indent=2,
+                       sort_keys=True))
+        return results.replace('"', "'")
+
+    def get_next_screens(self):
+        screen_vertex = Vertex(self.handler)
+        session_keys = ', '.join(conf['session_key']
+                                 for conf in self.screen_content['requests'])
+        if isinstance(self.screen_content.get("next_screen"), list):
+            return [
+                Link(screen_vertex, Vertex(i['next_screen'], ""),
+                     i['condition'])
+                for i in self.screen_content["next_screen"]
+            ]
+        return [
+            Link(screen_vertex, Vertex(self.screen_content['next_screen']),
+                 session_keys)
+        ]
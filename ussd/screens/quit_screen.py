@@ -1,6 +1,5 @@
 from ussd.core import UssdHandlerAbstract, UssdResponse
 from ussd.screens.serializers import UssdContentBaseSerializer
-from ussd import defaults as ussd_airflow_variables
 from ussd.graph import Link
 import typing
 
@@ -20,7 +19,7 @@ class QuitScreen(UssdHandlerAbstract):
 
     def handle(self):
         # set session has expired
-        self.ussd_request.session[ussd_airflow_variables.expiry] = True
+        self.ussd_request.close_session()
 
         if self.initial_screen.get('ussd_report_session'):
             # schedule a task to report session
@@ -54,6 +54,7 @@ class RouterScreen(UssdHandlerAbstract):
 
     screen_type = "router_screen"
     serializer = RouterSerializer
+    async_safe = True
 
     def handle(self):
         return self.route_options(
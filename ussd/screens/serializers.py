@@ -80,6 +80,23 @@ class UssdNextScreenField(serializers.ListField):
         return super(UssdNextScreenField, self).to_internal_value(data)
 
 
+class UssdScreenNameField(serializers.CharField):
+    """
+    Name of a screen in the ussd journey
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', 100)
+        super(UssdScreenNameField, self).__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        value = super(UssdScreenNameField, self).to_internal_value(data)
+        if value not in self.context.keys():
+            raise serializers.ValidationError(
+                "{screen} is missing in ussd journey".format(screen=value)
+            )
+        return value
+
+
 class NextUssdScreenChildSerializer(serializers.Serializer):
     condition = serializers.CharField(max_length=255)
     next_screen = serializers.CharField(max_length=100)
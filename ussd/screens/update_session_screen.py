@@ -46,6 +46,7 @@ class UpdateSessionScreen(UssdHandlerAbstract):
     """
     screen_type = "update_session_screen"
     serializer = UpdateSessionSerializer
+    async_safe = True
 
     def handle(self):
 
@@ -0,0 +1,176 @@
+"""
+Redis session engine for ussd sessions.
+
+The session is saved as a redis hash, one field per session key, so that
+ussd_session gets or creates it in one round trip (see load_or_create) and
+only the keys a request changed are written back (see save_delta).
+
+To use it::
+
+    USSD_SESSION_ENGINE = 'ussd.session_engines.redis'
+
+    USSD_REDIS_SESSION = {
+        "url": "redis://localhost:6379/0",
+        "key_prefix": "ussd_session",
+        # seconds sessions are kept after the last request, defaults to
+        # SESSION_COOKIE_AGE. Should cover the ussd expiry and the
+        # ussd_report_session countdown.
+        "ttl": 900,
+        "client_class": "redis.Redis"
+    }
+
+Requires the redis package.
+"""
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError, \
+    SessionBase, VALID_KEY_CHARS
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.crypto import get_random_string
+
+from ussd import defaults as ussd_airflow_variables
+from ussd import utilities
+
+# the hash is never empty so that a new session exists once created
+CREATED_FIELD = '_ussd_created'
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_options() -> dict:
+    options = dict(ussd_airflow_variables.redis_session)
+    options.update(getattr(settings, 'USSD_REDIS_SESSION', {}))
+    return options
+
+
+def get_client(options: dict):
+    key = (options['client_class'], options['url'])
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            try:
+                client_class = utilities.str_to_class(options['client_class'])
+            except Exception:
+                raise ImproperlyConfigured(
+                    "Install redis to use {} (pip install redis)".format(
+                        __name__))
+            client = _clients[key] = client_class.from_url(options['url'])
+    return client
+
+
+class SessionStore(SessionBase):
+
+    def __init__(self, session_key=None):
+        super(SessionStore, self).__init__(session_key)
+        self.options = get_options()
+        self.client = get_client(self.options)
+
+    def redis_key(self, session_key=None):
+        return '{prefix}:{key}'.format(
+            prefix=self.options['key_prefix'],
+            key=session_key or self._get_or_create_session_key())
+
+    def get_ttl(self):
+        # not get_expiry_age, it loads the session
+        return self.options['ttl'] or settings.SESSION_COOKIE_AGE
+
+    def encode_fields(self, session_dict):
+        serializer = self.serializer()
+        return {key: serializer.dumps(value)
+                for key, value in session_dict.items()}
+
+    def decode_fields(self, fields):
+        serializer = self.serializer()
+        return {
+            key.decode(): serializer.loads(value)
+            for key, value in fields.items() if key.decode() != CREATED_FIELD
+        }
+
+    def load_or_create(self):
+        """
+        Loads the session creating it if it doesn't exist, in one round
+        trip.
+        """
+        key = self.redis_key()
+        pipe = self.client.pipeline()
+        pipe.hsetnx(key, CREATED_FIELD, 1)
+        pipe.expire(key, self.get_ttl())
+        pipe.hgetall(key)
+        _, _, fields = pipe.execute()
+        self._session_cache = self.decode_fields(fields)
+        return self._session_cache
+
+    async def aload_or_create(self):
+        return await sync_to_async(self.load_or_create)()
+
+    def load(self):
+        if self.session_key is None:
+            return {}
+        fields = self.client.hgetall(self.redis_key(self.session_key))
+        if not fields:
+            self._session_key = None
+        return self.decode_fields(fields)
+
+    def exists(self, session_key):
+        return bool(self.client.exists(self.redis_key(session_key)))
+
+    def create(self):
+        while True:
+            self._session_key = self._get_new_session_key()
+            try:
+                self.save(must_create=True)
+            except CreateError:
+                continue
+            self.modified = True
+            return
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        key = self.redis_key()
+        if must_create and not self.client.hsetnx(key, CREATED_FIELD, 1):
+            raise CreateError
+        fields = self.encode_fields(self._get_session(no_load=must_create))
+        fields[CREATED_FIELD] = 1
+
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, self.get_ttl())
+        pipe.execute()
+
+    def save_delta(self, changed: dict, removed: set):
+        """
+        Writes only the changed and removed keys, see
+        ussd.session_tracker.
+        """
+        key = self.redis_key()
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping=dict(self.encode_fields(changed),
+                                    **{CREATED_FIELD: 1}))
+        if removed:
+            pipe.hdel(key, *removed)
+        pipe.expire(key, self.get_ttl())
+        pipe.execute()
+
+    async def asave_delta(self, changed: dict, removed: set):
+        await sync_to_async(self.save_delta)(changed, removed)
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self.client.delete(self.redis_key(session_key))
+
+    def _get_new_session_key(self):
+        # uniqueness is checked when the session is created, see create
+        return get_random_string(32, VALID_KEY_CHARS)
+
+    @classmethod
+    def clear_expired(cls):
+        # redis removes expired sessions
+        pass
@@ -0,0 +1,135 @@
+"""
+Per session lock so that requests of the same ussd session are handled one
+at a time, e.g when the gateway resends a request that is still being
+handled.
+
+The lock is a lease in the django cache, it expires after timeout seconds
+in case the worker holding it dies. It's configured with the
+USSD_SESSION_LOCK setting::
+
+    USSD_SESSION_LOCK = {
+        "enabled": False,
+        "timeout": 10,          # seconds the lock is held at most
+        "wait": 2,              # seconds to wait for the lock
+        "poll_interval": 0.05,
+        # what to do when the session is locked:
+        #   wait    wait for the lock then handle the request
+        #   reject  respond with busy_text without waiting
+        #   replay  wait for the lock then respond with the previous
+        #           response if the request is a duplicate
+        "policy": "wait",
+        "busy_text": "Your request is being processed, please try again.",
+        "cache_alias": "default"  # needs a cache shared by the workers
+    }
+
+Requests that don't get the lock in time are answered with busy_text.
+
+The lock is only as shared as the cache it lives in. The "default" cache
+of this project is LocMemCache, which is per process, so with it the lock
+does nothing across workers. Point cache_alias at a cache shared by all
+the workers (redis, memcached, database) when enabling the lock.
+
+On django's RedisCache the lock is released with a compare and delete
+script, so a request whose lease expired can't delete the lock of the
+request that took it over. Other backends have no such operation, the
+lock is read then deleted and a lease expiring in between is lost. Keep
+timeout well above the time a request can take; it has to be greater
+than USSD_REQUEST_BUDGET when that is set.
+"""
+import asyncio
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+from ussd import defaults as ussd_airflow_variables
+
+POLICIES = ('wait', 'reject', 'replay')
+
+# deletes the lock only if it's still held with our token
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def get_lock_options(overrides: dict = None) -> dict:
+    options = dict(ussd_airflow_variables.session_lock)
+    options.update(getattr(settings, 'USSD_SESSION_LOCK', {}))
+    options.update(overrides or {})
+    if options['policy'] not in POLICIES:
+        raise ValueError("USSD_SESSION_LOCK policy should be one of "
+                         "{}".format(POLICIES))
+    budget = getattr(settings, 'USSD_REQUEST_BUDGET',
+                     ussd_airflow_variables.request_budget)
+    if options['enabled'] and budget is not None and \
+            options['timeout'] <= budget:
+        raise ValueError("USSD_SESSION_LOCK timeout should be greater than "
+                         "USSD_REQUEST_BUDGET")
+    return options
+
+
+class SessionLock(object):
+    key_prefix = 'ussd_session_lock'
+
+    def __init__(self, session_id, timeout=10, wait=2, poll_interval=0.05,
+                 cache_alias='default', **kwargs):
+        self.key = '{prefix}:{session_id}'.format(prefix=self.key_prefix,
+                                                  session_id=session_id)
+        self.timeout = timeout
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self.cache = caches[cache_alias]
+        self.token = uuid.uuid4().hex
+        # True if another request held the lock when it was acquired
+        self.waited = False
+
+    @classmethod
+    def from_options(cls, session_id, options: dict):
+        options = dict(options)
+        if options.pop('policy') == 'reject':
+            options['wait'] = 0
+        return cls(session_id, **options)
+
+    def acquire(self) -> bool:
+        deadline = time.monotonic() + self.wait
+        while not self.cache.add(self.key, self.token, timeout=self.timeout):
+            self.waited = True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    async def aacquire(self) -> bool:
+        deadline = time.monotonic() + self.wait
+        while not await self.cache.aadd(self.key, self.token,
+                                        timeout=self.timeout):
+            self.waited = True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(self.poll_interval)
+        return True
+
+    def release(self):
+        if isinstance(self.cache, RedisCache):
+            self._compare_and_delete()
+        # the lease might have expired and been taken by another request
+        elif self.cache.get(self.key) == self.token:
+            self.cache.delete(self.key)
+
+    async def arelease(self):
+        if isinstance(self.cache, RedisCache):
+            await sync_to_async(self._compare_and_delete)()
+        elif await self.cache.aget(self.key) == self.token:
+            await self.cache.adelete(self.key)
+
+    def _compare_and_delete(self):
+        key = self.cache.make_and_validate_key(self.key)
+        client = self.cache._cache.get_client(key, write=True)
+        token = self.cache._cache._serializer.dumps(self.token)
+        client.eval(RELEASE_SCRIPT, 1, key, token)
@@ -0,0 +1,95 @@
+"""
+Tracks which session keys a request changed so that the session is only
+written when it has changed.
+
+The session is snapshotted when the request starts. On save each value is
+compared with the snapshot, which also catches values changed in place
+(e.g appending to a list in the session) that django's modified flag misses.
+
+Session stores that can update some keys without rewriting the whole
+session implement::
+
+    def save_delta(self, changed: dict, removed: set):
+        ...
+
+    async def asave_delta(self, changed: dict, removed: set):
+        ...
+
+and are sent only the keys that changed, other stores are saved in full.
+
+Volatile keys are rewritten by every request (e.g the last update time),
+they are not snapshotted and a request that only changes them doesn't save
+the session. They are saved with the other changes.
+"""
+import json
+
+
+def _dumps(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class SessionTracker(object):
+
+    def __init__(self, session, volatile_keys=()):
+        self.session = session
+        self.volatile_keys = frozenset(volatile_keys)
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self) -> dict:
+        return {key: _dumps(value) for key, value in self.session.items()
+                if key not in self.volatile_keys}
+
+    def _diff(self):
+        dumped = self.take_snapshot()
+        changed = {
+            key: self.session[key] for key, value in dumped.items()
+            if self.snapshot.get(key) != value
+        }
+        removed = set(self.snapshot) - set(dumped)
+        if changed or removed:
+            changed.update(
+                (key, self.session[key]) for key in self.volatile_keys
+                if key in self.session
+            )
+        return changed, removed, dumped
+
+    def changes(self):
+        """
+        Returns a tuple of (changed, removed), changed is a dict of the keys
+        added or updated since the snapshot and removed a set of the keys
+        deleted.
+        """
+        changed, removed, _ = self._diff()
+        return changed, removed
+
+    @property
+    def has_changed(self) -> bool:
+        changed, removed = self.changes()
+        return bool(changed or removed)
+
+    def save(self) -> bool:
+        """
+        Saves the session if it has changed, returns True if it was saved.
+        """
+        changed, removed, dumped = self._diff()
+        if not (changed or removed):
+            return False
+        save_delta = getattr(self.session, 'save_delta', None)
+        if save_delta is not None:
+            save_delta(changed, removed)
+        else:
+            self.session.save()
+        self.snapshot = dumped
+        return True
+
+    async def asave(self) -> bool:
+        changed, removed, dumped = self._diff()
+        if not (changed or removed):
+            return False
+        asave_delta = getattr(self.session, 'asave_delta', None)
+        if asave_delta is not None:
+            await asave_delta(changed, removed)
+        else:
+            await self.session.asave()
+        self.snapshot = dumped
+        return True
@@ -1,12 +1,33 @@
 from celery import current_app as app
-import requests
 from structlog import get_logger
 from celery.exceptions import MaxRetriesExceededError
+from ussd import http_client, http_cache
 
 
 @app.task(bind=True)
 def http_task(self, request_conf):
-    requests.request(**request_conf)
+    http_client.request(**request_conf)
+
+
+@app.task(bind=True)
+def refresh_http_cache(self, cache_key, request_conf, cache_conf):
+    # to avoid circular import
+    from ussd.core import UssdHandlerAbstract
+
+    cache_alias = cache_conf.get('cache_alias', 'default')
+    try:
+        response = http_client.request(**request_conf)
+        if response.status_code < 400:
+            http_cache.set_response(
+                cache_key,
+                UssdHandlerAbstract.get_variables_from_response_obj(response),
+                ttl=cache_conf['ttl'],
+                stale_while_revalidate=cache_conf.get(
+                    'stale_while_revalidate', 0),
+                cache_alias=cache_alias
+            )
+    finally:
+        http_cache.release_refresh(cache_key, cache_alias=cache_alias)
 
 
 @app.task(bind=True)
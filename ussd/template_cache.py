@@ -0,0 +1,125 @@
+"""
+Bounded cache of compiled jinja templates and expressions.
+
+Screen texts, router expressions and validator expressions are the same
+for every request, compiling them once avoids re-parsing them on every
+hop.
+"""
+import threading
+from collections import OrderedDict, ChainMap
+from jinja2 import TemplateSyntaxError, Undefined
+
+
+class _CompileError(object):
+    def __init__(self, error):
+        self.error = error
+
+
+class TemplateCache(object):
+    """
+    Thread safe LRU cache of compiled templates keyed by their source.
+
+    :param environment: jinja environment used to compile sources
+    :param maxsize: number of compiled sources to keep, least recently
+        used ones are evicted.
+    """
+
+    def __init__(self, environment, maxsize=1000):
+        self.environment = environment
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_template(self, source: str):
+        return self._get(('template', source),
+                         self.environment.from_string, source)
+
+    def get_expression(self, source: str):
+        return self._get(('expression', source),
+                         self.environment.compile_expression, source)
+
+    def _get(self, key, compile_source, source):
+        with self._lock:
+            compiled = self._cache.get(key)
+            if compiled is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if compiled is None:
+            # compile outside the lock, two threads compiling the same
+            # source at the same time is harmless.
+            try:
+                compiled = compile_source(source)
+            except TemplateSyntaxError as e:
+                # remember invalid sources too, they are usually
+                # evaluated again with a fallback on every request.
+                compiled = _CompileError(e)
+            self._set(key, compiled)
+
+        if isinstance(compiled, _CompileError):
+            raise compiled.error
+        return compiled
+
+    def _set(self, key, compiled):
+        with self._lock:
+            self._cache[key] = compiled
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                size=len(self._cache),
+                maxsize=self.maxsize
+            )
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+
+def render(template, context) -> str:
+    """
+    Renders a compiled template resolving variables against context.
+
+    Unlike Template.render the context is not copied into a new dict,
+    it can be any mapping, e.g a ChainMap of the session and request
+    variables.
+    """
+    ctx = template.new_context(ChainMap(context, template.globals),
+                               shared=True)
+    try:
+        return template.environment.concat(template.root_render_func(ctx))
+    except Exception:
+        template.environment.handle_exception()
+
+
+def evaluate(expression, context):
+    """
+    Evaluates a compiled expression against context without copying it.
+
+    Same as calling the TemplateExpression but with a shared context.
+    """
+    template = expression._template
+    ctx = template.new_context(ChainMap(context, template.globals),
+                               shared=True)
+    for _ in template.root_render_func(ctx):
+        pass
+    result = ctx.vars['result']
+    if expression._undefined_to_none and isinstance(result, Undefined):
+        result = None
+    return result
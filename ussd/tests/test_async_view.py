@@ -0,0 +1,110 @@
+import asyncio
+import uuid
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.http.response import JsonResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ussd.core import aussd_session, ussd_session, UssdRequest, \
+    AsyncUssdView
+
+
+@override_settings(
+    CELERY_EAGER_PROPAGATES_EXCEPTIONS=True,
+    CELERY_ALWAYS_EAGER=True,
+    BROKER_BACKEND='memory'
+)
+class TestAsyncUssdView(TestCase):
+
+    @staticmethod
+    def payload(session_id, ussd_input, journey):
+        return {
+            "sessionId": session_id,
+            "text": ussd_input,
+            "phoneNumber": "200",
+            "serviceCode": "test",
+            "language": "en",
+            "customer_journey_conf": journey
+        }
+
+    def sync_responses(self, journey, inputs):
+        session_id = str(uuid.uuid4())
+        return [
+            self.client.post(reverse('africastalking_url'),
+                             self.payload(session_id, i, journey)
+                             ).content.decode()
+            for i in inputs
+        ]
+
+    async def async_responses(self, journey, inputs):
+        session_id = str(uuid.uuid4())
+        responses = []
+        for i in inputs:
+            response = await self.async_client.post(
+                reverse('async_africastalking_url'),
+                self.payload(session_id, i, journey))
+            responses.append(response.content.decode())
+        return session_id, responses
+
+    async def test_same_responses_as_sync_view(self):
+        for journey, inputs, history in (
+                ("valid_menu_screen_conf.yml", ['', '5', '98', '00'], 4),
+                # the invalid input doesn't change the session, it's not
+                # saved
+                ("valid_input_screen_conf.yml", ['', 'mwas', '1'], 2),
+                # function screens run in a thread
+                ("valid_function_screen_conf.yml", ['', '10', '1'], 3)
+        ):
+            expected = await sync_to_async(self.sync_responses)(
+                journey, inputs)
+            session_id, responses = await self.async_responses(journey,
+                                                               inputs)
+            self.assertEqual(expected, responses, journey)
+            self.assertNotIn("An internal error occurred.", responses)
+
+            session = await aussd_session(session_id)
+            self.assertEqual(history,
+                             len(await session.aget('ussd_interaction')))
+
+    @mock.patch("ussd.http_client.request")
+    async def test_http_screen(self, mock_request):
+        mock_request.return_value = JsonResponse({"balance": 250})
+
+        _, responses = await self.async_responses(
+            "valid_http_screen_conf.yml", [''])
+        self.assertEqual(
+            "Testing response is being saved in "
+            "session status code is 200 and "
+            "balance is 250 and full content {'balance': 250}.\n",
+            responses[0]
+        )
+
+    async def test_create_request(self):
+        ussd_request = await UssdRequest.acreate(
+            session_id="1234", phone_number="200", ussd_input="",
+            language="en")
+        self.assertEqual("ssss1234", ussd_request.session_id)
+        ussd_request.session['name'] = 'mwas'
+        await ussd_request.session.asave()
+
+        session = await sync_to_async(ussd_session)("ssss1234")
+        self.assertEqual('mwas', session['name'])
+
+    async def test_initial_is_not_run_in_event_loop(self):
+        ussd_initial = AsyncUssdView.ussd_initial
+        in_event_loop = []
+
+        def check_thread(view, request):
+            try:
+                asyncio.get_running_loop()
+                in_event_loop.append(True)
+            except RuntimeError:
+                in_event_loop.append(False)
+            return ussd_initial(view, request)
+
+        with mock.patch.object(AsyncUssdView, 'ussd_initial', autospec=True,
+                               side_effect=check_thread):
+            _, responses = await self.async_responses(
+                "valid_input_screen_conf.yml", [''])
+        self.assertEqual(["Enter your height\n"], responses)
+        self.assertEqual([False], in_event_loop)
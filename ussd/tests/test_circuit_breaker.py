@@ -0,0 +1,72 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from ussd.circuit_breaker import CircuitBreaker, CircuitOpen, \
+    get_breaker_options
+
+
+class TestCircuitBreaker(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker("wallet", minimum_calls=4,
+                                      failure_threshold=0.5,
+                                      recovery_timeout=30)
+
+    def test_opens_on_failure_rate(self):
+        self.breaker.record_success()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        # not enough calls yet
+        self.assertEqual('closed', self.breaker.state)
+
+        self.breaker.record_failure()
+        self.assertEqual('open', self.breaker.state)
+        self.assertRaises(CircuitOpen, self.breaker.before_call)
+
+        # state is shared by breakers with the same name
+        self.assertEqual('open', CircuitBreaker("wallet").state)
+        self.assertEqual('closed', CircuitBreaker("tariffs").state)
+
+    def test_slow_calls_are_failures(self):
+        breaker = CircuitBreaker("wallet", minimum_calls=2,
+                                 slow_call_duration=1)
+        breaker.record_success(duration=0.5)
+        breaker.record_success(duration=2)
+        self.assertEqual('open', breaker.state)
+
+    @mock.patch("ussd.circuit_breaker.time.time")
+    def test_half_open(self, mock_time):
+        mock_time.return_value = 1000
+        self.breaker.open()
+        self.assertEqual('open', self.breaker.state)
+
+        mock_time.return_value = 1031
+        self.assertEqual('half_open', self.breaker.state)
+
+        # only one probe is allowed
+        self.breaker.before_call()
+        self.assertRaises(CircuitOpen, self.breaker.before_call)
+
+        # probe failed
+        self.breaker.record_failure()
+        self.assertEqual('open', self.breaker.state)
+
+        mock_time.return_value = 1062
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual('closed', self.breaker.state)
+        self.breaker.before_call()
+
+    @override_settings(USSD_CIRCUIT_BREAKER={"minimum_calls": 1})
+    def test_options(self):
+        self.assertEqual(1, get_breaker_options()['minimum_calls'])
+        self.assertEqual(
+            5, get_breaker_options({"minimum_calls": 5})['minimum_calls'])
+        self.assertFalse(get_breaker_options()['enabled'])
+
+    def test_unknown_options(self):
+        self.assertRaises(ValueError, get_breaker_options,
+                          {"failure_treshold": 0.1})
+        with override_settings(USSD_CIRCUIT_BREAKER={"windw": 10}):
+            self.assertRaises(ValueError, get_breaker_options)
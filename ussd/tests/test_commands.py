@@ -78,4 +78,61 @@ class ValidateCustomerJourneyConfig(TestCase):
     def test_called_with_invalid_file_path(self):
         out = StringIO()
 
-        self.assertRaises(CommandError, call_command, 'validate_ussd_journey', 'invalid_path', stdout=out)
\ No newline at end of file
+        self.assertRaises(CommandError, call_command, 'validate_ussd_journey', 'invalid_path', stdout=out)
+
+class WarmUssdJourneys(TestCase):
+
+    def test_command_output(self):
+        out = StringIO()
+        file_name = "{0}/valid_input_screen_conf.yml".format(path)
+        call_command('warm_ussd_journeys', '--journey', file_name,
+                     'warm_up_input_screen', stdout=out)
+
+        report = json.loads(out.getvalue())['warm_up_input_screen']
+        self.assertTrue(report['valid'])
+        self.assertEqual(file_name, report['file'])
+        self.assertEqual({'load', 'compile', 'validate'},
+                         set(report['timings']))
+
+    def testing_invalid_ussd_journey(self):
+        out = StringIO()
+        file_name = "{0}/invalid_quit_screen_conf.yml".format(path)
+        self.assertRaises(CommandError, call_command, 'warm_ussd_journeys',
+                          '--journey', file_name, 'warm_up_invalid',
+                          stdout=out)
+
+    def test_views_journeys_are_discovered(self):
+        from ussd.core import UssdView
+        from ussd.warm_up import get_journeys
+
+        file_name = "{0}/valid_quit_screen_conf.yml".format(path)
+
+        class WarmUpView(UssdView):
+            customer_journey_conf = file_name
+            customer_journey_namespace = "warm_up_view"
+
+        self.assertIn((file_name, "warm_up_view"), get_journeys())
+
+
+class AnalyzeUssdJourney(TestCase):
+
+    def test_command_output(self):
+        out = StringIO()
+        file_name = "{0}/valid_update_session_screen_conf.yml".format(path)
+        call_command('analyze_ussd_journey', file_name, stdout=out)
+
+        report = json.loads(out.getvalue())[file_name]
+        self.assertEqual([], report['unreachable'])
+        self.assertEqual({}, report['dangling'])
+        self.assertEqual([], report['forwarding_cycles'])
+        self.assertEqual(3, report['max_depth']['initial_screen'])
+
+    def test_missing_next_screens(self):
+        out = StringIO()
+        file_name = "{0}/invalid_menu_screen_conf.yml".format(path)
+        self.assertRaises(CommandError, call_command, 'analyze_ussd_journey',
+                          file_name, stdout=out)
+
+        report = json.loads(out.getvalue())[file_name]
+        self.assertEqual({"types_of_fruit": ["invalid_screen"]},
+                         report['dangling'])
@@ -1,8 +1,11 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from ussd.core import _registered_ussd_handlers, \
     UssdHandlerAbstract, MissingAttribute, \
     InvalidAttribute, UssdRequest, ussd_session, UssdView, \
-    convert_error_response_to_mermaid_error
+    convert_error_response_to_mermaid_error, load_yaml, \
+    compile_journey, get_compiled_journey
+from ussd.screens.input_screen import InputScreen
+from ussd.tests.sample_screen_definition import path
 from rest_framework import serializers
 from ussd.tests import UssdTestCase
 from freezegun import freeze_time
@@ -11,6 +14,16 @@ import time
 from ussd import defaults as ussd_airflow_variables
 from ussd.utilities import datetime_to_string, string_to_datetime
 from collections import OrderedDict
+from ussd.models import SessionLookup
+from django.db import connection
+from unittest import mock
+import hashlib
+
+interaction_records = []
+
+
+def interaction_sink(record):
+    interaction_records.append(record)
 
 
 class SampleSerializer(serializers.Serializer):
@@ -259,6 +272,59 @@ class TestInheritance(UssdTestCase.BaseUssdTestCase):
             expected_screen_interaction
         )
 
+    @freeze_time(datetime.now())
+    @override_settings(
+        USSD_INTERACTION_HISTORY={"max_length": 2, "screen_text": "hash",
+                                  "timestamps": "epoch"},
+        USSD_INTERACTION_SINK="ussd.tests.test_core_functionaliyt."
+                              "interaction_sink"
+    )
+    def test_compact_steps_recording(self):
+        del interaction_records[:]
+        ussd_client = self.get_client()
+
+        for ussd_input in ('', 'Francis', 'Mwangi'):
+            ussd_client.send(ussd_input)
+
+        now = int(datetime.now().timestamp() * 1000)
+        session = ussd_session(ussd_client.session_id)
+        self.assertEqual(
+            [
+                {
+                    "screen_name": "screen_two",
+                    "screen_text": hashlib.sha1(
+                        b"Enter anything\n").hexdigest(),
+                    "input": "Mwangi",
+                    "start_time": now,
+                    "end_time": now,
+                    "duration": 0.0
+                },
+                {
+                    "screen_name": "screen_three",
+                    "screen_text": hashlib.sha1(
+                        b"First input was Francis and second input was "
+                        b"Mwangi\n1. Continue\n").hexdigest(),
+                    "input": "",
+                    "start_time": now
+                }
+            ],
+            session['ussd_interaction']
+        )
+
+        # the sink gets the full records
+        self.assertEqual(
+            ['', 'Francis', 'Mwangi'],
+            [record['input'] for record in interaction_records]
+        )
+        self.assertEqual(
+            "First input was Francis and second input was Mwangi\n"
+            "1. Continue\n",
+            interaction_records[-1]['screen_text']
+        )
+        self.assertEqual(ussd_client.session_id,
+                         interaction_records[-1]['session_id'])
+        self.assertTrue(interaction_records[-1]['status'])
+
     def testing_valid_customer_journey(self):
         self._test_ussd_validation(
             'sample_using_inheritance.yml',
@@ -270,6 +336,55 @@ class TestInheritance(UssdTestCase.BaseUssdTestCase):
         pass
 
 
+class TestCompiledJourney(TestCase):
+
+    def setUp(self):
+        self.namespace = "compiled_journey_inheritance"
+        load_yaml(path + '/sample_using_inheritance.yml', self.namespace)
+
+    def test_inheritance_is_resolved(self):
+        journey = get_compiled_journey(self.namespace)
+
+        screen_two = journey.get_screen("screen_two")
+        self.assertEqual("input_screen", screen_two.screen_type)
+        self.assertIs(InputScreen, screen_two.get_handler())
+        self.assertEqual("Enter anything", screen_two.content['text'])
+        self.assertEqual("two", screen_two.content['input_identifier'])
+        self.assertEqual(frozenset(["screen_three"]), screen_two.next_screens)
+
+        self.assertEqual(frozenset(["screen_five", "screen_three"]),
+                         journey.get_next_screens("screen_four"))
+        self.assertEqual({"initial_screen": "screen_one"},
+                         journey.initial_screen)
+
+    def test_journey_is_compiled_once_per_namespace(self):
+        journey = get_compiled_journey(self.namespace)
+        self.assertIs(journey, get_compiled_journey(self.namespace))
+
+        # reloading the namespace compiles it again
+        load_yaml(path + '/sample_using_inheritance.yml', self.namespace)
+        self.assertIsNot(journey, get_compiled_journey(self.namespace))
+
+    def test_journey_is_immutable(self):
+        journey = get_compiled_journey(self.namespace)
+
+        with self.assertRaises(TypeError):
+            journey.screens["screen_six"] = None
+        self.assertRaises(AttributeError, setattr, journey, "screens", {})
+        self.assertRaises(InvalidAttribute, journey.get_screen, "missing")
+
+    def test_inheritance_cycle(self):
+        self.assertRaises(
+            InvalidAttribute,
+            compile_journey,
+            {
+                "initial_screen": "screen_one",
+                "screen_one": {"inherit": "screen_two"},
+                "screen_two": {"inherit": "screen_one"}
+            }
+        )
+
+
 class TestSessionManagement(UssdTestCase.BaseUssdTestCase):
     validate_ussd = False
 
@@ -305,7 +420,7 @@ class TestSessionManagement(UssdTestCase.BaseUssdTestCase):
                             )
 
     def test_session_expiry_using_inactivity(self):
-        # Test session expiry is using last time session was updated
+        # Test session expiry is using the last request not creation time
         phone_number = '201'
         req = self._create_ussd_request(phone_number)
 
@@ -317,24 +432,16 @@ class TestSessionManagement(UssdTestCase.BaseUssdTestCase):
             self._create_ussd_request(phone_number).session_id
         )
 
-        # make a change in session
-        req = self._create_ussd_request(phone_number)
-        req.session['name'] = 'mwas'
-        req.session[ussd_airflow_variables.last_update] = datetime_to_string(
-            datetime.now())
-        req.session.save()
-
         time.sleep(0.8)
 
         # confirm even after the session was created 1.6 sec ago hasn't
         # been closed
-
         self.assertEqual(
             req.session_id,
             self._create_ussd_request(phone_number).session_id
         )
 
-        time.sleep(0.3)
+        time.sleep(1.1)
 
         # test now the session has been closed
         self.assertNotEqual(
@@ -342,6 +449,49 @@ class TestSessionManagement(UssdTestCase.BaseUssdTestCase):
             self._create_ussd_request(phone_number).session_id
         )
 
+    def test_session_lookup_is_one_query(self):
+        phone_number = '202'
+        with self.assertNumQueries(1):
+            session_id = SessionLookup.objects.resolve(
+                phone_number, "new_session_one", 180)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                session_id,
+                SessionLookup.objects.resolve(
+                    phone_number, "new_session_two", 180)
+            )
+
+        SessionLookup.objects.close(phone_number, session_id)
+        self.assertEqual(
+            "new_session_three",
+            SessionLookup.objects.resolve(
+                phone_number, "new_session_three", 180)
+        )
+        self.assertEqual(1, SessionLookup.objects.filter(
+            user_id=phone_number).count())
+
+    def test_session_lookup_without_returning(self):
+        # e.g sqlite before 3.35
+        phone_number = '203'
+        with mock.patch.object(connection.features,
+                               'can_return_columns_from_insert', False), \
+                mock.patch.object(SessionLookup.objects, '_upsert') as \
+                mock_upsert:
+            session_id = SessionLookup.objects.resolve(
+                phone_number, "new_session_one", 180)
+            self.assertEqual(
+                session_id,
+                SessionLookup.objects.resolve(
+                    phone_number, "new_session_two", 180)
+            )
+            SessionLookup.objects.close(phone_number, session_id)
+            self.assertEqual(
+                "new_session_three",
+                SessionLookup.objects.resolve(
+                    phone_number, "new_session_three", 180)
+            )
+        mock_upsert.assert_not_called()
+
     def test_quit_screen_terminates_session(self):
 
         ussd_client = self.get_client()
@@ -0,0 +1,107 @@
+import uuid
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ussd.forwarding_limit import ForwardingLimit, ForwardingLimitExceeded, \
+    get_forwarding_limit_options
+
+
+def forwarding_limit_metric(error):
+    forwarding_limit_metric.errors.append(error)
+
+
+forwarding_limit_metric.errors = []
+
+
+class TestForwardingLimit(TestCase):
+
+    def test_max_hops(self):
+        forwarding_limit = ForwardingLimit(namespace="journey", max_hops=2)
+        # the first screen isn't a hop
+        for screen in ("screen_one", "screen_two", "screen_three"):
+            forwarding_limit.check(screen)
+
+        with self.assertRaises(ForwardingLimitExceeded) as context:
+            forwarding_limit.check("screen_four")
+        self.assertEqual(dict(
+            namespace="journey",
+            screen="screen_four",
+            hops=3,
+            elapsed=context.exception.elapsed,
+            recent_screens=["screen_one", "screen_two", "screen_three",
+                            "screen_four"]
+        ), context.exception.as_dict())
+
+    def test_max_time(self):
+        forwarding_limit = ForwardingLimit(max_hops=None, max_time=5)
+        forwarding_limit.check("screen_one")
+        forwarding_limit.started_at -= 6
+        self.assertRaises(ForwardingLimitExceeded, forwarding_limit.check,
+                          "screen_two")
+
+    @override_settings(USSD_FORWARDING_LIMIT={"max_hops": 0})
+    def test_invalid_options(self):
+        self.assertRaises(ValueError, get_forwarding_limit_options)
+
+
+@override_settings(
+    CELERY_EAGER_PROPAGATES_EXCEPTIONS=True,
+    CELERY_ALWAYS_EAGER=True,
+    BROKER_BACKEND='memory'
+)
+class TestForwardingLimitDispatch(TestCase):
+
+    def setUp(self):
+        forwarding_limit_metric.errors = []
+
+    def send(self, url_name='africastalking_url'):
+        return self.client.post(reverse(url_name), {
+            "sessionId": str(uuid.uuid4()),
+            "text": "",
+            "phoneNumber": "200",
+            "serviceCode": "test",
+            "language": "en",
+            "customer_journey_conf": "forwarding_loop_conf.yml"
+        }).content.decode()
+
+    def test_within_limit(self):
+        # initial_screen -> (count_hops -> check_hops) x 3 -> enough_hops
+        with override_settings(USSD_FORWARDING_LIMIT={"max_hops": 7}):
+            self.assertEqual("Hops 3", self.send())
+
+    @override_settings(USSD_FORWARDING_LIMIT={
+        "max_hops": 6,
+        "metric": "ussd.tests.test_forwarding_limit.forwarding_limit_metric"
+    })
+    def test_max_hops_exceeded(self):
+        self.assertEqual("An internal error occurred.", self.send())
+
+        error, = forwarding_limit_metric.errors
+        self.assertEqual("enough_hops", error.screen)
+        self.assertEqual(7, error.hops)
+        self.assertEqual("forwarding_loop_conf", error.namespace)
+
+    @override_settings(USSD_FORWARDING_LIMIT={"max_hops": 6,
+                                              "error_screen": "loop_error"})
+    def test_error_screen(self):
+        for url_name in ('africastalking_url', 'async_africastalking_url'):
+            self.assertEqual(
+                "Service unavailable, please try again later.",
+                self.send(url_name))
+
+    @override_settings(USSD_FORWARDING_LIMIT={
+        "max_hops": 2,
+        "error_screen": "forwarding_error",
+        "metric": "ussd.tests.test_forwarding_limit.forwarding_limit_metric"
+    })
+    def test_error_screen_forwarding(self):
+        self.assertEqual("An internal error occurred.", self.send())
+        self.assertEqual(["count_hops", "count_hops"], [
+            error.screen for error in forwarding_limit_metric.errors])
+
+    @override_settings(USSD_FORWARDING_LIMIT={"max_hops": None,
+                                              "max_time": 1})
+    def test_max_time_exceeded(self):
+        with mock.patch('ussd.forwarding_limit.time.monotonic',
+                        side_effect=range(0, 100, 2)):
+            self.assertEqual("An internal error occurred.", self.send())
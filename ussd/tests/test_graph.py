@@ -1,5 +1,46 @@
 from django.test import TestCase
+from ussd.core import render_journey_as_graph, render_journey_as_mermaid_text
+
+
+def menu(text, *next_screens):
+    return {
+        "type": "menu_screen",
+        "text": text,
+        "options": [{"text": next_screen, "next_screen": next_screen}
+                    for next_screen in next_screens]
+    }
 
 
 class TestingGraph(TestCase):
-    pass
\ No newline at end of file
+
+    def test_long_journeys(self):
+        # screens are rendered without recursion
+        journey = {"initial_screen": {"type": "initial_screen",
+                                      "next_screen": "menu_0"}}
+        for i in range(3000):
+            journey["menu_{}".format(i)] = menu(
+                "Menu {}".format(i), "menu_{}".format(i + 1), "menu_0")
+        journey["menu_3000"] = {"type": "quit_screen", "text": "Goodbye"}
+
+        graph = render_journey_as_graph(journey)
+        self.assertEqual(3002, len(graph.vertices))
+        self.assertEqual(6001, len(graph.get_edges()))
+
+    def test_mermaid_text(self):
+        journey = {
+            "initial_screen": {"type": "initial_screen",
+                               "next_screen": "main_menu"},
+            "main_menu": menu("Main", "balance", "main_menu"),
+            "balance": {"inherit": "main_menu", "text": "Balance"},
+        }
+        self.assertEqual(
+            'graph TD\n'
+            'initial_screen ==> main_menu["Main<br>1. balance'
+            '<br>2. main_menu<br>"]\n'
+            'main_menu =="balance"==> balance["Balance<br>1. balance'
+            '<br>2. main_menu<br>"]\n'
+            'main_menu =="main_menu"==> main_menu\n'
+            'balance =="balance"==> balance\n'
+            'balance =="main_menu"==> main_menu\n',
+            render_journey_as_mermaid_text(journey)
+        )
@@ -0,0 +1,105 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+from django.test import TestCase, override_settings
+from ussd import http_client
+
+
+class CookieHandler(BaseHTTPRequestHandler):
+    # sets the cookie in the query and responds with the cookies received
+
+    def do_GET(self):
+        body = (self.headers.get('Cookie') or '').encode()
+        self.send_response(200)
+        if '?' in self.path:
+            self.send_header('Set-Cookie', self.path.split('?', 1)[1])
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpClient(TestCase):
+
+    def setUp(self):
+        http_client.close()
+
+    def tearDown(self):
+        http_client.close()
+
+    @mock.patch("requests.Session.request", autospec=True)
+    def test_connections_are_pooled(self, mock_request):
+        http_client.request(method="get", url="http://localhost/one")
+        http_client.request(method="post", url="http://localhost/two",
+                            timeout=2)
+
+        # the same session is used for both requests
+        sessions = {call[0][0] for call in mock_request.call_args_list}
+        self.assertEqual(1, len(sessions))
+        self.assertIs(http_client.get_session(http_client.get_client_options()),
+                      mock_request.call_args_list[0][0][0])
+
+        # default timeout is only used if the request has none
+        self.assertEqual(30, mock_request.call_args_list[0][1]['timeout'])
+        self.assertEqual(2, mock_request.call_args_list[1][1]['timeout'])
+
+    @override_settings(USSD_HTTP_CLIENT={"pool_maxsize": 20, "timeout": 10})
+    def test_settings(self):
+        options = http_client.get_client_options()
+        self.assertEqual(20, options['pool_maxsize'])
+        self.assertEqual(10, options['timeout'])
+
+        session = http_client.get_session(options)
+        adapter = session.get_adapter("https://wallet")
+        self.assertEqual(20, adapter._pool_maxsize)
+
+    @mock.patch("requests.Session.request", autospec=True)
+    def test_journey_options(self, mock_request):
+        http_client.request(method="get", url="http://localhost/one")
+        http_client.request(
+            method="get", url="http://localhost/one",
+            http_client=dict(timeout=5, max_retries=2)
+        )
+
+        default_call, journey_call = mock_request.call_args_list
+        self.assertNotIn('http_client', journey_call[1])
+        self.assertEqual(5, journey_call[1]['timeout'])
+
+        # retry options need their own pool
+        self.assertIsNot(default_call[0][0], journey_call[0][0])
+        self.assertEqual(
+            2,
+            journey_call[0][0].get_adapter("http://localhost")
+            .max_retries.total
+        )
+
+        # timeout alone doesn't need a new pool
+        http_client.request(method="get", url="http://localhost/one",
+                            http_client=dict(timeout=1))
+        self.assertIs(default_call[0][0], mock_request.call_args[0][0])
+
+    def test_unknown_options(self):
+        self.assertRaises(ValueError, http_client.request,
+                          method="get", url="http://localhost",
+                          http_client=dict(pool_size=1))
+
+    def test_cookies_are_not_kept(self):
+        server = HTTPServer(('127.0.0.1', 0), CookieHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = "http://127.0.0.1:{}/".format(server.server_port)
+
+        # subscriber A's request
+        http_client.request(method="get", url=url + "?auth=subscriber_a")
+        # subscriber B's request
+        self.assertEqual(
+            "", http_client.request(method="get", url=url).text)
+        # cookies of the request are still sent
+        self.assertEqual(
+            "auth=subscriber_b",
+            http_client.request(method="get", url=url,
+                                cookies={"auth": "subscriber_b"}).text
+        )
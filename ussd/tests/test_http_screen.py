@@ -2,6 +2,13 @@ from ussd.tests import UssdTestCase
 from unittest import mock
 from django.http.response import JsonResponse, HttpResponse
 from django.test.utils import override_settings
+from django.core.cache import cache
+import requests
+import time
+from ussd import http_cache
+from ussd.circuit_breaker import CircuitBreaker
+from ussd.core import ussd_session
+from ussd.screens.initial_screen import InitialScreen
 
 
 @override_settings(
@@ -24,10 +31,22 @@ class TestHttpScreen(UssdTestCase.BaseUssdTestCase):
         ),
         http_screen_invalid_synchronous=dict(
             synchronous=['"not boolean" is not a valid boolean.']
+        ),
+        http_screen_invalid_cache=dict(
+            cache=['Only get requests can be cached']
+        ),
+        http_screen_invalid_http_client=dict(
+            on_failure=['missing_screen is missing in ussd journey'],
+            http_request=dict(
+                http_client=dict(
+                    max_retries=[
+                        'Ensure this value is greater than or equal to 0.']
+                )
+            )
         )
     )
 
-    @mock.patch("ussd.core.requests.request")
+    @mock.patch("ussd.http_client.request")
     def test(self, mock_request):
         mock_response = JsonResponse({"balance": 250})
         mock_request.return_value = mock_response
@@ -53,7 +72,8 @@ class TestHttpScreen(UssdTestCase.BaseUssdTestCase):
             ),
             mock.call(
                 method="get",
-                url="http://localhost:8000/mock/balance/200/"
+                url="http://localhost:8000/mock/balance/200/",
+                http_client=dict(timeout=5, max_retries=2)
             ),
             mock.call(
                 method='post',
@@ -71,7 +91,7 @@ class TestHttpScreen(UssdTestCase.BaseUssdTestCase):
         mock_request.assert_has_calls(expected_calls)
 
     @mock.patch("ussd.screens.http_screen.http_task")
-    @mock.patch("ussd.tasks.requests.request")
+    @mock.patch("ussd.http_client.request")
     def test_async_workflow(self, mock_request, mock_http_task):
         mock_response = JsonResponse({"balance": 257})
         mock_request.return_value = mock_response
@@ -89,7 +109,7 @@ class TestHttpScreen(UssdTestCase.BaseUssdTestCase):
             )
         )
 
-    @mock.patch("ussd.core.requests.request")
+    @mock.patch("ussd.http_client.request")
     def test_json_decoding(self, mock_request):
         mock_response = HttpResponse("Balance is 257")
         mock_request.return_value = mock_response
@@ -104,4 +124,184 @@ class TestHttpScreen(UssdTestCase.BaseUssdTestCase):
             ussd_client.send('')
         )
 
+    @override_settings(USSD_REQUEST_BUDGET=2)
+    @mock.patch("ussd.http_client.request")
+    def test_timeout_is_limited_by_request_budget(self, mock_request):
+        mock_request.return_value = JsonResponse({"balance": 250})
+
+        ussd_client = self.ussd_client()
+        ussd_client.send('')
+
+        # the last request is made asynchronously, outside the budget
+        synchronous_calls = mock_request.call_args_list[:3]
+        self.assertEqual(4, mock_request.call_count)
+        self.assertNotIn('timeout', mock_request.call_args_list[3][1])
+        for call in synchronous_calls:
+            self.assertLessEqual(call[1]['timeout'], 2)
+
+    @override_settings(USSD_REQUEST_BUDGET=2)
+    @mock.patch("ussd.http_client.request")
+    def test_deadline_exceeded(self, mock_request):
+        mock_request.side_effect = requests.Timeout("read timed out")
+
+        ussd_client = self.ussd_client()
+
+        self.assertEqual(
+            "Service is busy, try again later.",
+            ussd_client.send('')
+        )
+
+    @override_settings(USSD_REQUEST_BUDGET=0.000001)
+    @mock.patch("ussd.http_client.request")
+    def test_budget_exhausted_before_request(self, mock_request):
+        ussd_client = self.ussd_client()
+
+        self.assertEqual(
+            "Service is busy, try again later.",
+            ussd_client.send('')
+        )
+        self.assertFalse(mock_request.called)
+
+    @override_settings(USSD_REQUEST_BUDGET=2)
+    def test_deadline_exceeded_on_deadline_exceeded_screen(self):
+        def handle(screen):
+            # the budget runs out once the journey has been routed to the
+            # deadline_exceeded_screen
+            screen.ussd_request.deadline = time.monotonic()
+            return screen.ussd_request.forward("http_deadline_exceeded")
+
+        ussd_client = self.ussd_client()
+        with mock.patch.object(InitialScreen, 'handle', autospec=True,
+                               side_effect=handle):
+            self.assertEqual(
+                "Service is busy, try again later.",
+                ussd_client.send('')
+            )
+
+    @mock.patch("ussd.http_client.request")
+    def test_timeout_without_budget(self, mock_request):
+        mock_request.side_effect = requests.Timeout("read timed out")
+
+        ussd_client = self.ussd_client()
+
+        self.assertNotEqual(
+            "Service is busy, try again later.",
+            ussd_client.send('')
+        )
+
+    def failure_journey_client(self):
+        return self.ussd_client(
+            generate_customer_journey=False,
+            extra_payload={
+                "customer_journey_conf": "http_screen_failure_conf.yml"
+            }
+        )
+
+    @mock.patch("ussd.http_client.request")
+    def test_on_failure(self, mock_request):
+        cache.clear()
+        mock_request.side_effect = requests.ConnectionError("refused")
+
+        self.assertEqual("Service unavailable",
+                         self.failure_journey_client().send(''))
+
+    @override_settings(USSD_REQUEST_BUDGET=2)
+    @mock.patch("ussd.http_client.request")
+    def test_deadline_timeouts_are_not_failures(self, mock_request):
+        cache.clear()
+        mock_request.side_effect = requests.Timeout("read timed out")
+
+        # the timeout was capped by the request budget
+        for _ in range(2):
+            self.failure_journey_client().send('')
+        self.assertEqual('closed', CircuitBreaker("wallet").state)
+
+    @mock.patch("ussd.http_client.request")
+    def test_circuit_open(self, mock_request):
+        cache.clear()
+        mock_request.side_effect = requests.ConnectionError("refused")
+
+        for _ in range(2):
+            self.assertEqual("Service unavailable",
+                             self.failure_journey_client().send(''))
+
+        # the circuit is open, the backend is not called
+        self.assertEqual("Service unavailable, try again later",
+                         self.failure_journey_client().send(''))
+        self.assertEqual(2, mock_request.call_count)
+
+    @mock.patch("ussd.http_client.request")
+    def test_server_errors_open_the_circuit(self, mock_request):
+        cache.clear()
+        mock_request.return_value = JsonResponse({"balance": 0}, status=503)
+
+        for _ in range(2):
+            self.assertEqual("Your balance is 0",
+                             self.failure_journey_client().send(''))
+        self.assertEqual("Service unavailable, try again later",
+                         self.failure_journey_client().send(''))
+
+    def cache_journey_client(self, **kwargs):
+        return self.ussd_client(
+            generate_customer_journey=False,
+            extra_payload={
+                "customer_journey_conf": "http_screen_cache_conf.yml"
+            },
+            **kwargs
+        )
+
+    @staticmethod
+    def mock_backend(url, **kwargs):
+        if url.endswith('products'):
+            return JsonResponse({"name": "bundle"})
+        return JsonResponse({"price": 10})
+
+    @mock.patch("ussd.http_client.request")
+    def test_responses_are_cached(self, mock_request):
+        cache.clear()
+        mock_request.side_effect = self.mock_backend
+
+        for _ in range(2):
+            self.assertEqual("bundle costs 10",
+                             self.cache_journey_client().send(''))
+        self.assertEqual(2, mock_request.call_count)
+
+        # cached response is saved in session like a fresh one
+        ussd_client = self.cache_journey_client()
+        ussd_client.send('')
+        products = ussd_session(ussd_client.session_id)['products']
+        self.assertEqual(200, products['status_code'])
+        self.assertEqual({"name": "bundle"}, products['content'])
+
+        # the key is rendered with the session
+        self.cache_journey_client(language='sw').send('')
+        self.assertEqual(3, mock_request.call_count)
+
+    @mock.patch("ussd.http_client.request")
+    def test_errors_are_not_cached(self, mock_request):
+        cache.clear()
+        mock_request.return_value = JsonResponse({"name": "none"},
+                                                 status=500)
+
+        self.cache_journey_client().send('')
+        self.cache_journey_client().send('')
+        self.assertEqual(4, mock_request.call_count)
+
+    @mock.patch("ussd.http_client.request")
+    def test_stale_while_revalidate(self, mock_request):
+        cache.clear()
+        mock_request.side_effect = self.mock_backend
+        self.cache_journey_client().send('')
+
+        # expire the cached tariffs
+        cache_key = http_cache.make_key({}, "tariffs_en")
+        http_cache.set_response(cache_key, {"price": 5}, ttl=-1,
+                                stale_while_revalidate=600)
 
+        # stale response is used and refreshed (celery is eager in tests)
+        self.assertEqual("bundle costs 5",
+                         self.cache_journey_client().send(''))
+        self.assertEqual(3, mock_request.call_count)
+        self.assertEqual("bundle costs 10",
+                         self.cache_journey_client().send(''))
+        self.assertEqual(3, mock_request.call_count)
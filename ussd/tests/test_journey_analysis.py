@@ -0,0 +1,162 @@
+import uuid
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from ussd.core import InvalidAttribute, compile_journey
+from ussd.journey_analysis import analyze_journey
+from ussd.screens.initial_screen import InitialScreen
+
+
+def menu(*next_screens):
+    return {
+        "type": "menu_screen",
+        "text": "Choose",
+        "options": [{"text": next_screen, "next_screen": next_screen}
+                    for next_screen in next_screens]
+    }
+
+
+def router(*next_screens, default=None):
+    screen = {
+        "type": "router_screen",
+        "router_options": [{"expression": "{{ True }}",
+                            "next_screen": next_screen}
+                           for next_screen in next_screens]
+    }
+    if default:
+        screen["default_next_screen"] = default
+    return screen
+
+
+def quit_screen():
+    return {"type": "quit_screen", "text": "Bye"}
+
+
+class TestJourneyAnalysis(SimpleTestCase):
+
+    def test_report(self):
+        journey = {
+            "initial_screen": {"type": "initial_screen",
+                               "next_screen": "check_user"},
+            "check_user": router("main_menu", default="register"),
+            "register": {
+                "type": "input_screen",
+                "text": "Enter your name",
+                "input_identifier": "name",
+                "next_screen": [{"condition": "input == 'x'",
+                                 "next_screen": "quit"}],
+                "default_next_screen": "save_user"
+            },
+            "save_user": {"type": "update_session_screen",
+                          "next_screen": "main_menu",
+                          "values_to_update": []},
+            "main_menu": menu("balance", "quit"),
+            "balance": {"type": "http_screen",
+                        "next_screen": "show_balance",
+                        "on_failure": "missing_screen",
+                        "session_key": "balance",
+                        "http_request": {"method": "get",
+                                         "url": "http://localhost"}},
+            "show_balance": {"inherit": "main_menu"},
+            "quit": quit_screen(),
+            "old_menu": menu("quit"),
+        }
+        report = analyze_journey(journey)
+
+        self.assertEqual(9, report['screens'])
+        self.assertEqual(["old_menu"], report['unreachable'])
+        self.assertEqual({"balance": ["missing_screen"]}, report['dangling'])
+        self.assertEqual([], report['forwarding_cycles'])
+        self.assertEqual({
+            # initial_screen -> check_user -> main_menu
+            "initial_screen": 2,
+            "check_user": 1,
+            # register -> save_user -> main_menu
+            "register": 2,
+            "save_user": 1,
+            "main_menu": 2,
+            "balance": 1,
+            "show_balance": 2,
+            "quit": 0,
+            "old_menu": 1,
+        }, report['max_depth'])
+
+    def test_forwarding_cycles(self):
+        journey = {
+            "initial_screen": "router_one",
+            "router_one": router("router_two", default="menu"),
+            "router_two": router("router_one"),
+            "self_router": router("self_router", default="menu"),
+            # cycles through a screen waiting for input are fine
+            "menu": menu("router_three"),
+            "router_three": router("menu"),
+        }
+        report = analyze_journey(journey)
+
+        self.assertEqual([["router_one", "router_two"], ["self_router"]],
+                         report['forwarding_cycles'])
+        self.assertIsNone(report['max_depth']['initial_screen'])
+        self.assertIsNone(report['max_depth']['router_one'])
+        self.assertEqual(2, report['max_depth']['menu'])
+        self.assertEqual(1, report['max_depth']['router_three'])
+
+    def test_long_journeys(self):
+        # the graph is walked without recursion
+        journey = {"initial_screen": "router_0"}
+        for i in range(5000):
+            journey["router_{}".format(i)] = router("router_{}".format(i + 1))
+        journey["router_5000"] = quit_screen()
+        report = analyze_journey(journey)
+
+        self.assertEqual([], report['unreachable'])
+        self.assertEqual(5001, report['max_depth']['initial_screen'])
+
+    def test_check_transition(self):
+        journey = compile_journey({
+            "initial_screen": "main_menu",
+            "main_menu": menu("quit"),
+            "custom": {"type": "custom_screen",
+                       "screen_obj": "ussd.tests.test_custom_screen"
+                                     ".SampleCustomHandler1"},
+            "quit": quit_screen(),
+        })
+        journey.check_transition("initial_screen", "main_menu")
+        journey.check_transition("main_menu", "quit")
+        # custom screens choose their next screen in code
+        journey.check_transition("custom", "main_menu")
+
+        self.assertRaises(InvalidAttribute, journey.check_transition,
+                          "main_menu", "initial_screen")
+        self.assertRaises(InvalidAttribute, journey.check_transition,
+                          "custom", "missing_screen")
+
+
+@override_settings(
+    CELERY_EAGER_PROPAGATES_EXCEPTIONS=True,
+    CELERY_ALWAYS_EAGER=True,
+    BROKER_BACKEND='memory'
+)
+class TestTransitionValidation(TestCase):
+
+    def send(self):
+        def handle(screen):
+            # enter_height is the only next screen of the initial screen
+            return screen.ussd_request.forward("enter_age")
+
+        with mock.patch.object(InitialScreen, 'handle', autospec=True,
+                               side_effect=handle):
+            return self.client.post(reverse('africastalking_url'), {
+                "sessionId": str(uuid.uuid4()),
+                "text": "",
+                "phoneNumber": "200",
+                "serviceCode": "test",
+                "language": "en",
+                "customer_journey_conf": "valid_input_screen_conf.yml"
+            }).content.decode()
+
+    def test_disabled(self):
+        self.assertEqual("Enter your age\n1. back\n", self.send())
+
+    @override_settings(USSD_VALIDATE_TRANSITIONS=True)
+    def test_invalid_transition(self):
+        self.assertEqual("An internal error occurred.", self.send())
@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import uuid
+from django.test import RequestFactory, TestCase, override_settings
+from ussd.core import SimpleUssdView, UssdRequest, compile_journey
+from ussd.journey_registry import InvalidJourney, JourneyRegistry
+
+journey = """
+initial_screen:
+  type: initial_screen
+  next_screen: enter_name
+  default_language: en
+
+enter_name:
+  type: input_screen
+  text: Enter your name
+  input_identifier: name
+  next_screen: show_name
+
+show_name:
+  type: quit_screen
+  text: {text}
+"""
+
+
+class JourneyReloadView(SimpleUssdView):
+    customer_journey_namespace = "journey_registry_test"
+
+    def post(self, req):
+        return UssdRequest(
+            session_id=req.POST['sessionId'],
+            phone_number='200',
+            ussd_input=req.POST['text'],
+            language='en'
+        )
+
+
+class JourneyFileMixin(object):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, 'journey.yml')
+        self.write_journey("Version one {{name}}")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_journey(self, text):
+        with open(self.file_path, 'w') as f:
+            f.write(journey.format(text=text))
+        # file systems with a coarse mtime resolution
+        mtime = getattr(self, 'mtime', 0) + 10 ** 9
+        self.mtime = max(mtime, os.stat(self.file_path).st_mtime_ns)
+        os.utime(self.file_path, ns=(self.mtime, self.mtime))
+
+
+class TestJourneyRegistry(JourneyFileMixin, TestCase):
+
+    def setUp(self):
+        super(TestJourneyRegistry, self).setUp()
+        self.registry = JourneyRegistry(
+            lambda content, namespace, version: compile_journey(
+                content, namespace, version),
+            validate=lambda content: ('text' in content['show_name'], {}),
+            interval=0,
+            keep_versions=2
+        )
+
+    def get_text(self):
+        return self.registry.get(self.file_path, "test").get_screen(
+            "show_name").content['text']
+
+    def test_reload(self):
+        first_version = self.registry.get(self.file_path, "test")
+        self.assertEqual("Version one {{name}}", self.get_text())
+        # nothing changed
+        self.assertIs(first_version, self.registry.get(self.file_path, "test"))
+
+        self.write_journey("Version two {{name}}")
+        self.registry.get(self.file_path, "test")
+        self.registry.wait("test")
+        self.assertEqual("Version two {{name}}", self.get_text())
+
+        # previous version is kept for sessions in progress
+        self.assertIs(first_version, self.registry.get_version(
+            "test", first_version.version))
+
+        self.write_journey("Version three {{name}}")
+        self.registry.get(self.file_path, "test")
+        self.registry.wait("test")
+        self.assertEqual("Version three {{name}}", self.get_text())
+        self.assertIsNone(self.registry.get_version(
+            "test", first_version.version))
+
+    def test_invalid_version_is_not_used(self):
+        self.registry.get(self.file_path, "test")
+        with open(self.file_path, 'a') as f:
+            f.write("  invalid: [")
+        os.utime(self.file_path, ns=(self.mtime * 2, self.mtime * 2))
+
+        self.registry.get(self.file_path, "test")
+        self.registry.wait("test")
+        self.assertEqual("Version one {{name}}", self.get_text())
+
+    def test_first_version_is_validated(self):
+        with open(self.file_path, 'w') as f:
+            f.write("show_name:\n  type: quit_screen\n")
+        self.assertRaises(InvalidJourney, self.registry.get,
+                          self.file_path, "test")
+
+
+@override_settings(USSD_JOURNEY_RELOAD={"enabled": True, "interval": 0})
+class TestJourneyReloadView(JourneyFileMixin, TestCase):
+
+    def send(self, session_id, text):
+        view = JourneyReloadView.as_view(customer_journey_conf=self.file_path)
+        request = RequestFactory().post(
+            '/', {"sessionId": session_id, "text": text})
+        return view(request).content.decode()
+
+    def test_sessions_keep_their_version(self):
+        from ussd.core import get_journey_registry
+
+        old_session = str(uuid.uuid4())
+        self.assertEqual("Enter your name\n", self.send(old_session, ''))
+
+        self.write_journey("Version two {{name}}")
+        self.send(str(uuid.uuid4()), '')
+        get_journey_registry().wait("journey_registry_test")
+
+        new_session = str(uuid.uuid4())
+        self.assertEqual("Enter your name\n", self.send(new_session, ''))
+
+        self.assertEqual("Version one mwas", self.send(old_session, 'mwas'))
+        self.assertEqual("Version two mwas", self.send(new_session, 'mwas'))
+
+    def test_reload_does_not_change_staticconf(self):
+        import staticconf
+
+        self.send(str(uuid.uuid4()), '')
+        self.assertNotIn("journey_registry_test",
+                         staticconf.config.configuration_namespaces)
+
+    def test_warm_up(self):
+        from ussd.warm_up import warm_up_journey
+
+        report = warm_up_journey(self.file_path, "journey_registry_test")
+        self.assertTrue(report['valid'])
+        self.assertEqual(3, report['screens'])
@@ -2,9 +2,11 @@
 This module is involved in testing Menu screen only
 """
 from ussd.tests import UssdTestCase
-from ussd.core import ussd_session
+from ussd.core import UssdHandlerAbstract, ussd_session
+from ussd.screens.menu_screen import MenuScreen
 from collections import OrderedDict
 from django.test import override_settings
+from unittest import mock
 
 
 class TestMenuHandler(UssdTestCase.BaseUssdTestCase):
@@ -389,6 +391,78 @@ class TestMenuHandler(UssdTestCase.BaseUssdTestCase):
         #     ussd_client.send('1')
         # )
 
+    def test_page_index_is_kept_in_session(self):
+        ussd_client = self.ussd_client()
+        ussd_client.send('')
+        ussd_client.send('5')
+        ussd_client.send('1')
+
+        # the screen with 23 items, its first page is text only
+        ussd_client.send('2')
+        page_two = ussd_client.send('98')
+
+        ussd_state = ussd_session(ussd_client.session_id)['_ussd_state']
+        self.assertEqual(2, ussd_state['page'])
+        # the third page starts with the fifth item
+        self.assertEqual(
+            dict(screen="test_pagination_in_both_text_options_items",
+                 offsets=[None, None, 4], last=None),
+            ussd_state['pages']
+        )
+
+        render_text = UssdHandlerAbstract.render_text
+        with mock.patch.object(UssdHandlerAbstract, 'render_text',
+                               side_effect=render_text) as mock_render_text:
+            page_three = ussd_client.send('98')
+        rendered_items = [call[1]['extra']['item']
+                          for call in mock_render_text.call_args_list
+                          if 'item' in (call[1].get('extra') or {})]
+        # only the items of the third page and the one starting the next
+        # page are rendered
+        self.assertEqual("egg", rendered_items[0])
+        self.assertTrue(page_three.startswith("5. egg\n"))
+        self.assertEqual(len(page_three.splitlines()) - 1,
+                         len(rendered_items))
+
+        self.assertEqual(page_two, ussd_client.send('00'))
+
+        # the index is dropped once the screen changes
+        ussd_client.send('1')
+        self.assertNotIn(
+            'pages', ussd_session(ussd_client.session_id)['_ussd_state'])
+
+    def test_only_the_requested_page_is_rendered(self):
+        ussd_client = self.ussd_client()
+        ussd_client.send('')
+        ussd_client.send('5')
+        ussd_client.send('1')
+
+        render_text = UssdHandlerAbstract.render_text
+
+        def rendered_items(mock_render_text):
+            return [call for call in mock_render_text.call_args_list
+                    if 'item' in (call[1].get('extra') or {})]
+
+        with mock.patch.object(UssdHandlerAbstract, 'render_text',
+                               side_effect=render_text) as mock_render_text:
+            # show the screen with 23 items and an option
+            self.assertEqual(
+                "This screen has both large text, options, items that "
+                "exceed ussd text limit part\n98. More\n",
+                ussd_client.send('2')
+            )
+            # its first page has no item, none has been rendered
+            self.assertEqual([], rendered_items(mock_render_text))
+
+            self.assertEqual(
+                "of this text would be displayed in the next screen\n"
+                "1. apple\n2. boy\n3. cat\n4. dog\n00. Back\n98. More\n",
+                ussd_client.send('98')
+            )
+            # egg didn't fit and starts the next page, it's the last item
+            # rendered.
+            self.assertEqual(5, len(rendered_items(mock_render_text)))
+
     def test_routing_option(self):
         ussd_client = self.ussd_client(phone_number='200')
         ussd_client.send('') # dial in
@@ -0,0 +1,88 @@
+from django.test import TestCase
+from ussd.pagination import paginate, paginate_from, get_page, \
+    gsm7_length, get_text_length_function, CountingIterator
+
+
+class TestPagination(TestCase):
+
+    @staticmethod
+    def options(count):
+        return ("{index}. option {index}\n".format(index=index)
+                for index in range(1, count + 1))
+
+    def test_pages_fit_in_the_limit(self):
+        pages = list(paginate("Choose an option", self.options(50), 60,
+                              "More\n", "Back\n"))
+
+        self.assertEqual(
+            "Choose an option\n1. option 1\n2. option 2\n3. option 3\n"
+            "98. More\n",
+            pages[0]
+        )
+        self.assertEqual(
+            "4. option 4\n5. option 5\n6. option 6\n7. option 7\n"
+            "00. Back\n98. More\n",
+            pages[1]
+        )
+        self.assertTrue(pages[-1].endswith("00. Back\n"))
+        # the more option is appended after the limit is checked
+        for page in pages:
+            self.assertLessEqual(len(page.replace("98. More\n", "")), 60)
+
+        # all options are displayed once and in order
+        self.assertEqual(
+            "Choose an option\n" + "".join(self.options(50)),
+            "".join(page.replace("98. More\n", "").replace("00. Back\n", "")
+                    for page in pages)
+        )
+
+    def test_large_number_of_options(self):
+        pages = list(paginate("Choose", self.options(10000), 182,
+                              "More\n", "Back\n"))
+        self.assertTrue(pages[-1].startswith("99"))
+
+    def test_pages_are_generated_lazily(self):
+        options = self.options(10000)
+
+        self.assertEqual(
+            "Choose\n1. option 1\n2. option 2\n98. More\n",
+            get_page(paginate("Choose", options, 40, "More\n", "Back\n"), 1)
+        )
+        # only the options in the first page have been consumed
+        self.assertEqual("4. option 4\n", next(options))
+
+    def test_resume_from_page_offset(self):
+        options = list(self.options(50))
+        pages = list(paginate("Choose an option", options, 60,
+                              "More\n", "Back\n"))
+
+        counted = CountingIterator(options)
+        get_page(paginate("Choose an option", counted, 60, "More\n",
+                          "Back\n"), 2)
+        # the option that didn't fit in the second page starts the third
+        offset = counted.count - 1
+
+        resumed = iter(options[offset:])
+        self.assertEqual(
+            pages[2:],
+            list(paginate_from(next(resumed), resumed, 60, "More\n",
+                               "Back\n"))
+        )
+
+    def test_gsm7_length(self):
+        self.assertEqual(5, gsm7_length("hello"))
+        # extension characters take two septets
+        self.assertEqual(8, gsm7_length("[test]"))
+        # non gsm7 text is sent as ucs2
+        self.assertEqual(10, gsm7_length("ሰላም"[:1] + "abc"))
+        self.assertRaises(ValueError, get_text_length_function, "ascii")
+
+    def test_gsm7_budget(self):
+        options = ["1. ሰላም\n", "2. ሰላም\n"]
+
+        # both options fit when counting characters
+        self.assertEqual(
+            1, len(list(paginate("", options, 20, "More\n", "Back\n"))))
+        self.assertEqual(
+            2, len(list(paginate("", options, 20, "More\n", "Back\n",
+                                 length=gsm7_length))))
@@ -0,0 +1,113 @@
+import time
+from unittest import mock
+from django.http.response import JsonResponse
+from django.test.utils import override_settings
+import requests
+from ussd.tests import UssdTestCase
+from ussd.core import ussd_session
+from ussd.screens import parallel_http_screen
+
+
+def mock_backend(method, url, **kwargs):
+    time.sleep(0.2)
+    if url.endswith('balance'):
+        return JsonResponse({"balance": 250})
+    if url.endswith('loan_limit'):
+        return JsonResponse({"limit": 1000})
+    return JsonResponse([{"name": "bundle"}, {"name": "airtime"}],
+                        safe=False)
+
+
+class TestParallelHttpScreen(UssdTestCase.BaseUssdTestCase):
+    validation_error_message = dict(
+        get_account=dict(
+            next_screen=['This field is required.'],
+            requests=['This field is required.']
+        ),
+        get_account_no_requests=dict(
+            requests=['Ensure this field has at least 1 elements.']
+        ),
+        get_account_invalid_request=dict(
+            next_screen={
+                'next_screen': ['missing_screen is missing in ussd journey']
+            },
+            timeout=['Ensure this value is greater than or equal to 0.'],
+            requests={
+                0: dict(
+                    session_key=['This field is required.'],
+                    http_request=dict(
+                        method=['"done" is not a valid choice.']
+                    )
+                )
+            }
+        )
+    )
+
+    @mock.patch("ussd.http_client.request")
+    def test(self, mock_request):
+        mock_request.side_effect = mock_backend
+        ussd_client = self.ussd_client()
+
+        start = time.monotonic()
+        self.assertEqual(
+            "Balance 250, loan limit 1000 and 2 promotions.\n",
+            ussd_client.send('')
+        )
+        # requests were made at the same time
+        self.assertLess(time.monotonic() - start, 0.5)
+
+        mock_request.assert_any_call(
+            method='post',
+            url='http://localhost:8000/mock/promotions',
+            json={'phone_number': '200'},
+            timeout=5
+        )
+        session = ussd_session(ussd_client.session_id)
+        self.assertEqual(200, session['balance']['status_code'])
+
+    @mock.patch("ussd.http_client.request")
+    def test_failed_request(self, mock_request):
+        def backend(method, url, **kwargs):
+            if url.endswith('loan_limit'):
+                raise requests.ConnectionError("refused")
+            return mock_backend(method, url, **kwargs)
+        mock_request.side_effect = backend
+        ussd_client = self.ussd_client()
+
+        self.assertEqual("Account details are not available.",
+                         ussd_client.send(''))
+        self.assertEqual(
+            {"error": "refused"},
+            ussd_session(ussd_client.session_id)['loan_limit']
+        )
+
+    @override_settings(USSD_REQUEST_BUDGET=0.1)
+    @mock.patch("ussd.http_client.request")
+    def test_request_budget(self, mock_request):
+        mock_request.side_effect = mock_backend
+        ussd_client = self.ussd_client()
+
+        self.assertEqual("Account details are not available.",
+                         ussd_client.send(''))
+        self.assertEqual(
+            {"error": "timeout"},
+            ussd_session(ussd_client.session_id)['balance']
+        )
+        for call in mock_request.call_args_list:
+            self.assertLessEqual(call[1]['timeout'], 0.1)
+
+    @mock.patch("ussd.http_client.request")
+    def test_executor_is_shared(self, mock_request):
+        mock_request.side_effect = mock_backend
+        executor = parallel_http_screen.get_executor()
+
+        for _ in range(2):
+            self.ussd_client().send('')
+        self.assertIs(executor, parallel_http_screen.get_executor())
+
+    @override_settings(USSD_PARALLEL_HTTP_WORKERS=2)
+    @mock.patch.object(parallel_http_screen, '_executor', None)
+    def test_workers_setting(self):
+        executor = parallel_http_screen.get_executor()
+        self.addCleanup(executor.shutdown)
+        self.assertEqual(2, executor._max_workers)
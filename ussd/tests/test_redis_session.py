@@ -0,0 +1,95 @@
+import unittest
+import uuid
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ussd.core import aussd_session, ussd_session, UssdRequest
+from ussd.session_tracker import SessionTracker
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is not installed")
+@override_settings(
+    USSD_SESSION_ENGINE='ussd.session_engines.redis',
+    USSD_REDIS_SESSION={"client_class": "fakeredis.FakeRedis", "ttl": 900},
+    CELERY_EAGER_PROPAGATES_EXCEPTIONS=True,
+    CELERY_ALWAYS_EAGER=True,
+    BROKER_BACKEND='memory'
+)
+class TestRedisSessionEngine(TestCase):
+
+    def setUp(self):
+        from ussd.session_engines.redis import get_client, get_options
+        self.redis = get_client(get_options())
+        self.redis.flushall()
+
+    def test_get_or_create(self):
+        session = ussd_session("redis_session")
+        self.assertEqual({}, dict(session.items()))
+        self.assertTrue(session.exists("redis_session"))
+        self.assertEqual(900, self.redis.ttl("ussd_session:redis_session"))
+
+        session['name'] = 'mwas'
+        session.save()
+        self.assertEqual('mwas', ussd_session("redis_session")['name'])
+
+    async def test_async_get_or_create(self):
+        session = await aussd_session("redis_session")
+        self.assertEqual({}, dict(session.items()))
+
+        tracker = SessionTracker(session)
+        session['name'] = 'mwas'
+        await tracker.asave()
+        session = await aussd_session("redis_session")
+        self.assertEqual('mwas', session['name'])
+
+    def test_save_delta(self):
+        session = ussd_session("redis_session")
+        session.update({"name": "mwas", "age": 24})
+        session.save()
+
+        session = ussd_session("redis_session")
+        tracker = SessionTracker(session)
+        session['age'] = 25
+        del session['name']
+        tracker.save()
+
+        self.assertEqual(
+            [b'25'],
+            self.redis.hmget("ussd_session:redis_session", "age"))
+        session = ussd_session("redis_session")
+        self.assertEqual({"age": 25}, dict(session.items()))
+
+    def test_built_in_session_management(self):
+        ussd_request = UssdRequest(
+            session_id=None, phone_number="200", ussd_input="",
+            language="en", use_built_in_session_management=True)
+        self.assertTrue(ussd_request.session.exists(ussd_request.session_id))
+
+    def test_journey(self):
+        session_id = str(uuid.uuid4())
+        responses = [
+            self.client_post(session_id, ussd_input)
+            for ussd_input in ('', 'mwas', '1')
+        ]
+        self.assertNotIn("An internal error occurred.", responses)
+
+        session = ussd_session(session_id)
+        # the invalid input didn't change the session, it wasn't saved
+        self.assertEqual(2, len(session['ussd_interaction']))
+
+    def client_post(self, session_id, ussd_input):
+        return self.client.post(
+            reverse('africastalking_url'),
+            {
+                "sessionId": session_id,
+                "text": ussd_input,
+                "phoneNumber": "200",
+                "serviceCode": "test",
+                "language": "en",
+                "customer_journey_conf": "valid_input_screen_conf.yml"
+            }
+        ).content.decode()
@@ -160,7 +160,7 @@ class TestingUssdReportSession(UssdTestCase.BaseUssdTestCase, TestCase):
         mock_report_session.assert_has_calls(expected_calls)
 
     @staticmethod
-    @mock.patch('ussd.core.requests.request')
+    @mock.patch("ussd.http_client.request")
     def test_http_call(mock_request):
         mock_response = JsonResponse({"balance": 250})
         mock_request.return_value = mock_response
@@ -211,7 +211,7 @@ class TestingUssdReportSession(UssdTestCase.BaseUssdTestCase, TestCase):
             )
         )
 
-    @mock.patch("ussd.tasks.requests.request")
+    @mock.patch("ussd.http_client.request")
     def test_if_session_is_already_posted_wont_post_again(self, mock_request):
         mock_response = JsonResponse({"balance": 250})
         mock_request.return_value = mock_response
@@ -255,7 +255,7 @@ class TestingUssdReportSession(UssdTestCase.BaseUssdTestCase, TestCase):
         )
         self.assertFalse(mock_request.called)
 
-    @mock.patch("requests.request")
+    @mock.patch("ussd.http_client.request")
     @mock.patch("ussd.core.report_session.apply_async")
     def test_retry(self, mock_apply_async, mock_request):
         mock_response = JsonResponse({"balance": 250}, status=400)
@@ -305,7 +305,7 @@ class TestingUssdReportSession(UssdTestCase.BaseUssdTestCase, TestCase):
             ussd_client.send('')  # dial in
         )
 
-    @mock.patch("ussd.core.requests.request")
+    @mock.patch("ussd.http_client.request")
     @mock.patch.object(report_session, 'retry')
     def test_maximum_retries(self, mock_retry, mock_request):
         mock_response = JsonResponse({"balance": 250},
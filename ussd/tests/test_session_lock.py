@@ -0,0 +1,223 @@
+import unittest
+import uuid
+from unittest import mock
+from django.core.cache import cache, caches
+from django.http.response import JsonResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ussd.core import BaseUssdView, ussd_session
+from ussd.session_lock import SessionLock, get_lock_options
+
+try:
+    import fakeredis
+    import lupa
+except ImportError:
+    fakeredis = None
+
+
+class TestSessionLock(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lock(self):
+        lock = SessionLock("session_one", wait=0)
+        self.assertTrue(lock.acquire())
+        self.assertFalse(lock.waited)
+
+        other_lock = SessionLock("session_one", wait=0.1, poll_interval=0.01)
+        self.assertFalse(other_lock.acquire())
+        self.assertTrue(other_lock.waited)
+
+        # only the holder releases the lock
+        other_lock.release()
+        self.assertFalse(SessionLock("session_one", wait=0).acquire())
+
+        lock.release()
+        self.assertTrue(other_lock.acquire())
+
+    def test_lease_expires(self):
+        self.assertTrue(SessionLock("session_one", timeout=0.1).acquire())
+        lock = SessionLock("session_one", wait=1, poll_interval=0.01)
+        self.assertTrue(lock.acquire())
+        self.assertTrue(lock.waited)
+
+    @override_settings(USSD_REQUEST_BUDGET=10)
+    def test_timeout_above_request_budget(self):
+        self.assertRaises(ValueError, get_lock_options,
+                          {"enabled": True, "timeout": 10})
+        self.assertEqual(11, get_lock_options({"enabled": True,
+                                               "timeout": 11})['timeout'])
+        # not checked when the lock is disabled
+        get_lock_options({"timeout": 10})
+
+    @unittest.skipIf(fakeredis is None, "fakeredis with lua is not installed")
+    def test_redis_release(self):
+        with override_settings(CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://localhost:6379",
+                "OPTIONS": {"connection_class": fakeredis.FakeConnection}
+            }
+        }):
+            caches['default'].clear()
+            lock = SessionLock("session_one", timeout=0.1)
+            self.assertTrue(lock.acquire())
+            other_lock = SessionLock("session_one", wait=1,
+                                     poll_interval=0.01)
+            self.assertTrue(other_lock.acquire())
+
+            # the expired lease doesn't release the new one
+            lock.release()
+            self.assertFalse(SessionLock("session_one", wait=0).acquire())
+
+            other_lock.release()
+            self.assertTrue(SessionLock("session_one", wait=0).acquire())
+
+
+@override_settings(
+    CELERY_EAGER_PROPAGATES_EXCEPTIONS=True,
+    CELERY_ALWAYS_EAGER=True,
+    BROKER_BACKEND='memory'
+)
+class TestSessionLockDispatch(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.session_id = str(uuid.uuid4())
+
+    def send(self, text, url_name='africastalking_url'):
+        return self.client.post(reverse(url_name), {
+            "sessionId": self.session_id,
+            "text": text,
+            "phoneNumber": "200",
+            "serviceCode": "test",
+            "language": "en",
+            "customer_journey_conf": "valid_input_screen_conf.yml"
+        }).content.decode()
+
+    def hold_lock(self, timeout):
+        SessionLock(self.session_id, timeout=timeout).acquire()
+
+    @override_settings(USSD_SESSION_LOCK={"enabled": True,
+                                          "policy": "reject"})
+    def test_reject(self):
+        self.assertEqual("Enter your height\n", self.send(''))
+
+        self.hold_lock(timeout=10)
+        self.assertEqual("Your request is being processed, please try again.",
+                         self.send('mwas'))
+
+    @override_settings(USSD_SESSION_LOCK={"enabled": True, "wait": 2,
+                                          "poll_interval": 0.01})
+    def test_wait(self):
+        self.assertEqual("Enter your height\n", self.send(''))
+
+        self.hold_lock(timeout=0.2)
+        self.assertEqual("Enter number between 1 and 7\n", self.send('mwas'))
+
+    @override_settings(USSD_SESSION_LOCK={"enabled": True, "wait": 2,
+                                          "poll_interval": 0.01,
+                                          "policy": "replay"})
+    def test_replay(self):
+        for url_name in ('africastalking_url', 'async_africastalking_url'):
+            self.session_id = str(uuid.uuid4())
+            self.send('', url_name)
+            response = self.send('mwas', url_name)
+
+            # the gateway resends the request while it's being handled
+            self.hold_lock(timeout=0.2)
+            self.assertEqual(response, self.send('mwas', url_name))
+
+            # handlers were not run again
+            session = ussd_session(self.session_id)
+            self.assertEqual(2, len(session['ussd_interaction']))
+
+    @override_settings(USSD_SESSION_LOCK={"enabled": True,
+                                          "policy": "replay"})
+    def test_replay_without_waiting(self):
+        self.send('')
+        response = self.send('mwas')
+
+        # the resend arrives after the first request released the lock
+        with mock.patch.object(BaseUssdView, 'run_handlers', autospec=True,
+                               side_effect=BaseUssdView.run_handlers
+                               ) as mock_run_handlers:
+            self.assertEqual(response, self.send('mwas'))
+        self.assertFalse(mock_run_handlers.called)
+
+    @override_settings(USSD_SESSION_LOCK={"enabled": True,
+                                          "policy": "replay"})
+    def test_session_is_loaded_after_lock(self):
+        self.send('')
+        acquire = SessionLock.acquire
+        resent = {}
+
+        def handle_resend_first(lock):
+            # the other request is handled after this one loaded the
+            # session but before it took the lock
+            if not resent:
+                resent['response'] = None
+                resent['response'] = self.send('mwas')
+            return acquire(lock)
+
+        with mock.patch.object(SessionLock, 'acquire', autospec=True,
+                               side_effect=handle_resend_first), \
+                mock.patch.object(BaseUssdView, 'run_handlers',
+                                  autospec=True,
+                                  side_effect=BaseUssdView.run_handlers
+                                  ) as mock_run_handlers:
+            response = self.send('mwas')
+
+        self.assertEqual(resent['response'], response)
+        # only the request that was handled first ran the handlers
+        self.assertEqual(1, mock_run_handlers.call_count)
+
+
+@override_settings(
+    USSD_REPLAY_DUPLICATES=True,
+    CELERY_EAGER_PROPAGATES_EXCEPTIONS=True,
+    CELERY_ALWAYS_EAGER=True,
+    BROKER_BACKEND='memory'
+)
+class TestReplayDuplicates(TestCase):
+
+    def send(self, session_id, text, url_name='africastalking_url'):
+        return self.client.post(reverse(url_name), {
+            "sessionId": session_id,
+            "text": text,
+            "phoneNumber": "200",
+            "serviceCode": "test",
+            "language": "en",
+            "customer_journey_conf": "valid_http_screen_conf.yml"
+        }).content.decode()
+
+    @mock.patch("ussd.http_client.request")
+    def test_duplicate_is_not_handled_again(self, mock_request):
+        mock_request.return_value = JsonResponse({"balance": 250})
+
+        for url_name in ('africastalking_url', 'async_africastalking_url'):
+            mock_request.reset_mock()
+            session_id = str(uuid.uuid4())
+            response = self.send(session_id, '', url_name)
+            calls = mock_request.call_count
+            self.assertTrue(calls)
+
+            # the gateway resends the request
+            self.assertEqual(response, self.send(session_id, '', url_name))
+            self.assertEqual(calls, mock_request.call_count)
+
+            # another session making the same request
+            self.assertEqual(response,
+                             self.send(str(uuid.uuid4()), '', url_name))
+            self.assertEqual(calls * 2, mock_request.call_count)
+
+    @override_settings(USSD_REPLAY_DUPLICATES=False)
+    def test_disabled(self):
+        session_id = str(uuid.uuid4())
+        with mock.patch.object(BaseUssdView, 'run_handlers', autospec=True,
+                               side_effect=BaseUssdView.run_handlers
+                               ) as mock_run_handlers:
+            self.send(session_id, '')
+            self.send(session_id, '')
+        self.assertEqual(2, mock_run_handlers.call_count)
@@ -0,0 +1,108 @@
+import uuid
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ussd.core import ussd_session
+from ussd.session_tracker import SessionTracker
+
+
+class TestSessionTracker(TestCase):
+
+    def setUp(self):
+        self.session = ussd_session("session_tracker")
+        self.session.update(
+            {"name": "mwas", "ussd_interaction": [{"screen_name": "one"}]})
+        self.session.save()
+
+    def test_unchanged_session_is_not_saved(self):
+        tracker = SessionTracker(self.session)
+        # same value set again
+        self.session['name'] = 'mwas'
+        with mock.patch.object(self.session, 'save') as mock_save:
+            self.assertFalse(tracker.save())
+        mock_save.assert_not_called()
+
+    def test_changes(self):
+        tracker = SessionTracker(self.session)
+        self.session['age'] = 24
+        self.session['ussd_interaction'][-1]['input'] = '1'
+        del self.session['name']
+
+        changed, removed = tracker.changes()
+        self.assertEqual(
+            {"age": 24,
+             "ussd_interaction": [{"screen_name": "one", "input": "1"}]},
+            changed
+        )
+        self.assertEqual({"name"}, removed)
+
+        self.assertTrue(tracker.save())
+        self.assertFalse(tracker.has_changed)
+
+        session = ussd_session("session_tracker")
+        self.assertEqual(24, session['age'])
+        self.assertNotIn('name', session)
+
+    def test_save_delta(self):
+        self.session.save_delta = mock.Mock()
+        self.session.asave_delta = mock.AsyncMock()
+        tracker = SessionTracker(self.session)
+
+        self.session['age'] = 24
+        with mock.patch.object(self.session, 'save') as mock_save:
+            tracker.save()
+        mock_save.assert_not_called()
+        self.session.save_delta.assert_called_once_with({"age": 24}, set())
+
+        self.session['age'] = 25
+        async_to_sync(tracker.asave)()
+        self.session.asave_delta.assert_called_once_with({"age": 25}, set())
+
+    def test_volatile_keys_are_saved_with_other_changes(self):
+        self.session.save_delta = mock.Mock()
+        tracker = SessionTracker(self.session,
+                                 volatile_keys=['ussd_interaction'])
+
+        self.session['ussd_interaction'].append({"screen_name": "two"})
+        self.assertFalse(tracker.save())
+
+        self.session['age'] = 24
+        tracker.save()
+        self.session.save_delta.assert_called_once_with(
+            {"age": 24, "ussd_interaction": [{"screen_name": "one"},
+                                             {"screen_name": "two"}]},
+            set()
+        )
+
+
+@override_settings(
+    CELERY_EAGER_PROPAGATES_EXCEPTIONS=True,
+    CELERY_ALWAYS_EAGER=True,
+    BROKER_BACKEND='memory'
+)
+class TestSessionSave(TestCase):
+
+    def send(self, text):
+        return self.client.post(reverse('africastalking_url'), {
+            "sessionId": self.session_id,
+            "text": text,
+            "phoneNumber": "200",
+            "serviceCode": "test",
+            "language": "en",
+            "customer_journey_conf": "valid_input_screen_conf.yml"
+        }).content.decode()
+
+    def setUp(self):
+        self.session_id = str(uuid.uuid4())
+
+    def test_request_without_changes_is_not_saved(self):
+        self.assertEqual("Enter your height\n", self.send(''))
+
+        with mock.patch.object(SessionStore, 'save') as mock_save:
+            # invalid input, only the input and the bookkeeping keys
+            # change
+            self.assertEqual("Enter number between 1 and 7\n",
+                             self.send('mwas'))
+        mock_save.assert_not_called()
@@ -0,0 +1,48 @@
+import uuid
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+@override_settings(
+    CELERY_EAGER_PROPAGATES_EXCEPTIONS=True,
+    CELERY_ALWAYS_EAGER=True,
+    BROKER_BACKEND='memory'
+)
+class TestSimpleUssdView(TestCase):
+
+    @staticmethod
+    def payload(session_id, ussd_input, journey):
+        return {
+            "sessionId": session_id,
+            "text": ussd_input,
+            "phoneNumber": "+200",
+            "serviceCode": "test",
+            "language": "en",
+            "customer_journey_conf": journey
+        }
+
+    def responses(self, url_name, journey, inputs):
+        session_id = str(uuid.uuid4())
+        responses = []
+        for i in inputs:
+            response = self.client.post(reverse(url_name),
+                                        self.payload(session_id, i, journey))
+            self.assertEqual(200, response.status_code)
+            responses.append(response.content.decode())
+        return responses
+
+    def test_same_responses_as_drf_view(self):
+        for journey, inputs in (
+                ("valid_menu_screen_conf.yml", ['', '5', '98', '00']),
+                ("valid_input_screen_conf.yml", ['', 'mwas', '1']),
+                ("valid_function_screen_conf.yml", ['', '10', '1'])
+        ):
+            expected = self.responses('africastalking_url', journey, inputs)
+            responses = self.responses('simple_africastalking_url', journey,
+                                       inputs)
+            self.assertEqual(expected, responses, journey)
+            self.assertNotIn("An internal error occurred.", responses)
+
+    def test_get_not_allowed(self):
+        response = self.client.get(reverse('simple_africastalking_url'))
+        self.assertEqual(405, response.status_code)
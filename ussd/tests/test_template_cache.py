@@ -0,0 +1,180 @@
+import os
+from django.test import TestCase, override_settings
+from jinja2 import Environment, TemplateSyntaxError
+from ussd.core import UssdHandlerAbstract, template_cache, \
+    capture_environ_context, compile_journey
+from ussd.template_cache import TemplateCache
+
+
+class TestTemplateCache(TestCase):
+
+    def setUp(self):
+        self.cache = TemplateCache(Environment(), maxsize=2)
+
+    def test_templates_are_compiled_once(self):
+        template = self.cache.get_template("Hello {{name}}")
+
+        self.assertIs(template, self.cache.get_template("Hello {{name}}"))
+        self.assertEqual("Hello mwas", template.render(name="mwas"))
+        self.assertDictEqual(
+            dict(hits=1, misses=1, evictions=0, size=1, maxsize=2),
+            self.cache.stats()
+        )
+
+    def test_templates_and_expressions_are_cached_separately(self):
+        expression = self.cache.get_expression("age > 18")
+
+        self.assertTrue(expression(age=20))
+        self.assertIsNot(expression, self.cache.get_template("age > 18"))
+        self.assertEqual(2, self.cache.stats()['misses'])
+
+    def test_least_recently_used_is_evicted(self):
+        one = self.cache.get_template("one")
+        self.cache.get_template("two")
+        self.cache.get_template("one")
+        self.cache.get_template("three")
+
+        stats = self.cache.stats()
+        self.assertEqual(1, stats['evictions'])
+        self.assertEqual(2, stats['size'])
+
+        # "two" was evicted, "one" was still in use
+        self.assertIs(one, self.cache.get_template("one"))
+        self.assertEqual(2, self.cache.stats()['hits'])
+
+    def test_invalid_sources_are_cached(self):
+        for _ in range(2):
+            self.assertRaises(TemplateSyntaxError,
+                              self.cache.get_expression,
+                              "this is not an expression")
+        self.assertEqual(1, self.cache.stats()['misses'])
+        self.assertEqual(1, self.cache.stats()['hits'])
+
+    def test_render_paths_use_the_shared_cache(self):
+        template_cache.clear()
+        session = {"name": "mwas"}
+
+        for _ in range(3):
+            self.assertEqual(
+                "Hello mwas",
+                UssdHandlerAbstract.render_text(session, "Hello {{name}}")
+            )
+            self.assertTrue(
+                UssdHandlerAbstract.evaluate_jija_expression(
+                    "name == 'mwas'", session)
+            )
+        self.assertEqual(2, template_cache.stats()['misses'])
+        self.assertEqual(4, template_cache.stats()['hits'])
+
+
+class TestTemplateContext(TestCase):
+
+    def tearDown(self):
+        capture_environ_context()
+
+    def test_session_is_not_copied(self):
+        session = {"name": "mwas"}
+        context = UssdHandlerAbstract.get_context(session)
+
+        session["name"] = "francis"
+        self.assertEqual("francis", context["name"])
+        self.assertIn("now", context)
+
+    def test_layers_precedence(self):
+        session = {"name": "mwas", "item": "session item"}
+        context = UssdHandlerAbstract.get_context(
+            session, extra_context={"item": "extra item"})
+
+        self.assertEqual("extra item", context["item"])
+        self.assertEqual(
+            "mwas extra item 0,1",
+            UssdHandlerAbstract.render_text(
+                session,
+                "{{name}} {{item}} {{range(2)|join(',')}}",
+                context=context
+            )
+        )
+        # variables added while rendering don't leak into the session
+        UssdHandlerAbstract.render_text(session, "{{name}}",
+                                        extra={"name": "john"})
+        self.assertEqual("mwas", session["name"])
+
+    @override_settings(USSD_TEMPLATE_ENVIRON_ALLOWLIST=['USSD_EXPOSED'])
+    def test_environ_allowlist(self):
+        os.environ['USSD_EXPOSED'] = 'exposed'
+        os.environ['USSD_HIDDEN'] = 'hidden'
+        try:
+            capture_environ_context()
+        finally:
+            del os.environ['USSD_EXPOSED']
+            del os.environ['USSD_HIDDEN']
+
+        self.assertEqual(
+            "exposed-",
+            UssdHandlerAbstract.render_text(
+                {}, "{{USSD_EXPOSED}}-{{USSD_HIDDEN}}")
+        )
+
+
+class TestStaticText(TestCase):
+    journey = {
+        "initial_screen": "screen_one",
+        "screen_one": {
+            "type": "menu_screen",
+            "text": {
+                "en": "Choose an option",
+                "sw": "Chagua {{ name }}"
+            },
+            "options": [
+                {"text": "Exit", "next_screen": "screen_two"}
+            ]
+        },
+        "screen_two": {
+            "type": "quit_screen",
+            "text": "Goodbye {{ name }}"
+        }
+    }
+
+    def test_texts_are_classified_once(self):
+        template_cache.clear()
+        journey = compile_journey(self.journey)
+
+        self.assertEqual(frozenset(["Choose an option", "Exit"]),
+                         journey.static_texts)
+
+        # templated texts have been compiled
+        self.assertEqual(2, template_cache.stats()['misses'])
+
+    def test_static_text_does_not_use_jinja(self):
+        static_texts = compile_journey(self.journey).static_texts
+        template_cache.clear()
+
+        self.assertEqual(
+            "Choose an option",
+            UssdHandlerAbstract.render_text({}, "Choose an option",
+                                            static_texts=static_texts)
+        )
+        self.assertEqual(
+            '"Exit"',
+            UssdHandlerAbstract.render_text({}, "Exit", encode='json',
+                                            static_texts=static_texts)
+        )
+        self.assertEqual(
+            "Goodbye mwas",
+            UssdHandlerAbstract.render_text({"name": "mwas"},
+                                            "Goodbye {{ name }}",
+                                            static_texts=static_texts)
+        )
+        self.assertEqual(0, template_cache.stats()['hits'])
+        self.assertEqual(1, template_cache.stats()['misses'])
+
+    def test_static_texts_are_per_journey(self):
+        compile_journey(self.journey)
+        template_cache.clear()
+
+        # texts of other journeys are rendered
+        self.assertEqual(
+            "Choose an option",
+            UssdHandlerAbstract.render_text({}, "Choose an option")
+        )
+        self.assertEqual(1, template_cache.stats()['misses'])
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.test import TestCase, override_settings
+from ussd import yaml_loader
+from ussd.utilities import YamlToGo
+from .sample_screen_definition import path
+
+
+class TestYamlLoader(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, 'journey.yml')
+        shutil.copy(os.path.join(path, 'valid_input_screen_conf.yml'),
+                    self.file_path)
+        self.cache_directory = os.path.join(self.directory,
+                                            yaml_loader.CACHE_DIRECTORY_NAME)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cache_disabled(self):
+        content = yaml_loader.load_file(self.file_path)
+        self.assertEqual('input_screen', content['enter_height']['type'])
+        self.assertFalse(os.path.exists(self.cache_directory))
+
+    @override_settings(USSD_YAML_CACHE={"enabled": True})
+    def test_cache(self):
+        content = yaml_loader.load_file(self.file_path)
+        self.assertEqual(1, len(os.listdir(self.cache_directory)))
+
+        # next load doesn't parse the file
+        with mock.patch("ussd.yaml_loader.parse") as mock_parse:
+            self.assertEqual(content, yaml_loader.load_file(self.file_path))
+        mock_parse.assert_not_called()
+
+        # changed file is parsed and replaces the cache
+        with open(self.file_path, 'a') as f:
+            f.write("\nnew_screen:\n  type: quit_screen\n  text: bye\n")
+        self.assertEqual('bye',
+                         yaml_loader.load_file(self.file_path)
+                         ['new_screen']['text'])
+        self.assertEqual(1, len(os.listdir(self.cache_directory)))
+
+    def test_unwritable_cache_directory(self):
+        with override_settings(USSD_YAML_CACHE={
+                "enabled": True,
+                "directory": os.path.join(self.file_path, "not_a_directory")
+        }):
+            content = yaml_loader.load_file(self.file_path)
+        self.assertEqual('input_screen', content['enter_height']['type'])
+
+    def test_yaml_to_go(self):
+        self.assertEqual(yaml_loader.load_file(self.file_path),
+                         YamlToGo(self.file_path).yaml)
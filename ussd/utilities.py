@@ -1,5 +1,5 @@
 import importlib
-import yaml
+from ussd import yaml_loader
 from datetime import datetime
 
 date_format = "%Y-%m-%d %H:%M:%S.%f"
@@ -28,9 +28,7 @@ def string_to_datetime(date_str_obj: str):
 
 class YamlToGo:
     def __init__(self,file):
-        file = open(file)
-        self.yaml = yaml.load(file)
-        file.close()
+        self.yaml = yaml_loader.load_file(file)
 
         self.count = 0
 
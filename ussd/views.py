@@ -1,4 +1,5 @@
-from ussd.core import UssdView, UssdRequest,_customer_journey_files, \
+from ussd.core import UssdView, AsyncUssdView, SimpleUssdView, UssdRequest, \
+    _customer_journey_files, \
     render_journey_as_mermaid_text, convert_error_response_to_mermaid_error
 from django.http import HttpResponse, JsonResponse
 from django.conf import settings
@@ -6,6 +7,7 @@ from django.core.exceptions import ImproperlyConfigured
 
 from django.shortcuts import render
 import json
+import hashlib
 from ussd.utilities import YamlToGo
 from rest_framework.views import APIView
 
@@ -16,33 +18,43 @@ except ModuleNotFoundError:
     sample_screen_definition_path = None
 
 
-class AfricasTalkingUssdGateway(UssdView):
+class AfricasTalkingGatewayMixin(object):
+    """
+    Parses Africa's Talking requests, used by the sync and async gateways.
+    """
 
-    def post(self, req):
-        list_of_inputs = req.data['text'].split("*")
+    @staticmethod
+    def get_request_data(request):
+        # rest framework request or django request
+        return request.data if hasattr(request, 'data') else request.POST
+
+    def get_ussd_request_kwargs(self, data) -> dict:
+        list_of_inputs = data['text'].split("*")
         text = "*" if len(list_of_inputs) >= 2 and list_of_inputs[-1] == "" and list_of_inputs[-2] == "" else list_of_inputs[
             -1]
 
-        session_id = req.data['sessionId']
-        if req.data.get('use_built_in_session_management', False):
+        session_id = data['sessionId']
+        if data.get('use_built_in_session_management', False):
             session_id = None
-        ussd_request = UssdRequest(
-            phone_number=req.data['phoneNumber'].strip('+'),
+        return dict(
+            phone_number=data['phoneNumber'].strip('+'),
             session_id=session_id,
+            # the gateway sends the same text when it resends a request
+            fingerprint=hashlib.sha1("{}:{}".format(
+                data['sessionId'], data['text']).encode()).hexdigest(),
             ussd_input=text,
-            service_code=req.data['serviceCode'],
-            language=req.data.get('language', 'en'),
-            use_built_in_session_management=req.data.get(
+            service_code=data['serviceCode'],
+            language=data.get('language', 'en'),
+            use_built_in_session_management=data.get(
                 'use_built_in_session_management', False)
         )
 
-        return ussd_request
-
     def get_customer_journey_conf(self, request):
-        if request.data.get('customer_journey_conf'):
+        data = self.get_request_data(request)
+        if data.get('customer_journey_conf'):
             if sample_screen_definition_path:
-                return sample_screen_definition_path + '/' + request.data.get('customer_journey_conf')
-            return request.data.get('customer_journey_conf')
+                return sample_screen_definition_path + '/' + data.get('customer_journey_conf')
+            return data.get('customer_journey_conf')
 
         configured_default = getattr(settings, 'DEFAULT_USSD_SCREEN_JOURNEY', None)
         if configured_default:
@@ -56,15 +68,16 @@ class AfricasTalkingUssdGateway(UssdView):
         )
 
     def get_customer_journey_namespace(self, request):
-        if request.data.get('customer_journey_conf'):
-            return request.data['customer_journey_conf'].replace(
+        data = self.get_request_data(request)
+        if data.get('customer_journey_conf'):
+            return data['customer_journey_conf'].replace(
                 '.yml', ''
             )
         return "AfricasTalkingUssdGateway"
 
     def ussd_response_handler(self, ussd_response):
-        if self.request.data.get('serviceCode') == 'test':
-            return super(AfricasTalkingUssdGateway, self).\
+        if self.get_request_data(self.request).get('serviceCode') == 'test':
+            return super(AfricasTalkingGatewayMixin, self).\
                 ussd_response_handler(ussd_response)
         if ussd_response.status:
             res = 'CON' + ' ' + str(ussd_response)
@@ -74,6 +87,28 @@ class AfricasTalkingUssdGateway(UssdView):
             response = HttpResponse(res)
         return response
 
+
+class AfricasTalkingUssdGateway(AfricasTalkingGatewayMixin, UssdView):
+
+    def post(self, req):
+        return UssdRequest(**self.get_ussd_request_kwargs(req.data))
+
+
+class SimpleAfricasTalkingUssdGateway(AfricasTalkingGatewayMixin,
+                                      SimpleUssdView):
+
+    def post(self, req):
+        return UssdRequest(**self.get_ussd_request_kwargs(req.POST))
+
+
+class AsyncAfricasTalkingUssdGateway(AfricasTalkingGatewayMixin,
+                                     AsyncUssdView):
+
+    async def post(self, req):
+        return await UssdRequest.acreate(
+            **self.get_ussd_request_kwargs(req.POST))
+
+
 class MermaidText(APIView):
 
     def post(self, req):
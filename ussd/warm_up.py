@@ -0,0 +1,136 @@
+"""
+Loads, validates and compiles customer journeys before the first request,
+so that the first subscribers after a deploy don't pay for parsing the
+yaml files and compiling the templates.
+
+Journeys are discovered from the ussd views that define both
+customer_journey_conf and customer_journey_namespace and from the
+USSD_WARM_UP setting::
+
+    USSD_WARM_UP = {
+        # warm up when django starts, use it with servers that load the
+        # application before forking workers e.g gunicorn --preload
+        "on_startup": False,
+        # journeys of views that choose the journey per request
+        "journeys": [
+            {"file": "/app/journeys/main.yml", "namespace": "main"}
+        ]
+    }
+
+The warm_ussd_journeys management command does the same and reports
+timings, use it to check journeys before accepting traffic.
+"""
+import time
+
+import staticconf
+from django.conf import settings
+from django.urls import get_resolver
+from structlog import get_logger
+
+from ussd import defaults as ussd_airflow_variables
+from ussd import yaml_loader
+
+logger = get_logger(__name__)
+
+_EXPRESSION_FIELDS = ('condition', 'expression')
+
+
+def get_warm_up_options() -> dict:
+    options = dict(ussd_airflow_variables.warm_up)
+    options.update(getattr(settings, 'USSD_WARM_UP', {}))
+    return options
+
+
+def get_journeys() -> list:
+    """
+    Returns (customer_journey_conf, namespace) of the journeys to warm up.
+    """
+    from ussd.core import _registered_journeys
+
+    # views register their journeys when they are imported
+    get_resolver().url_patterns
+
+    journeys = list(_registered_journeys)
+    for journey in get_warm_up_options()['journeys']:
+        journey = (journey['file'], journey['namespace'])
+        if journey not in journeys:
+            journeys.append(journey)
+    return journeys
+
+
+def _prime_expressions(content, template_cache):
+    # texts are compiled with the journey, router conditions and update
+    # session expressions are compiled here
+    if isinstance(content, dict):
+        for key, value in content.items():
+            if key in _EXPRESSION_FIELDS and isinstance(value, str):
+                try:
+                    if '{{' in value or '{%' in value:
+                        template_cache.get_template(value)
+                    else:
+                        template_cache.get_expression(value)
+                except Exception:
+                    pass
+            _prime_expressions(value, template_cache)
+    elif isinstance(content, list):
+        for value in content:
+            _prime_expressions(value, template_cache)
+
+
+def warm_up_journey(customer_journey_conf: str, namespace: str) -> dict:
+    """
+    Loads, validates and compiles a journey, returns the time taken by each
+    step in milliseconds and the validation errors.
+    """
+    from ussd.core import UssdView, get_journey_file_path, \
+        get_journey_reload_options, load_journey, template_cache
+
+    timings = {}
+    start = time.perf_counter()
+    journey = load_journey(customer_journey_conf, namespace)
+    timings['load'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for screen in journey.screens.values():
+        _prime_expressions(screen.content, template_cache)
+    timings['compile'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if get_journey_reload_options()['enabled']:
+        # the journey registry doesn't write journeys to staticconf
+        ussd_content = yaml_loader.load_file(
+            get_journey_file_path(customer_journey_conf))
+    else:
+        ussd_content = staticconf.config.get_namespace(
+            namespace).get_config_values()
+    is_valid, errors = UssdView.validate_ussd_journey(ussd_content)
+    timings['validate'] = (time.perf_counter() - start) * 1000
+
+    return dict(
+        file=customer_journey_conf,
+        version=journey.version,
+        screens=len(journey.screens),
+        valid=is_valid,
+        errors=errors,
+        timings=timings
+    )
+
+
+def warm_up_journeys(journeys: list = None) -> dict:
+    """
+    Warms up journeys (all discovered journeys by default), returns the
+    report of each namespace.
+    """
+    report = {}
+    for customer_journey_conf, namespace in journeys or get_journeys():
+        try:
+            report[namespace] = warm_up_journey(customer_journey_conf,
+                                                namespace)
+        except Exception as e:
+            logger.exception("journey_warm_up_failed", namespace=namespace)
+            report[namespace] = dict(file=customer_journey_conf,
+                                     valid=False, errors=str(e))
+            continue
+        log = logger.info if report[namespace]['valid'] else logger.error
+        log("journey_warmed_up", namespace=namespace, **report[namespace])
+    return report
@@ -0,0 +1,118 @@
+"""
+Loading of customer journey yaml files.
+
+Files are parsed with the libyaml (C) safe loader when pyyaml has been
+built with it, it's several times faster than the pure python loader.
+
+Parsed journeys can also be cached on disk, keyed by the hash of the file
+content, so that processes started later don't parse the file again::
+
+    USSD_YAML_CACHE = {
+        "enabled": False,
+        # defaults to a __ussd_cache__ directory next to the yaml file
+        "directory": None
+    }
+
+Only parsing is cached: the cache holds the dict parsed from the file,
+every process still validates and compiles the journey it loads (see
+ussd.core.compile_journey). Compiled journeys reference screen handler
+classes and compiled templates, which are not worth pickling.
+
+The cache is stored with pickle, the directory should only be writable by
+the application.
+"""
+import hashlib
+import os
+import pickle
+
+import yaml
+from django.conf import settings
+from structlog import get_logger
+
+from ussd import defaults as ussd_airflow_variables
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+logger = get_logger(__name__)
+
+CACHE_DIRECTORY_NAME = '__ussd_cache__'
+
+
+def get_cache_options() -> dict:
+    options = dict(ussd_airflow_variables.yaml_cache)
+    options.update(getattr(settings, 'USSD_YAML_CACHE', {}))
+    return options
+
+
+def parse(content):
+    return yaml.load(content, Loader=SafeLoader)
+
+
+def get_cache_path(file_path: str, content: bytes, directory=None) -> str:
+    directory = directory or os.path.join(os.path.dirname(file_path),
+                                          CACHE_DIRECTORY_NAME)
+    # files with the same name in different directories can share the
+    # cache directory
+    return os.path.join(directory, '{name}-{path}.{digest}.pickle'.format(
+        name=os.path.basename(file_path),
+        path=hashlib.sha1(file_path.encode()).hexdigest()[:8],
+        digest=hashlib.sha1(content).hexdigest()))
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("yaml_cache_read_failed", path=cache_path,
+                       error=str(e))
+        return None
+
+
+def _write_cache(cache_path, value):
+    directory, file_name = os.path.split(cache_path)
+    prefix = file_name.rsplit('.', 2)[0] + '.'
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+
+        # remove caches of previous versions of the file
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith('.pickle') and \
+                    name != file_name:
+                os.remove(os.path.join(directory, name))
+    except OSError as e:
+        # e.g read only file system, the file is parsed next time
+        logger.warning("yaml_cache_write_failed", path=cache_path,
+                       error=str(e))
+
+
+def load(content: bytes, file_path: str):
+    """
+    Returns the parsed, not yet validated, content of file_path, from the
+    cache if it's enabled.
+    """
+    options = get_cache_options()
+    if not options['enabled']:
+        return parse(content)
+
+    cache_path = get_cache_path(file_path, content, options['directory'])
+    value = _read_cache(cache_path)
+    if value is None:
+        value = parse(content)
+        _write_cache(cache_path, value)
+    return value
+
+
+def load_file(file_path: str):
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    return load(content, os.path.abspath(file_path))
@@ -1,12 +1,19 @@
 from django.urls import re_path, include
 from django.contrib import admin
-from ussd.views import AfricasTalkingUssdGateway
+from ussd.views import AfricasTalkingUssdGateway, \
+    AsyncAfricasTalkingUssdGateway, SimpleAfricasTalkingUssdGateway
 
 urlpatterns = [
     re_path(r'^admin/', admin.site.urls),
     re_path(r'^africastalking_gateway',
         AfricasTalkingUssdGateway.as_view(),
         name='africastalking_url'),
+    re_path(r'^simple_africastalking_gateway',
+        SimpleAfricasTalkingUssdGateway.as_view(),
+        name='simple_africastalking_url'),
+    re_path(r'^async_africastalking_gateway',
+        AsyncAfricasTalkingUssdGateway.as_view(),
+        name='async_africastalking_url'),
     re_path(r'^ussd_airflow/', include('ussd.urls'))
 ]
 